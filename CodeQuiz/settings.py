@@ -109,9 +109,158 @@ if not os.environ.get('DATABASE_URL'):
         }
     }
 
+# Execution backends per Judge0 language id, with a 'default' for the rest.
+# The local backend runs Python 3 on this machine with rlimits and a warm
+# worker pool; it is not a sandbox and is meant for development and tests.
+EXECUTION_BACKENDS = {
+    'default': 'quiz.backends.judge0.Judge0Backend',
+}
+if os.environ.get('LOCAL_PYTHON_EXECUTION'):
+    EXECUTION_BACKENDS[71] = 'quiz.backends.local.LocalSubprocessBackend'
+
+LOCAL_EXECUTION = {
+    'WORKERS': 4,
+    'CPU_TIME_LIMIT': 5,        # seconds
+    'WALL_TIME_LIMIT': 10,      # seconds
+    'MEMORY_LIMIT': 262144,     # KB
+    'MAX_OUTPUT': 1024 * 1024,  # bytes, per stream
+}
+
 # Judge0 Configuration
 JUDGE0_URL = 'http://judge0:2358'
 
+# Shared Judge0 client: keep-alive connection pool, retries with jittered
+# backoff for reads, and a circuit breaker that fails fast while Judge0 is down.
+JUDGE0_POOL_SIZE = 20
+# Connections of the async client used by the async views, per event loop.
+# Waiting coroutines hold no thread, so this can be far larger; the judging
+# scheduler (JUDGE_SCHEDULER_CAPACITY) still caps executions in flight.
+JUDGE0_ASYNC_POOL_SIZE = 500
+JUDGE0_CONNECT_TIMEOUT = 3
+JUDGE0_READ_TIMEOUT = 20
+JUDGE0_RETRIES = 3
+JUDGE0_RETRY_BACKOFF = 0.2
+JUDGE0_CIRCUIT_FAILURE_THRESHOLD = 5
+JUDGE0_CIRCUIT_RESET_TIMEOUT = 30
+
+# Submit every test case of a submission through /submissions/batch and poll
+# the results in bulk instead of one blocking request per test case.
+JUDGE0_BATCH_SUBMISSIONS = True
+JUDGE0_BATCH_SIZE = 20  # Judge0's default MAX_SUBMISSION_BATCH_SIZE
+JUDGE0_BATCH_POLL_INTERVAL = 0.25
+JUDGE0_BATCH_TIMEOUT = 60
+
+# Compiled languages (C/C++, Java, Kotlin, Rust, Swift, Scala) are compiled
+# once per Judge0 "Multi-file program" job and run against up to
+# JUDGE0_MULTITEST_CHUNK_SIZE inputs inside it. Each test keeps its own time
+# limit and runs in a fresh directory, but all of a job's tests share one
+# sandbox user; set this to False where tests must be strictly isolated.
+# The job limits must stay within Judge0's max_*_time_limit.
+JUDGE0_MULTITEST = True
+JUDGE0_MULTITEST_CHUNK_SIZE = 25
+JUDGE0_MULTITEST_TEST_TIME_LIMIT = 5
+JUDGE0_MULTITEST_CPU_TIME_LIMIT = 15
+JUDGE0_MULTITEST_WALL_TIME_LIMIT = 20
+
+# Cache of deterministic execution results keyed on (code, language, stdin,
+# limits). BACKEND is 'local' (per process), 'redis' (shared) or None.
+JUDGE_RESULT_CACHE = {
+    'BACKEND': os.environ.get('JUDGE_RESULT_CACHE_BACKEND', 'local'),
+    'MAX_ENTRIES': 5000,
+    'TTL': 3600,
+    'REDIS_URL': os.environ.get('REDIS_URL', 'redis://redis:6379/1'),
+}
+
+# Submissions are judged on a background thread pool of this size so the
+# submit request returns immediately. Set to 0 to judge inline on commit.
+JUDGE_WORKERS = 4
+# Longest time the submission status endpoint may hold a long-poll request,
+# waiting on the progress hub below.
+JUDGE_STATUS_MAX_WAIT = 25
+# Judging progress is streamed to the editor as Server-Sent Events (see
+# quiz/progress.py). Use 'redis' when submissions are judged by another
+# process than the one serving the stream.
+JUDGE_PROGRESS = {
+    'BACKEND': os.environ.get('JUDGE_PROGRESS_BACKEND', 'local'),
+    'REDIS_URL': os.environ.get('REDIS_URL', 'redis://redis:6379/1'),
+    'TTL': 600,
+}
+JUDGE_PROGRESS_STREAM_TIMEOUT = 300
+JUDGE_PROGRESS_HEARTBEAT = 15
+# Problems with a fail-fast judging policy run their tests in chunks of this
+# size and stop between chunks once the failure limit is reached.
+JUDGE_FAIL_FAST_CHUNK_SIZE = 5
+# Caps on concurrent Judge0 calls when test cases are fanned out one call per
+# test (JUDGE0_BATCH_SUBMISSIONS = False): process-wide, per submission, per user.
+JUDGE_MAX_CONCURRENT_EXECUTIONS = 16
+JUDGE_MAX_CONCURRENT_PER_SUBMISSION = 4
+JUDGE_MAX_CONCURRENT_PER_USER = 4
+# Executions in flight across all backend calls of this process. Calls wait
+# beyond that, ordered by priority class and fairly between users (see
+# quiz/scheduler.py); large batches are admitted in units of this many tests.
+JUDGE_SCHEDULER_CAPACITY = 32
+JUDGE_SCHEDULER_UNIT_SIZE = 20
+# Identical executions in flight at the same time run once (see
+# quiz/coalescing.py); 'redis' also coalesces across web processes.
+JUDGE_COALESCING = {
+    'BACKEND': os.environ.get('JUDGE_COALESCING_BACKEND', 'local'),
+    'REDIS_URL': os.environ.get('REDIS_URL', 'redis://redis:6379/1'),
+    'LOCK_TIMEOUT': 120,
+}
+
+# Token-bucket limits on Run and Submit, per signed-in user and per client IP
+# (see quiz/ratelimit.py). Use the 'redis' backend when running several web
+# processes so they share the buckets.
+JUDGE_RATE_LIMITS = {
+    'BACKEND': os.environ.get('JUDGE_RATE_LIMIT_BACKEND', 'local'),
+    'REDIS_URL': os.environ.get('REDIS_URL', 'redis://redis:6379/1'),
+    'RATES': {
+        'run': {'user': {'rate': '30/min', 'burst': 10}, 'ip': {'rate': '600/min', 'burst': 100}},
+        'submit': {'user': {'rate': '10/min', 'burst': 5}, 'ip': {'rate': '300/min', 'burst': 60}},
+    },
+}
+
+# Test case data larger than TESTDATA_INLINE_LIMIT bytes is stored as
+# content-addressed files under TESTDATA_ROOT instead of in the database.
+TESTDATA_ROOT = os.environ.get('TESTDATA_ROOT', BASE_DIR / 'testdata')
+TESTDATA_INLINE_LIMIT = 64 * 1024
+
+# Custom checker programs (Problem.checker = 'custom'). C/C++ checkers are
+# compiled once per version of their source into SPECIAL_JUDGE_ROOT.
+SPECIAL_JUDGE_ROOT = os.environ.get('SPECIAL_JUDGE_ROOT', BASE_DIR / 'checkers')
+SPECIAL_JUDGE_TIME_LIMIT = 10
+
+# Per-problem CPU, wall and memory limits (Problem.cpu_time_limit etc.) apply
+# to the problem's own language and are scaled for other languages by the
+# ratio of their multipliers. The defaults per language are in quiz/limits.py;
+# override some with e.g. JUDGE_LANGUAGE_LIMIT_MULTIPLIERS = {71: {'time': 4.0,
+# 'memory': 1.0}}. Limits derived from the reference solution's runs never go
+# below these floors.
+JUDGE_MIN_CPU_TIME_LIMIT = 0.25  # seconds
+JUDGE_MIN_MEMORY_LIMIT = 65536   # KB
+
+# Quiz list, quiz and editor pages are cached whole for anonymous visitors and
+# as template fragments for everyone else, under version keys replaced on
+# every Quiz/Problem/TestCase change (see quiz/page_cache.py). With several
+# web processes use a shared cache, e.g. DJANGO_CACHE_BACKEND=
+# django.core.cache.backends.redis.RedisCache and DJANGO_CACHE_LOCATION=redis://redis:6379/2.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', ''),
+    }
+}
+PAGE_CACHE_TIMEOUT = 300  # seconds
+
+# Per-quiz leaderboards (quiz/leaderboard.py): always kept in the database,
+# and with 'redis' also in sorted sets that serve top-N and rank lookups in
+# O(log n). The 'database' backend ranks every entry in one window query and
+# caches the ranks until the quiz's standings change.
+QUIZ_LEADERBOARD = {
+    'BACKEND': os.environ.get('QUIZ_LEADERBOARD_BACKEND', 'database'),
+    'REDIS_URL': os.environ.get('REDIS_URL', 'redis://redis:6379/1'),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
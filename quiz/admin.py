@@ -1,6 +1,10 @@
+from django import forms
 from django.contrib import admin
+from django.db.models.functions import Substr
+from django.template.defaultfilters import filesizeformat
+from django.utils.html import format_html
 from django.utils.safestring import mark_safe
-from .models import Quiz, Problem, TestCase, Submission
+from .models import Quiz, Problem, TestCase, Submission, SubmissionTestResult
 
 # Basic admin classes
 @admin.register(Quiz)
@@ -12,22 +16,105 @@ class QuizAdmin(admin.ModelAdmin):
 class ProblemAdmin(admin.ModelAdmin):
     list_display = ('title', 'quiz', 'difficulty', 'get_language')
     list_filter = ('quiz', 'difficulty', 'language_id')
-    fields = ('title', 'quiz', 'difficulty', 'language_id', 'description', 'starter_code', 'solution')
+    fields = ('title', 'quiz', 'difficulty', 'language_id', 'judging_policy', 'max_failures', 'checker', 'abs_tolerance', 'rel_tolerance', 'checker_language_id', 'checker_code', 'cpu_time_limit', 'wall_time_limit', 'memory_limit', 'description', 'starter_code', 'solution')
 
     def get_language(self, obj):
         return dict(obj.LANGUAGE_CHOICES).get(obj.language_id, obj.language_id)
     get_language.short_description = 'Language'
 
+PREVIEW_LENGTH = 50
+
+def data_preview(head, sha256, size):
+    """Short preview of test data from its first characters, or a note if it is stored out of row."""
+    if sha256:
+        return f'[stored file, {filesizeformat(size)}]'
+    return head[:PREVIEW_LENGTH] + '...' if len(head) > PREVIEW_LENGTH else head
+
+STORED_PREVIEW_LENGTH = 2000
+
+def stored_preview(source):
+    """The start of test data kept out of row, for the change form."""
+    if source is None:
+        return '-'
+    with source.open() as handle:
+        head = handle.read(STORED_PREVIEW_LENGTH + 1).decode('utf-8', errors='replace')
+    if len(head) > STORED_PREVIEW_LENGTH:
+        head = head[:STORED_PREVIEW_LENGTH] + '\n...'
+    return format_html('<p>Stored file, {}. Leave the field below empty to keep it.</p><pre>{}</pre>',
+                       filesizeformat(source.size), head)
+
+class TestCaseAdminForm(forms.ModelForm):
+    input_file = forms.FileField(required=False, help_text='Replaces the input with the contents of a file.')
+    output_file = forms.FileField(required=False, help_text='Replaces the expected output with the contents of a file.')
+
+    class Meta:
+        model = TestCase
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for field, file_field in (('input_data', 'input_file'), ('expected_output', 'output_file')):
+            upload = cleaned_data.get(file_field)
+            if upload:
+                try:
+                    cleaned_data[field] = upload.read().decode('utf-8')
+                except UnicodeDecodeError:
+                    self.add_error(file_field, 'Test data must be UTF-8 text.')
+        return cleaned_data
+
 @admin.register(TestCase)
 class TestCaseAdmin(admin.ModelAdmin):
-    list_display = ('problem', 'is_sample')
+    form = TestCaseAdminForm
+    list_display = ('problem', 'input_preview', 'output_preview', 'is_sample')
     list_filter = ('is_sample',)
+    list_select_related = ('problem',)
+    fields = ('problem', 'is_sample', 'stored_input', 'input_data', 'input_file',
+              'stored_output', 'expected_output', 'output_file', 'input_size', 'output_size')
+    readonly_fields = ('stored_input', 'stored_output', 'input_size', 'output_size')
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if request.resolver_match and request.resolver_match.url_name.endswith('changelist'):
+            # The list only shows previews, so never load the full test data
+            queryset = queryset.defer('input_data', 'expected_output').annotate(
+                input_head=Substr('input_data', 1, PREVIEW_LENGTH + 1),
+                output_head=Substr('expected_output', 1, PREVIEW_LENGTH + 1),
+            )
+        return queryset
+
+    def input_preview(self, obj):
+        return data_preview(obj.input_head, obj.input_sha256, obj.input_size)
+    input_preview.short_description = 'Input Preview'
+
+    def output_preview(self, obj):
+        return data_preview(obj.output_head, obj.output_sha256, obj.output_size)
+    output_preview.short_description = 'Expected Output Preview'
+
+    def stored_input(self, obj):
+        return stored_preview(obj.input_source if obj.input_sha256 else None)
+    stored_input.short_description = 'Stored input'
+
+    def stored_output(self, obj):
+        return stored_preview(obj.expected_output_source if obj.output_sha256 else None)
+    stored_output.short_description = 'Stored expected output'
+
+class SubmissionTestResultInline(admin.TabularInline):
+    model = SubmissionTestResult
+    fields = ('position', 'test_case_id', 'is_sample', 'status', 'passed', 'time', 'memory', 'checker_time', 'stdout', 'stderr')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 @admin.register(Submission)
 class SubmissionAdmin(admin.ModelAdmin):
-    list_display = ('user', 'problem', 'status_badge', 'score', 'submitted_at')
+    list_display = ('user', 'problem', 'status_badge', 'score', 'execution_time', 'memory', 'submitted_at')
     list_filter = ('status', 'submitted_at', 'problem__quiz')
-    readonly_fields = ('submitted_at',)
+    readonly_fields = ('submitted_at', 'execution_time', 'memory')
+    ordering = ('-submitted_at',)
+    inlines = [SubmissionTestResultInline]
     search_fields = ('user__username', 'problem__title')
     
     fieldsets = (
@@ -39,7 +126,7 @@ class SubmissionAdmin(admin.ModelAdmin):
             'classes': ('wide',)
         }),
         ('Results', {
-            'fields': ('status', 'score'),
+            'fields': ('status', 'score', 'execution_time', 'memory'),
         }),
         ('Timestamps', {
             'fields': ('submitted_at',),
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models.functions import Substr
 from django.forms import ModelForm, CharField, Textarea
 from django.utils.safestring import mark_safe
 from django.urls import reverse, path
@@ -7,9 +8,9 @@ from django.shortcuts import render, get_object_or_404
 from django.template.loader import render_to_string
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from django.conf import settings
 import json
-import requests
+from .admin import PREVIEW_LENGTH, SubmissionTestResultInline, data_preview
+from .judging import call_judge0_api
 from .models import Quiz, Problem, TestCase, Submission
 
 class CodeEditorWidget(Textarea):
@@ -84,6 +85,10 @@ class ProblemAdmin(admin.ModelAdmin):
             'fields': ('starter_code', 'solution'),
             'classes': ('wide',)
         }),
+        ('Judging', {
+            'fields': ('judging_policy', 'max_failures', 'checker', 'abs_tolerance', 'rel_tolerance', 'checker_language_id', 'checker_code',
+                       'cpu_time_limit', 'wall_time_limit', 'memory_limit'),
+        }),
     )
     
     def test_solution_link(self, obj):
@@ -132,37 +137,24 @@ class ProblemAdmin(admin.ModelAdmin):
                 language_id = data.get('language_id', 71)  # Default to Python
                 input_data = data.get('input', '')
                 
-                # Submit to Judge0
-                submission_data = {
-                    'source_code': code,
-                    'language_id': language_id,
-                    'stdin': input_data
-                }
-                
-                # Replace with your Judge0 API endpoint
-                judge0_url = getattr(settings, 'JUDGE0_URL', 'http://localhost:2358')
-                
-                response = requests.post(
-                    f'{judge0_url}/submissions?wait=true',
-                    json=submission_data,
-                    headers={'Content-Type': 'application/json'}
-                )
-                
-                if response.status_code == 201:
-                    result = response.json()
-                    return JsonResponse({
-                        'success': True,
-                        'output': result.get('stdout', ''),
-                        'error': result.get('stderr', ''),
-                        'status': result.get('status', {}).get('description', 'Unknown'),
-                        'execution_time': result.get('time', ''),
-                        'memory': result.get('memory', '')
-                    })
-                else:
+                # Admin tests get the lowest scheduling priority
+                run = call_judge0_api(code, language_id, stdin=input_data,
+                                      priority='admin', user_key=request.user.id)
+                if not run.get('success'):
                     return JsonResponse({
                         'success': False,
-                        'error': 'Failed to execute code'
+                        'error': run.get('error')
                     })
+                result = run['data']
+                
+                return JsonResponse({
+                    'success': True,
+                    'output': result.get('stdout', ''),
+                    'error': result.get('stderr', ''),
+                    'status': result.get('status', {}).get('description', 'Unknown'),
+                    'execution_time': result.get('time', ''),
+                    'memory': result.get('memory', '')
+                })
                     
             except Exception as e:
                 return JsonResponse({
@@ -272,10 +264,15 @@ class QuizAdmin(admin.ModelAdmin):
                 )
                 # Copy test cases
                 for test_case in problem.testcase_set.all():
+                    # Stored test data is shared by hash, not copied
                     TestCase.objects.create(
                         problem=new_problem,
                         input_data=test_case.input_data,
                         expected_output=test_case.expected_output,
+                        input_sha256=test_case.input_sha256,
+                        input_size=test_case.input_size,
+                        output_sha256=test_case.output_sha256,
+                        output_size=test_case.output_size,
                         is_sample=test_case.is_sample
                     )
         self.message_user(request, f"Successfully duplicated {queryset.count()} quiz(es).")
@@ -307,20 +304,29 @@ class TestCaseAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        # Previews only need the first characters of the test data
+        return super().get_queryset(request).defer('input_data', 'expected_output').annotate(
+            input_head=Substr('input_data', 1, PREVIEW_LENGTH + 1),
+            output_head=Substr('expected_output', 1, PREVIEW_LENGTH + 1),
+        )
+    
     def input_preview(self, obj):
-        return obj.input_data[:50] + '...' if len(obj.input_data) > 50 else obj.input_data
+        return data_preview(obj.input_head, obj.input_sha256, obj.input_size)
     input_preview.short_description = 'Input Preview'
     
     def output_preview(self, obj):
-        return obj.expected_output[:50] + '...' if len(obj.expected_output) > 50 else obj.expected_output
+        return data_preview(obj.output_head, obj.output_sha256, obj.output_size)
     output_preview.short_description = 'Expected Output Preview'
 
 @admin.register(Submission)
 class SubmissionAdmin(admin.ModelAdmin):
-    list_display = ('user', 'problem', 'status', 'score', 'submitted_at', 'view_code_link')
+    list_display = ('user', 'problem', 'status', 'score', 'execution_time', 'memory', 'submitted_at', 'view_code_link')
     list_filter = ('status', 'problem__quiz', 'submitted_at')
     search_fields = ('user__username', 'problem__title')
-    readonly_fields = ('user', 'problem', 'code', 'submitted_at')
+    readonly_fields = ('user', 'problem', 'code', 'submitted_at', 'execution_time', 'memory')
+    ordering = ('-submitted_at',)
+    inlines = [SubmissionTestResultInline]
     date_hierarchy = 'submitted_at'
     
     def view_code_link(self, obj):
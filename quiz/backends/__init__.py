@@ -0,0 +1,70 @@
+"""
+Execution backends that run contestant code.
+
+Every backend returns results in Judge0's submission shape (`stdout`,
+`stderr`, `compile_output`, `message`, `status` with `id`/`description`,
+`time` and `memory`), so the judging code does not care where a program
+ran. Per-problem limits are passed as a dict of Judge0's `cpu_time_limit`
+(seconds), `wall_time_limit` (seconds) and `memory_limit` (KB) fields, and
+missing keys use the backend's defaults. Backends are chosen per language
+with the EXECUTION_BACKENDS setting::
+
+    EXECUTION_BACKENDS = {
+        'default': 'quiz.backends.judge0.Judge0Backend',
+        71: 'quiz.backends.local.LocalSubprocessBackend',  # Python 3
+    }
+"""
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DEFAULT_EXECUTION_BACKENDS = {
+    'default': 'quiz.backends.judge0.Judge0Backend',
+}
+
+
+class ExecutionError(Exception):
+    """Raised when a backend could not execute a program at all."""
+
+
+class ExecutionBackend:
+    """Base class for execution backends."""
+
+    # True if `execute_many` runs all inputs in one round trip, so callers
+    # should prefer it over fanning out `execute` calls themselves.
+    supports_batch = False
+
+    def supports(self, language_id):
+        return True
+
+    def execute(self, code, language_id, stdin=None, limits=None):
+        """Run `code` once under `limits` and return a Judge0-shaped result dict."""
+        raise NotImplementedError
+
+    def execute_many(self, code, language_id, stdins, limits=None):
+        """Run `code` once per input and return the results in input order."""
+        return [self.execute(code, language_id, stdin, limits) for stdin in stdins]
+
+    async def aexecute(self, code, language_id, stdin=None, limits=None):
+        """`execute` for coroutines; backends without native async I/O run it on a thread."""
+        return await sync_to_async(self.execute, thread_sensitive=False)(code, language_id, stdin, limits)
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+def get_backend(language_id):
+    """Return the backend configured for `language_id`, falling back to the default."""
+    config = getattr(settings, 'EXECUTION_BACKENDS', DEFAULT_EXECUTION_BACKENDS)
+    path = config.get(int(language_id)) or config.get('default') or DEFAULT_EXECUTION_BACKENDS['default']
+    backend = _backends.get(path)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(path)
+            if backend is None:
+                backend = _backends[path] = import_string(path)()
+    if not backend.supports(language_id):
+        raise ExecutionError(f"The configured execution backend does not support language {language_id}.")
+    return backend
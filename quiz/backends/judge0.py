@@ -0,0 +1,140 @@
+import logging
+import time
+
+from django.conf import settings
+
+from ..judge0_client import Judge0Error, get_async_judge0_client, get_judge0_client
+from ..testdata import as_text
+from . import ExecutionBackend, ExecutionError
+from .multitest import MULTI_FILE_LANGUAGE_ID, build_archive, get_toolchain, parse_output
+
+logger = logging.getLogger(__name__)
+
+JUDGE0_BATCH_SIZE = getattr(settings, 'JUDGE0_BATCH_SIZE', 20)
+JUDGE0_BATCH_POLL_INTERVAL = getattr(settings, 'JUDGE0_BATCH_POLL_INTERVAL', 0.25)
+JUDGE0_BATCH_TIMEOUT = getattr(settings, 'JUDGE0_BATCH_TIMEOUT', 60)
+JUDGE0_MULTITEST = getattr(settings, 'JUDGE0_MULTITEST', True)
+JUDGE0_MULTITEST_CHUNK_SIZE = getattr(settings, 'JUDGE0_MULTITEST_CHUNK_SIZE', 25)
+JUDGE0_MULTITEST_TEST_TIME_LIMIT = getattr(settings, 'JUDGE0_MULTITEST_TEST_TIME_LIMIT', 5)
+JUDGE0_MULTITEST_CPU_TIME_LIMIT = getattr(settings, 'JUDGE0_MULTITEST_CPU_TIME_LIMIT', 15)
+JUDGE0_MULTITEST_WALL_TIME_LIMIT = getattr(settings, 'JUDGE0_MULTITEST_WALL_TIME_LIMIT', 20)
+
+# Judge0 status ids that mean the submission has not finished yet.
+JUDGE0_PENDING_STATUS_IDS = (1, 2)  # In Queue, Processing
+JUDGE0_RESULT_FIELDS = 'token,stdout,stderr,compile_output,message,status,time,memory'
+
+
+class Judge0Backend(ExecutionBackend):
+    """Runs programs on the Judge0 service at JUDGE0_URL."""
+
+    supports_batch = True
+
+    def _payload(self, code, language_id, stdin, limits=None):
+        return {
+            "source_code": code,
+            "language_id": int(language_id),
+            "stdin": as_text(stdin),
+            **(limits or {}),
+        }
+
+    def execute(self, code, language_id, stdin=None, limits=None):
+        logger.info(f"Sending request to Judge0 with language_id: {language_id}")
+        try:
+            return get_judge0_client().submit(self._payload(code, language_id, stdin, limits), wait=True)
+        except Judge0Error as e:
+            raise ExecutionError(str(e)) from e
+
+    async def aexecute(self, code, language_id, stdin=None, limits=None):
+        logger.info(f"Sending async request to Judge0 with language_id: {language_id}")
+        try:
+            return await get_async_judge0_client().submit(self._payload(code, language_id, stdin, limits), wait=True)
+        except Judge0Error as e:
+            raise ExecutionError(str(e)) from e
+
+    def execute_many(self, code, language_id, stdins, limits=None):
+        """
+        Run the same program against many inputs using Judge0's batch endpoints.
+
+        Compiled languages with a multi-test toolchain are compiled once per
+        job and run against many inputs inside it (see `multitest`); every
+        other language gets one Judge0 submission per input.
+        """
+        toolchain = get_toolchain(language_id) if JUDGE0_MULTITEST else None
+        if toolchain and len(stdins) > 1:
+            return self._execute_multitest(code, language_id, toolchain, stdins, limits or {})
+        return self._run_batch([self._payload(code, language_id, stdin, limits) for stdin in stdins])
+
+    def _execute_multitest(self, code, language_id, toolchain, stdins, limits):
+        # Each test runs under `timeout`, a CPU rlimit and a memory rlimit;
+        # the job's own memory limit stays generous for the compiler
+        time_limit = limits.get('wall_time_limit') or limits.get('cpu_time_limit') or JUDGE0_MULTITEST_TEST_TIME_LIMIT
+        cpu_time_limit = limits.get('cpu_time_limit')
+        memory_limit = limits.get('memory_limit')
+        chunks = [list(range(start, min(start + JUDGE0_MULTITEST_CHUNK_SIZE, len(stdins))))
+                  for start in range(0, len(stdins), JUDGE0_MULTITEST_CHUNK_SIZE)]
+        jobs = self._run_batch([
+            {
+                "language_id": MULTI_FILE_LANGUAGE_ID,
+                "additional_files": build_archive(code, toolchain, [stdins[i] for i in chunk], time_limit, cpu_time_limit, memory_limit),
+                "cpu_time_limit": JUDGE0_MULTITEST_CPU_TIME_LIMIT,
+                "wall_time_limit": JUDGE0_MULTITEST_WALL_TIME_LIMIT,
+            }
+            for chunk in chunks
+        ])
+
+        results = [None] * len(stdins)
+        for chunk, job in zip(chunks, jobs):
+            parsed = parse_output(job, time_limit, cpu_time_limit, memory_limit)
+            if parsed is None:
+                # Compilation failed once for the whole chunk
+                for i in chunk:
+                    results[i] = job
+                continue
+            for position, i in enumerate(chunk):
+                results[i] = parsed.get(position)
+
+        # Tests the jobs did not reach within their overall limits run on their own
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            logger.info(f"Re-running {len(missing)} test(s) outside multi-test jobs.")
+            for i, result in zip(missing, self._run_batch(
+                    [self._payload(code, language_id, stdins[i], limits) for i in missing])):
+                results[i] = result
+        return results
+
+    def _run_batch(self, submissions):
+        """
+        Submit every payload up front through /submissions/batch, then poll all
+        tokens in bulk until Judge0 has finished them, so the total wall-clock
+        time is close to the slowest run rather than the sum of runs.
+        """
+        client = get_judge0_client()
+        try:
+            tokens = []
+            for start in range(0, len(submissions), JUDGE0_BATCH_SIZE):
+                chunk = submissions[start:start + JUDGE0_BATCH_SIZE]
+                logger.info(f"Sending batch of {len(chunk)} to Judge0 with language_id: {chunk[0]['language_id']}")
+                for item in client.submit_batch(chunk):
+                    if 'token' not in item:
+                        logger.error(f"Judge0 rejected a batch submission: {item}")
+                        raise ExecutionError("The code execution service rejected the submission.")
+                    tokens.append(item['token'])
+
+            results = {}
+            deadline = time.monotonic() + JUDGE0_BATCH_TIMEOUT
+            while True:
+                pending = [token for token in tokens if token not in results]
+                for start in range(0, len(pending), JUDGE0_BATCH_SIZE):
+                    chunk = pending[start:start + JUDGE0_BATCH_SIZE]
+                    for data in client.get_batch(chunk, fields=JUDGE0_RESULT_FIELDS):
+                        if data and data.get('status', {}).get('id') not in JUDGE0_PENDING_STATUS_IDS:
+                            results[data['token']] = data
+
+                if len(results) == len(tokens):
+                    return [results[token] for token in tokens]
+                if time.monotonic() >= deadline:
+                    logger.error(f"Judge0 batch did not finish within {JUDGE0_BATCH_TIMEOUT}s.")
+                    raise ExecutionError("Code execution timed out.")
+                time.sleep(JUDGE0_BATCH_POLL_INTERVAL)
+        except Judge0Error as e:
+            raise ExecutionError(str(e)) from e
@@ -0,0 +1,106 @@
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+
+from django.conf import settings
+
+from ..testdata import StoredData
+from . import ExecutionBackend, ExecutionError
+
+logger = logging.getLogger(__name__)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sandbox_worker.py')
+
+DEFAULT_LOCAL_EXECUTION = {
+    'WORKERS': 4,
+    'CPU_TIME_LIMIT': 5,        # seconds
+    'WALL_TIME_LIMIT': 10,      # seconds
+    'MEMORY_LIMIT': 262144,     # KB
+    'MAX_OUTPUT': 1024 * 1024,  # bytes, per stream
+}
+
+
+class _Worker:
+    """One pre-started `sandbox_worker.py` process and its JSON-lines pipe."""
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, '-I', WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+
+    def run(self, job):
+        self.process.stdin.write(json.dumps(job) + '\n')
+        self.process.stdin.flush()
+        line = self.process.stdout.readline()
+        if not line:
+            raise ExecutionError("The local execution worker exited unexpectedly.")
+        return json.loads(line)
+
+    def close(self):
+        self.process.kill()
+        self.process.wait()
+
+
+class LocalSubprocessBackend(ExecutionBackend):
+    """
+    Runs Python 3 (language 71) programs on this machine.
+
+    A pool of pre-started worker interpreters is kept warm; each run is forked
+    from a worker with rlimit CPU, address-space and output-size limits. This
+    gives no filesystem or network isolation, so it is meant for local
+    development, tests and benchmarks, not for untrusted production traffic.
+    Configure with the LOCAL_EXECUTION setting.
+    """
+
+    LANGUAGE_IDS = (71,)
+
+    def __init__(self):
+        config = {**DEFAULT_LOCAL_EXECUTION, **getattr(settings, 'LOCAL_EXECUTION', {})}
+        self.cpu_time_limit = config['CPU_TIME_LIMIT']
+        self.wall_time_limit = config['WALL_TIME_LIMIT']
+        self.memory_limit = config['MEMORY_LIMIT']
+        self.max_output = config['MAX_OUTPUT']
+        self._idle = queue.Queue()
+        for _ in range(config['WORKERS']):
+            self._idle.put(_Worker())
+
+    def supports(self, language_id):
+        return int(language_id) in self.LANGUAGE_IDS
+
+    def execute(self, code, language_id, stdin=None, limits=None):
+        job = {
+            'code': code,
+            'cpu_time_limit': self.cpu_time_limit,
+            'wall_time_limit': self.wall_time_limit,
+            'memory_limit': self.memory_limit,
+            'max_output': self.max_output,
+            **(limits or {}),
+        }
+        if isinstance(stdin, StoredData):
+            # The worker reads stored test data straight from the file
+            job['stdin_path'] = stdin.path
+        else:
+            job['stdin'] = stdin or ''
+        return self.run_job(job)
+
+    def run_job(self, job):
+        """Send a raw `sandbox_worker` job to an idle warm worker and return its result."""
+        worker = self._idle.get()
+        try:
+            return worker.run(job)
+        except (OSError, ValueError, ExecutionError) as e:
+            # Replace the broken worker so the pool keeps its size
+            logger.error(f"Local execution worker failed: {e}")
+            worker.close()
+            worker = _Worker()
+            raise ExecutionError("The local execution worker failed.") from e
+        finally:
+            self._idle.put(worker)
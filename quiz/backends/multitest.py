@@ -0,0 +1,225 @@
+"""
+Compile once, run every test: multi-test jobs for Judge0.
+
+For compiled languages Judge0 recompiles the source for every submission, so
+judging N test cases costs N compilations. A multi-test job is a single
+Judge0 "Multi-file program" (language 89) submission whose archive holds the
+source, every test input and generated `compile`/`run` scripts. The program
+is compiled once in `build/` and then run against each input in turn under
+its own `timeout`, CPU rlimit and memory rlimit, and the run script reports
+every test's exit code, wall time, CPU time, peak memory, stdout and stderr
+in a line-based format parsed by `parse_output`.
+
+Each test runs in a fresh copy of `build/`, with its input on stdin only;
+the other tests' inputs and earlier outputs are not readable while it runs
+(their directory is chmod 000 and outputs are removed once reported). All
+tests still share one sandbox user, so a program that deliberately changes
+those permissions back can read later inputs: set JUDGE0_MULTITEST = False
+to give every test a Judge0 submission of its own where that matters. CPU
+time and memory come from GNU time; an image without /usr/bin/time reports
+wall time and no memory.
+"""
+import base64
+import io
+import math
+import zipfile
+
+from django.conf import settings
+
+from ..testdata import StoredData
+
+MULTI_FILE_LANGUAGE_ID = 89
+
+# Toolchains inside the judge0/judge0 image, keyed by this app's language ids.
+# Override or extend with the JUDGE0_MULTITEST_LANGUAGES setting.
+GCC = '/usr/local/gcc-{version}/bin/{compiler} -O2 -o main {source}'
+DEFAULT_MULTITEST_LANGUAGES = {
+    50: {'source': 'main.c', 'compile': GCC.format(version='9.2.0', compiler='gcc', source='main.c'), 'run': './main'},
+    49: {'source': 'main.c', 'compile': GCC.format(version='8.3.0', compiler='gcc', source='main.c'), 'run': './main'},
+    54: {'source': 'main.cpp', 'compile': GCC.format(version='9.2.0', compiler='g++', source='main.cpp'), 'run': './main'},
+    55: {'source': 'main.cpp', 'compile': GCC.format(version='8.3.0', compiler='g++', source='main.cpp'), 'run': './main'},
+    56: {'source': 'main.cpp', 'compile': GCC.format(version='7.4.0', compiler='g++', source='main.cpp'), 'run': './main'},
+    57: {'source': 'main.cpp', 'compile': GCC.format(version='6.3.0', compiler='g++', source='main.cpp'), 'run': './main'},
+    58: {'source': 'main.cpp', 'compile': GCC.format(version='5.4.0', compiler='g++', source='main.cpp'), 'run': './main'},
+    59: {'source': 'main.cpp', 'compile': GCC.format(version='4.9.2', compiler='g++', source='main.cpp'), 'run': './main'},
+    62: {
+        'source': 'Main.java',
+        'compile': '/usr/local/openjdk13/bin/javac Main.java',
+        'run': '/usr/local/openjdk13/bin/java Main',
+        'limit_address_space': False,
+    },
+    61: {
+        'source': 'Main.kt',
+        'compile': '/usr/local/kotlin-1.3.70/bin/kotlinc Main.kt -include-runtime -d main.jar',
+        'run': '/usr/local/openjdk13/bin/java -jar main.jar',
+        'limit_address_space': False,
+    },
+    78: {
+        'source': 'Main.kt',
+        'compile': '/usr/local/kotlin-1.6.10/bin/kotlinc Main.kt -include-runtime -d main.jar',
+        'run': '/usr/local/openjdk13/bin/java -jar main.jar',
+        'limit_address_space': False,
+    },
+    73: {'source': 'main.rs', 'compile': '/usr/local/rust-1.40.0/bin/rustc -O -o main main.rs', 'run': './main'},
+    74: {'source': 'main.swift', 'compile': '/usr/local/swift-5.2.3/bin/swiftc -O -o main main.swift', 'run': './main'},
+    79: {
+        'source': 'Main.scala',
+        'compile': '/usr/local/scala-2.13.4/bin/scalac Main.scala',
+        'run': '/usr/local/scala-2.13.4/bin/scala Main',
+        'limit_address_space': False,
+    },
+}
+# The JVM reserves far more address space than it uses and fails to start
+# under `ulimit -v`, so JVM toolchains are only held to their measured peak
+
+HEADER = '@@CQ-TEST'
+STATS = '@@CQ-STATS'
+MAX_TEST_OUTPUT = 1024 * 1024  # bytes of stdout reported per test
+MAX_TEST_STDERR = 64 * 1024
+
+# Exit codes of `timeout -s KILL` / a shell for a child killed by a signal
+KILLED = 128 + 9
+CPU_LIMIT_EXCEEDED = 128 + 24  # SIGXCPU
+SIGNAL_EXIT_STATUSES = {
+    128 + 11: {'id': 7, 'description': 'Runtime Error (SIGSEGV)'},
+    128 + 25: {'id': 8, 'description': 'Runtime Error (SIGXFSZ)'},
+    128 + 8: {'id': 9, 'description': 'Runtime Error (SIGFPE)'},
+    128 + 6: {'id': 10, 'description': 'Runtime Error (SIGABRT)'},
+}
+ACCEPTED = {'id': 3, 'description': 'Accepted'}
+TIME_LIMIT_EXCEEDED = {'id': 5, 'description': 'Time Limit Exceeded'}
+RUNTIME_ERROR_NZEC = {'id': 11, 'description': 'Runtime Error (NZEC)'}
+RUNTIME_ERROR_OTHER = {'id': 12, 'description': 'Runtime Error (Other)'}
+# Judge0 has no status of its own for this; the verdict is what the app stores
+MEMORY_LIMIT_EXCEEDED = {'id': 12, 'description': 'Memory Limit Exceeded'}
+# What a program's runtime prints when an allocation fails under the rlimit
+OUT_OF_MEMORY_MARKERS = ('std::bad_alloc', 'memory allocation of', 'OutOfMemoryError')
+
+
+def get_toolchain(language_id):
+    """Return the compile/run recipe for `language_id`, or None if it has none."""
+    languages = {**DEFAULT_MULTITEST_LANGUAGES, **getattr(settings, 'JUDGE0_MULTITEST_LANGUAGES', {})}
+    return languages.get(int(language_id))
+
+
+def _run_script(toolchain, count, time_limit, cpu_time_limit=None, memory_limit=None):
+    rlimits = f'ulimit -t {math.ceil(cpu_time_limit)} && ' if cpu_time_limit else ''
+    if memory_limit and toolchain.get('limit_address_space', True):
+        rlimits += f'ulimit -v {int(memory_limit)} && '
+    return '\n'.join([
+        'measured() {',
+        # GNU time's line always comes last on stderr, after anything the program printed
+        f'  if [ -x /usr/bin/time ]; then /usr/bin/time -f "\\n{STATS} %U %S %M" "$@"; else "$@"; fi',
+        '}',
+        f'for i in $(seq 0 {count - 1}); do',
+        '  rm -rf work && cp -r build work',
+        '  exec 3< tests/$i.in',
+        '  chmod 000 tests build',
+        '  start=$(date +%s%N)',
+        f'  (cd work && {rlimits}measured timeout -s KILL {time_limit} {toolchain["run"]}) <&3 3<&- > test.out 2> test.err',
+        '  code=$?',
+        '  end=$(date +%s%N)',
+        '  exec 3<&-',
+        '  chmod 700 tests build',
+        '  stats=$(tail -n 1 test.err)',
+        '  case "$stats" in',
+        f'    "{STATS} "*) stats=${{stats#{STATS} }}; head -n -1 test.err > test.tmp; mv test.tmp test.err ;;',
+        "    *) stats='' ;;",
+        '  esac',
+        f'  echo "{HEADER} $i $code $(( (end - start) / 1000000 )) $stats"',
+        f'  head -c {MAX_TEST_OUTPUT} test.out | base64 -w0; echo',
+        f'  head -c {MAX_TEST_STDERR} test.err | base64 -w0; echo',
+        '  rm -f test.out test.err',
+        'done',
+        '',
+    ])
+
+
+def build_archive(code, toolchain, stdins, time_limit, cpu_time_limit=None, memory_limit=None):
+    """
+    Return the base64 zip for a multi-test job running `code` on every input,
+    each for at most `time_limit` wall seconds, `cpu_time_limit` CPU seconds
+    and `memory_limit` KB of address space.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(f'build/{toolchain["source"]}', code)
+        archive.writestr('compile', f'cd build && {toolchain["compile"]}\n')
+        archive.writestr('run', _run_script(toolchain, len(stdins), time_limit, cpu_time_limit, memory_limit))
+        for i, stdin in enumerate(stdins):
+            if isinstance(stdin, StoredData):
+                archive.write(stdin.path, f'tests/{i}.in')
+            else:
+                archive.writestr(f'tests/{i}.in', stdin or '')
+    return base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def _decode(line):
+    return base64.b64decode(line).decode('utf-8', errors='replace') if line else ''
+
+
+def _status_for(exit_code, elapsed, cpu_time, memory, stderr, time_limit, cpu_time_limit, memory_limit):
+    if cpu_time_limit and cpu_time is not None and cpu_time > cpu_time_limit:
+        return TIME_LIMIT_EXCEEDED
+    if memory_limit and memory is not None and memory > memory_limit:
+        return MEMORY_LIMIT_EXCEEDED
+    if memory_limit and exit_code != 0 and any(marker in stderr for marker in OUT_OF_MEMORY_MARKERS):
+        return MEMORY_LIMIT_EXCEEDED
+    if exit_code == 0:
+        return ACCEPTED
+    # The CPU rlimit sends SIGXCPU and then SIGKILL, which can only arrive
+    # once at least that much wall time has passed
+    limit = min(time_limit, cpu_time_limit or time_limit)
+    if exit_code == CPU_LIMIT_EXCEEDED or (exit_code == KILLED and elapsed >= limit):
+        return TIME_LIMIT_EXCEEDED
+    if exit_code in SIGNAL_EXIT_STATUSES:
+        return SIGNAL_EXIT_STATUSES[exit_code]
+    if exit_code > 128:
+        return RUNTIME_ERROR_OTHER
+    return RUNTIME_ERROR_NZEC
+
+
+def parse_output(job, time_limit, cpu_time_limit=None, memory_limit=None):
+    """
+    Split a finished multi-test job into per-test Judge0-shaped results,
+    with each test's own CPU time (wall time without GNU time) and peak
+    memory (None without GNU time). A test whose peak memory went over
+    `memory_limit` KB, or that failed to allocate under it, is a Memory
+    Limit Exceeded.
+
+    Returns {test index: result}. Tests the job did not get to (e.g. it ran
+    out of its overall time budget) are missing from the dict.
+    """
+    status_id = (job.get('status') or {}).get('id')
+    if status_id == 6:
+        # Compilation failed: every test shares the compiler's verdict
+        return None
+
+    results = {}
+    lines = (job.get('stdout') or '').split('\n')
+    position = 0
+    while position + 2 < len(lines):
+        parts = lines[position].split()
+        if len(parts) not in (4, 7) or parts[0] != HEADER:
+            position += 1
+            continue
+        try:
+            index, exit_code, elapsed_ms = (int(part) for part in parts[1:4])
+            cpu_time = float(parts[4]) + float(parts[5]) if len(parts) == 7 else None
+            memory = int(parts[6]) if len(parts) == 7 else None
+            stdout, stderr = _decode(lines[position + 1]), _decode(lines[position + 2])
+        except ValueError:
+            # Output cut off mid-test when the job hit its overall limit
+            break
+        elapsed = elapsed_ms / 1000
+        results[index] = {
+            'stdout': stdout,
+            'stderr': stderr,
+            'compile_output': None,
+            'message': None,
+            'status': _status_for(exit_code, elapsed, cpu_time, memory, stderr, time_limit, cpu_time_limit, memory_limit),
+            'time': f'{elapsed if cpu_time is None else cpu_time:.3f}',
+            'memory': memory,
+        }
+        position += 3
+    return results
@@ -0,0 +1,184 @@
+"""
+Pre-started Python worker used by `LocalSubprocessBackend`.
+
+The worker is launched once with `python -I` and then serves jobs read as
+JSON lines on stdin, one result JSON line per job on stdout. Each job is
+compiled in the worker and run in a forked child with CPU, memory and
+output-size rlimits applied. Forking a warm interpreter skips the Python
+start-up cost of a fresh process per run.
+
+This module only uses the standard library and must not import Django.
+"""
+import json
+import os
+import resource
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+# Judge0 status ids and descriptions, so results look the same as Judge0's
+ACCEPTED = (3, 'Accepted')
+TIME_LIMIT_EXCEEDED = (5, 'Time Limit Exceeded')
+COMPILATION_ERROR = (6, 'Compilation Error')
+SIGNAL_STATUSES = {
+    signal.SIGSEGV: (7, 'Runtime Error (SIGSEGV)'),
+    signal.SIGXFSZ: (8, 'Runtime Error (SIGXFSZ)'),
+    signal.SIGFPE: (9, 'Runtime Error (SIGFPE)'),
+    signal.SIGABRT: (10, 'Runtime Error (SIGABRT)'),
+}
+RUNTIME_ERROR_NZEC = (11, 'Runtime Error (NZEC)')
+RUNTIME_ERROR_OTHER = (12, 'Runtime Error (Other)')
+
+
+def _result(status, stdout='', stderr='', compile_output=None, message=None, cpu_time=0.0, memory=0,
+            exit_code=None):
+    return {
+        'stdout': stdout,
+        'stderr': stderr,
+        'compile_output': compile_output,
+        'message': message,
+        'status': {'id': status[0], 'description': status[1]},
+        'time': f'{cpu_time:.3f}',
+        'memory': memory,
+        'exit_code': exit_code,
+    }
+
+
+def _read(handle, limit):
+    handle.seek(0)
+    return handle.read(limit).decode('utf-8', errors='replace')
+
+
+def _run_child(code_object, stdin_file, stdout_file, stderr_file, workdir, job):
+    """Runs in the forked child: apply limits, rewire stdio and exec the program."""
+    try:
+        os.setpgid(0, 0)
+        cpu = max(1, int(job['cpu_time_limit'] + 0.999))
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+        memory = job['memory_limit'] * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (job['max_output'], job['max_output']))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+        os.dup2(stdin_file.fileno(), 0)
+        os.dup2(stdout_file.fileno(), 1)
+        os.dup2(stderr_file.fileno(), 2)
+        os.chdir(workdir)
+        # The worker's own stdio objects still hold buffered protocol data
+        sys.stdin = sys.__stdin__ = open(0, 'r', closefd=False)
+        sys.stdout = sys.__stdout__ = open(1, 'w', closefd=False)
+        sys.stderr = sys.__stderr__ = open(2, 'w', closefd=False)
+        sys.argv = job.get('argv') or ['main.py']
+    except BaseException:
+        os._exit(120)
+
+    exit_code = 0
+    try:
+        exec(code_object, {'__name__': '__main__', '__builtins__': __builtins__})
+    except SystemExit as e:
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException:
+        traceback.print_exc()
+        exit_code = 1
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    except BaseException:
+        exit_code = exit_code or 1
+    os._exit(exit_code)
+
+
+# Code objects of programs run many times (e.g. checkers), by the job's code_key
+_compiled = {}
+
+
+def run_job(job):
+    code_key = job.get('code_key')
+    code_object = _compiled.get(code_key)
+    if code_object is None:
+        try:
+            code_object = compile(job['code'], 'main.py', 'exec')
+        except (SyntaxError, ValueError):
+            return _result(COMPILATION_ERROR, compile_output=traceback.format_exc(limit=0))
+        if code_key:
+            _compiled[code_key] = code_object
+
+    stdin_path = job.get('stdin_path')
+    with (open(stdin_path, 'rb') if stdin_path else tempfile.TemporaryFile()) as stdin_file, \
+            tempfile.TemporaryFile() as stdout_file, \
+            tempfile.TemporaryFile() as stderr_file, \
+            tempfile.TemporaryDirectory() as workdir:
+        if not stdin_path:
+            stdin_file.write((job.get('stdin') or '').encode('utf-8'))
+            stdin_file.seek(0)
+
+        pid = os.fork()
+        if pid == 0:
+            _run_child(code_object, stdin_file, stdout_file, stderr_file, workdir, job)
+        try:
+            # Also set here so the group exists even if we kill before the child runs
+            os.setpgid(pid, pid)
+        except OSError:
+            pass
+
+        deadline = time.monotonic() + job['wall_time_limit']
+        timed_out = False
+        while True:
+            waited_pid, wait_status, usage = os.wait4(pid, os.WNOHANG)
+            if waited_pid:
+                break
+            if time.monotonic() >= deadline:
+                timed_out = True
+                try:
+                    os.killpg(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                _, wait_status, usage = os.wait4(pid, 0)
+                break
+            time.sleep(0.002)
+
+        cpu_time = usage.ru_utime + usage.ru_stime
+        stdout = _read(stdout_file, job['max_output'])
+        stderr = _read(stderr_file, job['max_output'])
+
+    if timed_out or cpu_time >= job['cpu_time_limit']:
+        status = TIME_LIMIT_EXCEEDED
+    elif os.WIFSIGNALED(wait_status):
+        signum = os.WTERMSIG(wait_status)
+        status = TIME_LIMIT_EXCEEDED if signum == signal.SIGXCPU else SIGNAL_STATUSES.get(signum, RUNTIME_ERROR_OTHER)
+    elif os.WEXITSTATUS(wait_status) != 0:
+        status = RUNTIME_ERROR_NZEC
+    else:
+        status = ACCEPTED
+
+    message = None
+    exit_code = os.WEXITSTATUS(wait_status) if os.WIFEXITED(wait_status) else None
+    if exit_code:
+        message = f'Exited with error status {exit_code}'
+    return _result(status, stdout, stderr, message=message, cpu_time=cpu_time, memory=usage.ru_maxrss,
+                   exit_code=exit_code)
+
+
+def main():
+    # Exit quietly instead of raising if the web process goes away
+    signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+    for line in sys.stdin:
+        try:
+            result = run_job(json.loads(line))
+        except Exception:
+            result = _result(RUNTIME_ERROR_OTHER, message=traceback.format_exc())
+            result['status'] = {'id': 13, 'description': 'Internal Error'}
+        sys.stdout.write(json.dumps(result) + '\n')
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
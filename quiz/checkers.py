@@ -0,0 +1,183 @@
+"""
+Streaming output checkers.
+
+Expected and actual output are walked in chunks (either may be a string or
+StoredData read from the test data store), so comparing large outputs never
+builds normalized copies of them and stops at the first difference. Each
+problem picks a checker mode:
+
+- default: ignores leading and trailing whitespace and treats CRLF as LF
+  (the original comparison).
+- exact: outputs must be identical.
+- whitespace: ignores trailing whitespace on each line and trailing blank lines.
+- token: compares whitespace-separated tokens.
+- float: compares tokens, allowing numbers to differ by an absolute or
+  relative tolerance.
+- custom: runs the problem's own checker program (see `special_judge`).
+"""
+import io
+import math
+import re
+
+from .special_judge import run_checker
+from .testdata import StoredData
+
+CHUNK_SIZE = 64 * 1024  # characters
+
+NUMBER_RE = re.compile(r'[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?')
+
+
+def _chunks(value):
+    """Yield non-empty text chunks of a string or StoredData."""
+    if isinstance(value, StoredData):
+        with value.open() as handle:
+            # newline='' keeps '\r\n' as is, like the inline text
+            reader = io.TextIOWrapper(handle, encoding='utf-8', errors='replace', newline='')
+            while True:
+                chunk = reader.read(CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+    else:
+        value = value or ''
+        for start in range(0, len(value), CHUNK_SIZE):
+            yield value[start:start + CHUNK_SIZE]
+
+
+def _streams_equal(left, right):
+    """True if two iterables of text chunks spell out the same string."""
+    left, right = iter(left), iter(right)
+    a = b = ''
+    while True:
+        if not a:
+            a = next(left, None)
+        if not b:
+            b = next(right, None)
+        if a is None or b is None:
+            return a is None and b is None
+        size = min(len(a), len(b))
+        if a[:size] != b[:size]:
+            return False
+        a, b = a[size:], b[size:]
+
+
+def _split_stream(chunks, split):
+    """
+    Yield the pieces `split` cuts a chunked stream into, re-joining pieces
+    that straddle chunk boundaries. `split(text)` returns (pieces, rest),
+    where rest is an incomplete last piece to be continued by the next chunk.
+    """
+    rest = ''
+    for chunk in chunks:
+        pieces, rest = split(rest + chunk)
+        yield from pieces
+    if rest:
+        yield rest
+
+
+def _split_tokens(text):
+    tokens = text.split()
+    if tokens and not text[-1].isspace():
+        return tokens[:-1], tokens[-1]
+    return tokens, ''
+
+
+def _split_lines(text):
+    lines = text.split('\n')
+    return lines[:-1], lines[-1]
+
+
+# --- Normalizations ---
+
+def _default_normalized(chunks):
+    """
+    Chunks of `normalize_output`'s result: the text with leading and
+    trailing whitespace stripped and '\\r\\n' replaced by '\\n'. Whitespace is
+    held back until non-whitespace follows, since trailing whitespace is dropped.
+    """
+    pending = None  # None until the first non-whitespace character
+    for chunk in chunks:
+        if pending is None:
+            chunk = chunk.lstrip()
+            if not chunk:
+                continue
+            pending = ''
+        body = chunk.rstrip()
+        if body:
+            # '\r\n' never straddles `pending` and `body`: both are whitespace
+            yield (pending + body).replace('\r\n', '\n')
+            pending = chunk[len(body):]
+        else:
+            pending += chunk
+
+
+def _lines_without_trailing_whitespace(chunks):
+    """Lines with trailing whitespace removed, without the blank lines at the end."""
+    blank = 0
+    for line in _split_stream(chunks, _split_lines):
+        line = line.rstrip()
+        if not line:
+            blank += 1
+            continue
+        yield from [''] * blank
+        blank = 0
+        yield line
+
+
+def _sequences_equal(left, right, same=lambda a, b: a == b):
+    sentinel = object()
+    left, right = iter(left), iter(right)
+    while True:
+        a, b = next(left, sentinel), next(right, sentinel)
+        if a is sentinel or b is sentinel:
+            return a is b
+        if not same(a, b):
+            return False
+
+
+def _numbers_close(expected, actual, abs_tolerance, rel_tolerance):
+    if expected == actual:
+        return True
+    if not (NUMBER_RE.fullmatch(expected) and NUMBER_RE.fullmatch(actual)):
+        return False
+    expected, actual = float(expected), float(actual)
+    if not (math.isfinite(expected) and math.isfinite(actual)):
+        return expected == actual
+    return abs(expected - actual) <= max(abs_tolerance, rel_tolerance * abs(expected))
+
+
+# --- Checkers ---
+
+def check_output(expected, actual, mode='default', abs_tolerance=1e-6, rel_tolerance=1e-6):
+    """True if `actual` output is correct for `expected` under checker `mode`."""
+    if mode == 'default':
+        return _streams_equal(_default_normalized(_chunks(expected)), _default_normalized(_chunks(actual)))
+    if mode == 'exact':
+        return _streams_equal(_chunks(expected), _chunks(actual))
+    if mode == 'whitespace':
+        return _sequences_equal(_lines_without_trailing_whitespace(_chunks(expected)),
+                                _lines_without_trailing_whitespace(_chunks(actual)))
+    if mode == 'token':
+        return _sequences_equal(_split_stream(_chunks(expected), _split_tokens),
+                                _split_stream(_chunks(actual), _split_tokens))
+    if mode == 'float':
+        return _sequences_equal(
+            _split_stream(_chunks(expected), _split_tokens),
+            _split_stream(_chunks(actual), _split_tokens),
+            lambda a, b: _numbers_close(a, b, abs_tolerance, rel_tolerance),
+        )
+    raise ValueError(f"Unknown checker mode '{mode}'")
+
+
+def get_checker(problem):
+    """
+    Return a `checker(input_data, expected, actual)` function configured for
+    `problem`. A custom checker may raise `special_judge.CheckerError`.
+    """
+    if problem.checker == 'custom':
+        def checker(input_data, expected, actual):
+            return run_checker(problem, input_data, expected, actual)
+    else:
+        def checker(input_data, expected, actual):
+            return check_output(expected, actual, problem.checker, problem.abs_tolerance, problem.rel_tolerance)
+    return checker
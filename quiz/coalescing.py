@@ -0,0 +1,286 @@
+"""
+Coalescing of identical executions that are in flight at the same time.
+
+When a class gets the same starter code, many students press Run on the same
+program and sample input within seconds. Executions are keyed like the result
+cache (code, language, stdin, limits): while one is running, later callers
+with the same key wait for its result instead of starting another job.
+
+The local backend coalesces threads of one process, and coroutines through
+`arun`. The Redis backend also coalesces threads and coroutines across web
+processes: the first caller takes a short-lived lock key and publishes the
+result on a channel that the other processes' callers wait on. A caller
+whose leader disappears without publishing, or who cannot reach Redis, runs
+the execution itself.
+
+Configure with the JUDGE_COALESCING setting, e.g.::
+
+    JUDGE_COALESCING = {
+        'BACKEND': 'redis',      # 'local', 'redis' or None to disable
+        'REDIS_URL': 'redis://redis:6379/1',
+        'LOCK_TIMEOUT': 120,     # seconds a leader may take
+    }
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+import weakref
+from concurrent.futures import Future
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCoalescer:
+    """Shares one in-flight execution per key between the threads of this process."""
+
+    def __init__(self):
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def run(self, key, compute):
+        """Return `compute()`, or the result of an identical call already running."""
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._compute(key, compute)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    async def arun(self, key, compute):
+        """
+        `run` for coroutines: await `compute()`, or the result of an
+        identical call already running in a thread or another coroutine.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            # Shielded: a follower giving up must not cancel the shared call
+            return await asyncio.shield(asyncio.wrap_future(future))
+
+        def finish(task):
+            if task.cancelled():
+                future.set_exception(asyncio.CancelledError())
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+            with self._lock:
+                del self._in_flight[key]
+
+        task = asyncio.ensure_future(self._acompute(key, compute))
+        task.add_done_callback(finish)
+        # Shielded so the call goes on for its followers if this caller gives up
+        return await asyncio.shield(task)
+
+    def _compute(self, key, compute):
+        return compute()
+
+    async def _acompute(self, key, compute):
+        return await compute()
+
+
+# Deletes the lock only if this leader still holds it
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisCoalescer(LocalCoalescer):
+    """Coalesces threads locally, then leaders of different processes through Redis."""
+
+    def __init__(self, url, lock_timeout=120, result_ttl=30, prefix='codequiz:inflight'):
+        super().__init__()
+        import redis
+        self.url = url
+        self.redis = redis.Redis.from_url(url)
+        self.lock_timeout = lock_timeout
+        self.result_ttl = result_ttl
+        self.prefix = prefix
+        self._release = self.redis.register_script(RELEASE_SCRIPT)
+        # redis.asyncio connections belong to the event loop that opened them
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def _keys(self, key):
+        """(lock key, result key, channel) of an execution."""
+        return f'{self.prefix}:{key}:lock', f'{self.prefix}:{key}:result', f'{self.prefix}:{key}'
+
+    def _compute(self, key, compute):
+        lock_key, result_key, channel = self._keys(key)
+        token = uuid.uuid4().hex
+        try:
+            leader = self.redis.set(lock_key, token, nx=True, ex=self.lock_timeout)
+        except Exception as e:
+            logger.warning(f"In-flight coalescing unavailable: {e}")
+            return compute()
+
+        if not leader:
+            result = self._wait_for_leader(lock_key, result_key, channel)
+            if result is not None:
+                self.coalesced += 1
+                return result
+            return compute()
+
+        try:
+            result = compute()
+            try:
+                payload = json.dumps(result)
+                pipe = self.redis.pipeline()
+                # Kept briefly for followers that look just after the publish
+                pipe.set(result_key, payload, ex=self.result_ttl)
+                pipe.publish(channel, payload)
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Could not share execution result: {e}")
+            return result
+        finally:
+            try:
+                self._release(keys=[lock_key], args=[token])
+            except Exception:
+                pass
+
+    def _wait_for_leader(self, lock_key, result_key, channel):
+        """Wait for another process's result; None if it never arrives."""
+        try:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                # Subscribe before checking the stored result, so a publish cannot be missed
+                pubsub.subscribe(channel)
+                deadline = time.monotonic() + self.lock_timeout
+                while time.monotonic() < deadline:
+                    raw = self.redis.get(result_key)
+                    if raw is not None:
+                        return json.loads(raw)
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        return json.loads(message['data'])
+                    if not self.redis.exists(lock_key):
+                        # Finished or died; the stored result tells which
+                        raw = self.redis.get(result_key)
+                        return json.loads(raw) if raw is not None else None
+            finally:
+                pubsub.close()
+        except Exception as e:
+            logger.warning(f"Waiting for a coalesced execution failed: {e}")
+        return None
+
+    def _async_redis(self):
+        """The redis.asyncio client and release script of the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                import redis.asyncio
+                redis_client = redis.asyncio.Redis.from_url(self.url)
+                client = self._async_clients[loop] = (redis_client, redis_client.register_script(RELEASE_SCRIPT))
+        return client
+
+    async def _acompute(self, key, compute):
+        """`_compute` for coroutines, over the same keys and channel."""
+        lock_key, result_key, channel = self._keys(key)
+        token = uuid.uuid4().hex
+        try:
+            client, release = self._async_redis()
+            leader = await client.set(lock_key, token, nx=True, ex=self.lock_timeout)
+        except Exception as e:
+            logger.warning(f"In-flight coalescing unavailable: {e}")
+            return await compute()
+
+        if not leader:
+            result = await self._await_leader(client, lock_key, result_key, channel)
+            if result is not None:
+                self.coalesced += 1
+                return result
+            return await compute()
+
+        try:
+            result = await compute()
+            try:
+                payload = json.dumps(result)
+                pipe = client.pipeline()
+                pipe.set(result_key, payload, ex=self.result_ttl)
+                pipe.publish(channel, payload)
+                await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Could not share execution result: {e}")
+            return result
+        finally:
+            try:
+                await release(keys=[lock_key], args=[token])
+            except Exception:
+                pass
+
+    async def _await_leader(self, client, lock_key, result_key, channel):
+        """`_wait_for_leader` for coroutines."""
+        try:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(channel)
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + self.lock_timeout
+                while loop.time() < deadline:
+                    raw = await client.get(result_key)
+                    if raw is not None:
+                        return json.loads(raw)
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        return json.loads(message['data'])
+                    if not await client.exists(lock_key):
+                        raw = await client.get(result_key)
+                        return json.loads(raw) if raw is not None else None
+            finally:
+                await pubsub.close()
+        except Exception as e:
+            logger.warning(f"Waiting for a coalesced execution failed: {e}")
+        return None
+
+
+_coalescer = None
+_coalescer_lock = threading.Lock()
+
+def get_coalescer():
+    """Return the configured coalescer, or None when coalescing is disabled."""
+    global _coalescer
+    if _coalescer is None:
+        config = getattr(settings, 'JUDGE_COALESCING', {})
+        backend = config.get('BACKEND')
+        if not backend:
+            return None
+        with _coalescer_lock:
+            if _coalescer is None:
+                if backend == 'redis':
+                    _coalescer = RedisCoalescer(
+                        config.get('REDIS_URL', 'redis://redis:6379/1'),
+                        lock_timeout=config.get('LOCK_TIMEOUT', 120),
+                    )
+                else:
+                    _coalescer = LocalCoalescer()
+    return _coalescer
@@ -0,0 +1,266 @@
+"""
+Self-contained stand-in for the Judge0 API, for benchmarks and local testing.
+
+It implements the parts of Judge0 this app uses (`/submissions`,
+`/submissions/batch`, `/languages`) without running any code: by default
+each program "prints" its stdin back, so test cases whose expected output
+equals their input are Accepted. Latency, HTTP errors, verdicts and the
+memory each run reports can be injected to exercise the judging pipeline
+under realistic conditions. Counters of every request served are available from `stats()` and
+`GET /stats`.
+
+Multi-test jobs (see `backends.multitest`) are answered with the run
+script's report for each test in the archive, and counted as one
+compilation each. `multitest_reach` caps how many tests a job gets through,
+as if the rest had run out of the job's time.
+"""
+import base64
+import io
+import json
+import random
+import threading
+import time
+import uuid
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .backends.multitest import HEADER, MULTI_FILE_LANGUAGE_ID
+
+# Injectable verdicts and the Judge0 result each one produces
+VERDICTS = {
+    'Accepted': {'id': 3, 'description': 'Accepted'},
+    'Wrong Answer': {'id': 3, 'description': 'Accepted'},  # Runs fine, prints the wrong thing
+    'Time Limit Exceeded': {'id': 5, 'description': 'Time Limit Exceeded'},
+    'Compilation Error': {'id': 6, 'description': 'Compilation Error'},
+    'Runtime Error': {'id': 11, 'description': 'Runtime Error (NZEC)'},
+    'Internal Error': {'id': 13, 'description': 'Internal Error'},
+}
+
+
+class FakeJudge0Server(ThreadingHTTPServer):
+    """
+    Threaded HTTP server with Judge0's API shape.
+
+    `latency` (seconds, plus up to `jitter`) is how long each submission
+    takes to "run"; `error_rate` is the fraction of requests answered with
+    HTTP `error_status`; `verdicts` maps names from VERDICTS to relative weights.
+    """
+    daemon_threads = True
+    request_queue_size = 1024  # Listen backlog, for benchmarks with many connections at once
+
+    def __init__(self, address=('127.0.0.1', 0), latency=0.0, jitter=0.0, error_rate=0.0,
+                 verdicts=None, languages=(), error_status=500, multitest_reach=None,
+                 memory=3000):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.multitest_reach = multitest_reach
+        self.memory = memory
+        self.verdicts = verdicts or {'Accepted': 1}
+        self.languages = [{'id': language_id, 'name': name} for language_id, name in languages]
+        self._submissions = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-judge0', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def api_calls(self):
+        """Number of Judge0 API requests served, excluding /stats."""
+        with self._lock:
+            return sum(count for name, count in self._counters.items() if name.split(' ')[0] in ('GET', 'POST'))
+
+    def reset_stats(self):
+        with self._lock:
+            self._counters.clear()
+
+    def _verdict(self):
+        return random.choices(list(self.verdicts), weights=list(self.verdicts.values()))[0]
+
+    def _run_multitest(self, payload):
+        """The result of a multi-test job: the run script's report on each test it reached."""
+        archive = zipfile.ZipFile(io.BytesIO(base64.b64decode(payload['additional_files'])))
+        inputs = sorted((name for name in archive.namelist() if name.startswith('tests/')),
+                        key=lambda name: int(name[len('tests/'):-len('.in')]))
+        self.count('compilations')
+        lines = []
+        for index, name in enumerate(inputs[:self.multitest_reach]):
+            stdin = archive.read(name).decode('utf-8')
+            verdict = self._verdict()
+            exit_code, elapsed_ms, stdout, stderr = 0, 10, stdin, ''
+            if verdict == 'Wrong Answer':
+                stdout = stdin + '\nunexpected'
+            elif verdict == 'Runtime Error':
+                exit_code, stdout, stderr = 1, '', 'injected runtime error'
+            elif verdict == 'Time Limit Exceeded':
+                exit_code, elapsed_ms, stdout = 128 + 9, 60000, ''
+            lines += [f'{HEADER} {index} {exit_code} {elapsed_ms} 0.01 0.00 {self.memory}',
+                      base64.b64encode(stdout.encode()).decode(), base64.b64encode(stderr.encode()).decode()]
+            self.count('multitest_runs')
+        return {
+            'stdout': '\n'.join(lines) + '\n',
+            'stderr': None,
+            'compile_output': None,
+            'message': None,
+            'status': VERDICTS['Accepted'],
+            'time': '0.100',
+            'memory': self.memory,
+        }
+
+    def create_submission(self, payload):
+        """Store a submission and return its token; it finishes after the configured latency."""
+        verdict = self._verdict()
+        stdin = payload.get('stdin') or ''
+        result = {
+            'stdout': None,
+            'stderr': None,
+            'compile_output': None,
+            'message': None,
+            'status': VERDICTS[verdict],
+            'time': '0.010',
+            'memory': self.memory,
+        }
+        if verdict == 'Accepted':
+            result['stdout'] = stdin
+        elif verdict == 'Wrong Answer':
+            result['stdout'] = stdin + '\nunexpected'
+        elif verdict == 'Compilation Error':
+            result['compile_output'] = 'main: error: injected compilation error'
+        elif verdict == 'Runtime Error':
+            result['stderr'] = 'injected runtime error'
+        if payload.get('language_id') == MULTI_FILE_LANGUAGE_ID and verdict not in ('Compilation Error', 'Internal Error'):
+            result = self._run_multitest(payload)
+
+        token = str(uuid.uuid4())
+        result['token'] = token
+        ready_at = time.monotonic() + self.latency + random.uniform(0, self.jitter)
+        with self._lock:
+            self._submissions[token] = (ready_at, result)
+        self.count('submissions')
+        return token
+
+    def get_submission(self, token):
+        with self._lock:
+            entry = self._submissions.get(token)
+        if entry is None:
+            return None
+        ready_at, result = entry
+        if time.monotonic() < ready_at:
+            return {'token': token, 'status': {'id': 2, 'description': 'Processing'}}
+        return result
+
+    def wait_for(self, token):
+        with self._lock:
+            ready_at, _ = self._submissions[token]
+        delay = ready_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        return self.get_submission(token)
+
+
+def _endpoint(path):
+    # Group per-token lookups under one counter
+    if path.startswith('/submissions/') and path != '/submissions/batch':
+        return '/submissions/<token>'
+    return path
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real service
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status_code, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def _inject_error(self):
+        if self.server.error_rate and random.random() < self.server.error_rate:
+            self.server.count('injected_errors')
+            self._send(self.server.error_status, {'error': 'Injected error'})
+            return True
+        return False
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        payload = self._read_json()
+        self.server.count(f'POST {_endpoint(url.path)}')
+        if self._inject_error():
+            return
+
+        if url.path == '/submissions':
+            token = self.server.create_submission(payload)
+            if query.get('wait', ['false'])[0] == 'true':
+                return self._send(201, self.server.wait_for(token))
+            return self._send(201, {'token': token})
+        if url.path == '/submissions/batch':
+            tokens = [self.server.create_submission(item) for item in payload.get('submissions', [])]
+            return self._send(201, [{'token': token} for token in tokens])
+        self._send(404, {'error': 'Not found'})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == '/stats':
+            return self._send(200, self.server.stats())
+        self.server.count(f'GET {_endpoint(url.path)}')
+        if self._inject_error():
+            return
+
+        if url.path == '/languages':
+            return self._send(200, self.server.languages)
+        if url.path == '/submissions/batch':
+            tokens = query.get('tokens', [''])[0].split(',')
+            return self._send(200, {'submissions': [self.server.get_submission(token) for token in tokens]})
+        if url.path.startswith('/submissions/'):
+            result = self.server.get_submission(url.path.rsplit('/', 1)[-1])
+            if result is None:
+                return self._send(404, {'error': 'Not found'})
+            return self._send(200, result)
+        self._send(404, {'error': 'Not found'})
+
+
+def parse_verdicts(spec):
+    """Parse 'Accepted=0.9,Time Limit Exceeded=0.1' into a weights dict."""
+    verdicts = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in VERDICTS:
+            raise ValueError(f"Unknown verdict '{name}'. Choose from: {', '.join(VERDICTS)}")
+        verdicts[name] = float(weight or 1)
+    return verdicts
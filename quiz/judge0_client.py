@@ -0,0 +1,304 @@
+"""
+Shared HTTP client for the Judge0 API.
+
+A single `Judge0Client` per process keeps a sized pool of keep-alive
+connections to Judge0, retries idempotent reads with jittered exponential
+backoff and sits behind a circuit breaker, so that when Judge0 is down
+callers fail fast instead of each waiting out its own timeout.
+Use `get_judge0_client()` rather than creating clients directly.
+
+`AsyncJudge0Client` is the same for coroutines (the async views), built on
+httpx. A coroutine waiting on Judge0 holds no thread, so its pool can be
+much larger; it shares the circuit breaker with the threaded client. Use
+`get_async_judge0_client()`, which keeps one per event loop.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+class Judge0Error(Exception):
+    """Raised when a Judge0 request fails."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class Judge0Unavailable(Judge0Error):
+    """Raised without contacting Judge0 while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and every
+    call is rejected for `reset_timeout` seconds. The first call after that is
+    let through as a trial: success closes the circuit, failure re-opens it.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def allow_request(self):
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                return True
+            # Open, or half-open with the trial request still in flight
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"Judge0 circuit opened after {self._failures} consecutive failures.")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class BaseJudge0Client:
+    """Endpoints and response handling shared by the threaded and async clients."""
+
+    def __init__(self, base_url, circuit_breaker=None):
+        self.base_url = base_url.rstrip('/')
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+
+    def _decode(self, response, method, path):
+        """Record the outcome with the circuit breaker and return the JSON body or raise."""
+        if response.status_code >= 500:
+            self.circuit_breaker.record_failure()
+        else:
+            # 4xx responses mean Judge0 is up but rejected this request
+            self.circuit_breaker.record_success()
+
+        if response.status_code >= 400:
+            logger.error(f"Judge0 API request failed: {response.status_code} {method} {path}")
+            error_details = f"The code execution service returned an error: {response.status_code}"
+            try:
+                # Try to get more specific error from Judge0's response
+                judge0_error = response.json()
+                if 'error' in judge0_error:
+                    error_details = judge0_error['error']
+            except (ValueError, TypeError):
+                pass # Keep the generic error if response is not JSON
+            raise Judge0Error(error_details, status_code=response.status_code)
+
+        try:
+            return response.json()
+        except ValueError:
+            raise Judge0Error("The code execution service returned an invalid response.")
+
+    def submit(self, submission, wait=True):
+        """Create a single submission; with `wait` the finished result is returned."""
+        params = {'base64_encoded': 'false', 'wait': 'true' if wait else 'false'}
+        return self.request('POST', '/submissions', submission, params=params)
+
+
+class Judge0Client(BaseJudge0Client):
+    """Thread-safe Judge0 API client backed by a pooled keep-alive session."""
+
+    def __init__(self, base_url, pool_size=20, connect_timeout=3, read_timeout=20,
+                 retries=3, backoff_factor=0.2, circuit_breaker=None):
+        super().__init__(base_url, circuit_breaker)
+        self.timeout = (connect_timeout, read_timeout)
+
+        # Reads are retried on connection errors and 5xx responses. POSTs are
+        # only retried when the connection could not be established, since a
+        # repeated POST would queue the same program twice.
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            allowed_methods=frozenset(['GET']),
+            status_forcelist=(502, 503, 504),
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_factor,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Content-Type': 'application/json'})
+
+    def request(self, method, path, payload=None, params=None):
+        """Send a request to Judge0 and return the decoded JSON body."""
+        if not self.circuit_breaker.allow_request():
+            raise Judge0Unavailable("The code execution service is temporarily unavailable.")
+
+        try:
+            response = self.session.request(
+                method, f"{self.base_url}{path}", json=payload, params=params, timeout=self.timeout,
+            )
+        except requests.exceptions.Timeout:
+            self.circuit_breaker.record_failure()
+            logger.error("Judge0 API request timed out.")
+            raise Judge0Error("Code execution timed out.")
+        except requests.exceptions.ConnectionError:
+            self.circuit_breaker.record_failure()
+            logger.error("Failed to connect to Judge0 API. Check if the service is running and accessible.")
+            raise Judge0Error("Could not connect to the code execution service.")
+        except requests.exceptions.RequestException as e:
+            self.circuit_breaker.record_failure()
+            logger.error(f"Judge0 API request failed: {e}")
+            raise Judge0Error("The code execution service request failed.")
+
+        return self._decode(response, method, path)
+
+    def submit_batch(self, submissions):
+        """Create several submissions at once and return their tokens in order."""
+        return self.request('POST', '/submissions/batch', {'submissions': submissions},
+                            params={'base64_encoded': 'false'})
+
+    def get_batch(self, tokens, fields=None):
+        """Fetch the current state of several submissions by token."""
+        params = {'tokens': ','.join(tokens), 'base64_encoded': 'false'}
+        if fields:
+            params['fields'] = fields
+        return self.request('GET', '/submissions/batch', params=params).get('submissions', [])
+
+    def languages(self):
+        return self.request('GET', '/languages')
+
+
+class AsyncJudge0Client(BaseJudge0Client):
+    """
+    Judge0 API client for coroutines, on an httpx connection pool that
+    belongs to one event loop. Retries like `Judge0Client`: failed connects
+    for every request, and reads on connection errors and 5xx responses.
+    """
+    RETRY_STATUSES = (502, 503, 504)
+
+    def __init__(self, base_url, pool_size=500, connect_timeout=3, read_timeout=20,
+                 retries=3, backoff_factor=0.2, circuit_breaker=None):
+        import httpx
+        super().__init__(base_url, circuit_breaker)
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.http = httpx.AsyncClient(
+            base_url=self.base_url,
+            transport=httpx.AsyncHTTPTransport(limits=limits, retries=retries),
+            # Wait as long as it takes for a free connection, like pool_block=True
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout, pool=None),
+            headers={'Content-Type': 'application/json'},
+        )
+
+    async def request(self, method, path, payload=None, params=None):
+        """Send a request to Judge0 and return the decoded JSON body."""
+        import httpx
+        if not self.circuit_breaker.allow_request():
+            raise Judge0Unavailable("The code execution service is temporarily unavailable.")
+
+        attempt = 0
+        while True:
+            try:
+                response = await self.http.request(method, path, json=payload, params=params)
+            except httpx.TransportError as e:
+                if method == 'GET' and attempt < self.retries:
+                    attempt += 1
+                    await self._backoff(attempt)
+                    continue
+                self.circuit_breaker.record_failure()
+                if isinstance(e, httpx.TimeoutException):
+                    logger.error("Judge0 API request timed out.")
+                    raise Judge0Error("Code execution timed out.")
+                if isinstance(e, httpx.ConnectError):
+                    logger.error("Failed to connect to Judge0 API. Check if the service is running and accessible.")
+                    raise Judge0Error("Could not connect to the code execution service.")
+                logger.error(f"Judge0 API request failed: {e}")
+                raise Judge0Error("The code execution service request failed.")
+
+            if method == 'GET' and response.status_code in self.RETRY_STATUSES and attempt < self.retries:
+                attempt += 1
+                await self._backoff(attempt)
+                continue
+            return self._decode(response, method, path)
+
+    async def _backoff(self, attempt):
+        await asyncio.sleep(self.backoff_factor * 2 ** (attempt - 1) + random.uniform(0, self.backoff_factor))
+
+
+_client = None
+_client_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> AsyncJudge0Client
+
+def get_judge0_client():
+    """Return the process-wide Judge0 client, creating it from settings on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = Judge0Client(
+                    getattr(settings, 'JUDGE0_URL', 'http://judge0:2358'),
+                    pool_size=getattr(settings, 'JUDGE0_POOL_SIZE', 20),
+                    connect_timeout=getattr(settings, 'JUDGE0_CONNECT_TIMEOUT', 3),
+                    read_timeout=getattr(settings, 'JUDGE0_READ_TIMEOUT', 20),
+                    retries=getattr(settings, 'JUDGE0_RETRIES', 3),
+                    backoff_factor=getattr(settings, 'JUDGE0_RETRY_BACKOFF', 0.2),
+                    circuit_breaker=CircuitBreaker(
+                        failure_threshold=getattr(settings, 'JUDGE0_CIRCUIT_FAILURE_THRESHOLD', 5),
+                        reset_timeout=getattr(settings, 'JUDGE0_CIRCUIT_RESET_TIMEOUT', 30),
+                    ),
+                )
+    return _client
+
+def get_async_judge0_client():
+    """Return the running event loop's async Judge0 client, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncJudge0Client(
+            getattr(settings, 'JUDGE0_URL', 'http://judge0:2358'),
+            pool_size=getattr(settings, 'JUDGE0_ASYNC_POOL_SIZE', 500),
+            connect_timeout=getattr(settings, 'JUDGE0_CONNECT_TIMEOUT', 3),
+            read_timeout=getattr(settings, 'JUDGE0_READ_TIMEOUT', 20),
+            retries=getattr(settings, 'JUDGE0_RETRIES', 3),
+            backoff_factor=getattr(settings, 'JUDGE0_RETRY_BACKOFF', 0.2),
+            # One view of Judge0's health for both kinds of callers
+            circuit_breaker=get_judge0_client().circuit_breaker,
+        )
+    return client
+
+def reset_judge0_client():
+    """Drop the shared clients so the next call rebuilds them from current settings."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.session.close()
+        _client = None
+        _async_clients.clear()
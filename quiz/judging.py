@@ -0,0 +1,520 @@
+"""
+Judging pipeline shared by the API views and the background judge workers.
+
+Submissions are created by `views.submit_solution` with status `In Queue` and
+handed to `enqueue_submission`, which judges them on a small thread pool so
+the web worker that accepted the request is released immediately.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .backends import ExecutionError, get_backend
+from .checkers import get_checker
+from .coalescing import get_coalescer
+from .leaderboard import get_leaderboard
+from .limits import execution_limits
+from .models import Submission, SubmissionTestResult, TestCase
+from .progress import get_progress_hub, submission_verdict
+from .special_judge import CheckerError
+from .result_cache import get_result_cache, make_cache_key
+from .scheduler import get_scheduler
+
+# --- Configuration ---
+logger = logging.getLogger(__name__)
+JUDGE0_BATCH_SUBMISSIONS = getattr(settings, 'JUDGE0_BATCH_SUBMISSIONS', True)
+JUDGE_WORKERS = getattr(settings, 'JUDGE_WORKERS', 4)
+JUDGE_FAIL_FAST_CHUNK_SIZE = getattr(settings, 'JUDGE_FAIL_FAST_CHUNK_SIZE', 5)
+JUDGE_MAX_CONCURRENT_EXECUTIONS = getattr(settings, 'JUDGE_MAX_CONCURRENT_EXECUTIONS', 16)
+JUDGE_MAX_CONCURRENT_PER_SUBMISSION = getattr(settings, 'JUDGE_MAX_CONCURRENT_PER_SUBMISSION', 4)
+JUDGE_MAX_CONCURRENT_PER_USER = getattr(settings, 'JUDGE_MAX_CONCURRENT_PER_USER', 4)
+JUDGE_SCHEDULER_UNIT_SIZE = getattr(settings, 'JUDGE_SCHEDULER_UNIT_SIZE', 20)
+
+
+# --- Helper Functions ---
+
+def _execute(call):
+    """
+    Run a backend call and translate failures into the
+    {"success": False, "error": ...} shape used by the API views.
+    """
+    try:
+        return {"success": True, "data": call()}
+    except ExecutionError as e:
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        logger.error(f"An unexpected error occurred while executing code: {e}")
+        return {"success": False, "error": "An unexpected internal error occurred."}
+
+def call_judge0_api(code, language_id, stdin=None, priority='custom', user_key=None, limits=None):
+    """
+    Execute `code` once under `limits` on the execution backend configured
+    for its language (Judge0 unless EXECUTION_BACKENDS says otherwise), once
+    the scheduler admits it in `priority` class for `user_key`. Identical
+    calls already in flight are joined instead of run again.
+    """
+    cache = get_result_cache()
+    coalescer = get_coalescer()
+    cache_key = make_cache_key(code, language_id, stdin, limits)
+    if cache is not None:
+        data = cache.get(cache_key)
+        if data is not None:
+            return {"success": True, "data": data}
+
+    def run():
+        with get_scheduler().slot(priority, user_key):
+            result = _execute(lambda: get_backend(language_id).execute(code, language_id, stdin, limits))
+        if cache is not None and result.get('success'):
+            cache.set(cache_key, result['data'])
+        return result
+
+    if coalescer is None:
+        return run()
+    return coalescer.run(cache_key, run)
+
+async def _aexecute(call):
+    """`_execute` for a coroutine backend call."""
+    try:
+        return {"success": True, "data": await call()}
+    except ExecutionError as e:
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        logger.error(f"An unexpected error occurred while executing code: {e}")
+        return {"success": False, "error": "An unexpected internal error occurred."}
+
+async def acall_judge0_api(code, language_id, stdin=None, priority='custom', user_key=None, limits=None):
+    """
+    `call_judge0_api` for coroutines, used by the async views. No thread is
+    held while the call waits for the scheduler or for the backend, so a
+    process can keep thousands of these in flight.
+    """
+    cache = get_result_cache()
+    coalescer = get_coalescer()
+    cache_key = make_cache_key(code, language_id, stdin, limits)
+    if cache is not None:
+        data = await cache.aget(cache_key)
+        if data is not None:
+            return {"success": True, "data": data}
+
+    async def run():
+        async with get_scheduler().aslot(priority, user_key):
+            result = await _aexecute(lambda: get_backend(language_id).aexecute(code, language_id, stdin, limits))
+        if cache is not None and result.get('success'):
+            await cache.aset(cache_key, result['data'])
+        return result
+
+    if coalescer is None:
+        return await run()
+    return await coalescer.arun(cache_key, run)
+
+def _collect(pieces):
+    """Join the pieces yielded by `iter_test_cases` into one result, stopping at the first failure."""
+    data = []
+    try:
+        for piece in pieces:
+            if not piece.get('success'):
+                return piece
+            data.extend(piece['data'])
+    finally:
+        pieces.close()
+    return {"success": True, "data": data}
+
+def _iter_batch(code, language_id, stdins, priority='custom', user_key=None, limits=None):
+    """
+    Run the same program against many inputs in backend batches, yielding
+    each batch's results in input order as soon as it and those before it
+    are done.
+
+    Batches hold at most JUDGE_SCHEDULER_UNIT_SIZE inputs and are admitted by
+    the scheduler one by one, so other users' calls can be scheduled between
+    the batches of a large test set.
+    """
+    def run_unit(unit):
+        with get_scheduler().slot(priority, user_key, cost=len(unit)):
+            return _execute(lambda: get_backend(language_id).execute_many(code, language_id, unit, limits))
+
+    units = [stdins[start:start + JUDGE_SCHEDULER_UNIT_SIZE]
+             for start in range(0, len(stdins), JUDGE_SCHEDULER_UNIT_SIZE)]
+    if len(units) == 1:
+        yield run_unit(stdins)
+        return
+
+    futures = [_get_test_executor().submit(run_unit, unit) for unit in units]
+    try:
+        for future in futures:
+            result = future.result()
+            yield result
+            if not result.get('success'):
+                return
+    finally:
+        # Batches not started yet are not sent once the caller stops reading
+        for future in futures:
+            future.cancel()
+
+def call_judge0_batch(code, language_id, stdins, priority='custom', user_key=None, limits=None):
+    """Run the same program against many inputs in backend batches, in input order."""
+    return _collect(_iter_batch(code, language_id, stdins, priority=priority, user_key=user_key, limits=limits))
+
+class _ConcurrencyLimiter:
+    """Blocks callers once `limit` executions are in flight for the same key."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._in_flight = {}
+        self._condition = threading.Condition()
+
+    def acquire(self, key):
+        with self._condition:
+            while self._in_flight.get(key, 0) >= self.limit:
+                self._condition.wait()
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+
+    def release(self, key):
+        with self._condition:
+            self._in_flight[key] -= 1
+            if not self._in_flight[key]:
+                del self._in_flight[key]
+            self._condition.notify_all()
+
+
+_user_slots = _ConcurrencyLimiter(JUDGE_MAX_CONCURRENT_PER_USER)
+_test_executor = None
+_test_executor_lock = threading.Lock()
+
+def _get_test_executor():
+    # The pool size is the global cap on concurrent test executions
+    global _test_executor
+    if _test_executor is None:
+        with _test_executor_lock:
+            if _test_executor is None:
+                _test_executor = ThreadPoolExecutor(
+                    max_workers=JUDGE_MAX_CONCURRENT_EXECUTIONS, thread_name_prefix='judge-test',
+                )
+    return _test_executor
+
+def _iter_parallel(code, language_id, stdins, user_key=None, priority='submit', limits=None):
+    """
+    Run the same program against many inputs with one Judge0 call per input,
+    fanned out over a shared thread pool, yielding each result in input
+    order as soon as it and those before it are done.
+
+    At most JUDGE_MAX_CONCURRENT_EXECUTIONS calls run process-wide, at most
+    JUDGE_MAX_CONCURRENT_PER_SUBMISSION for this call and, when `user_key` is
+    given, at most JUDGE_MAX_CONCURRENT_PER_USER for that user. Slots are
+    taken on the calling thread, before queueing, so pool threads never
+    block waiting for them.
+    """
+    submission_slots = threading.BoundedSemaphore(JUDGE_MAX_CONCURRENT_PER_SUBMISSION)
+    failed = threading.Event()
+    pending = deque()
+
+    def release_slots():
+        if user_key is not None:
+            _user_slots.release(user_key)
+        submission_slots.release()
+
+    def run_one(stdin):
+        try:
+            result = call_judge0_api(code, language_id, stdin, priority=priority, user_key=user_key, limits=limits)
+            if not result.get('success'):
+                failed.set()
+            return result
+        finally:
+            release_slots()
+
+    def next_result():
+        result = pending.popleft().result()
+        return {"success": True, "data": [result['data']]} if result.get('success') else result
+
+    try:
+        for stdin in stdins:
+            # While this call has no slot left, hand back the oldest result;
+            # its slot is free once it is done.
+            while not submission_slots.acquire(blocking=False):
+                result = next_result()
+                yield result
+                if not result.get('success'):
+                    return
+            if failed.is_set():
+                submission_slots.release()
+                break
+            if user_key is not None:
+                _user_slots.acquire(user_key)
+            pending.append(_get_test_executor().submit(run_one, stdin))
+        while pending:
+            result = next_result()
+            yield result
+            if not result.get('success'):
+                return
+    finally:
+        for future in pending:
+            if future.cancel():
+                # Never started, so its slots were not released
+                release_slots()
+
+def call_judge0_parallel(code, language_id, stdins, user_key=None, priority='submit', limits=None):
+    """
+    Run the same program against many inputs with one Judge0 call per input,
+    with the caps of `_iter_parallel`. Results are returned in the same
+    order as `stdins`.
+    """
+    return _collect(_iter_parallel(code, language_id, stdins, user_key=user_key, priority=priority, limits=limits))
+
+def iter_test_cases(code, language_id, test_cases, user_key=None, priority='submit', limits=None):
+    """
+    Execute `code` against every test case under `limits`, yielding the raw
+    Judge0 results as {"success": True, "data": [...]} pieces in test case
+    order as soon as they are available, or the failure that stopped the run.
+    Uses the backend's batch mode when it has one, or one concurrent call per
+    test otherwise. Runs not started yet are abandoned when the iterator is
+    closed.
+    """
+    stdins = [case.input_source for case in test_cases]
+    backend = _execute(lambda: get_backend(language_id))
+    if not backend.get('success'):
+        yield backend
+        return
+    if not (JUDGE0_BATCH_SUBMISSIONS and backend['data'].supports_batch):
+        yield from _iter_parallel(code, language_id, stdins, user_key=user_key, priority=priority, limits=limits)
+        return
+
+    cache = get_result_cache()
+    if cache is None:
+        yield from _iter_batch(code, language_id, stdins, priority=priority, user_key=user_key, limits=limits)
+        return
+
+    # Only send the inputs whose results are not cached yet
+    cache_keys = [make_cache_key(code, language_id, stdin, limits) for stdin in stdins]
+    results = [cache.get(key) for key in cache_keys]
+    missing = [i for i, data in enumerate(results) if data is None]
+    ready = missing[0] if missing else len(results)
+    if ready:
+        yield {"success": True, "data": results[:ready]}
+    if not missing:
+        return
+
+    filled = 0
+    batches = _iter_batch(code, language_id, [stdins[i] for i in missing],
+                          priority=priority, user_key=user_key, limits=limits)
+    try:
+        for batch in batches:
+            if not batch.get('success'):
+                yield batch
+                return
+            for data in batch['data']:
+                results[missing[filled]] = data
+                cache.set(cache_keys[missing[filled]], data)
+                filled += 1
+            # Everything up to the next input still running is complete
+            end = missing[filled] if filled < len(missing) else len(results)
+            yield {"success": True, "data": results[ready:end]}
+            ready = end
+    finally:
+        batches.close()
+
+def run_test_cases(code, language_id, test_cases, user_key=None, priority='submit', limits=None):
+    """
+    Execute `code` against every test case under `limits` and return the raw
+    Judge0 results in test case order (see `iter_test_cases`).
+    """
+    return _collect(iter_test_cases(code, language_id, test_cases, user_key=user_key, priority=priority, limits=limits))
+
+
+# --- Grading ---
+
+def grade_submission(submission):
+    """
+    Judge `submission` against every test case of its problem and store the
+    verdict, score, peak time and memory and per-test results on the
+    instance. The unsaved `SubmissionTestResult` rows are left in
+    `submission.result_rows` for `save_judged_submission`.
+    """
+    submission.result_rows = []
+    test_cases = list(TestCase.objects.filter(problem_id=submission.problem_id))
+    if not test_cases:
+        submission.status = 'Internal Error'
+        submission.error = 'No test cases found for this problem.'
+        return submission
+
+    passed_tests = 0
+    test_results = []
+    final_status = 'Accepted' # Assume success until a test fails
+
+    # Results are judged and published as progress as soon as they arrive.
+    # With a fail-fast policy the tests run in chunks, one after another,
+    # and judging stops between chunks once the failure limit is reached;
+    # otherwise they all start at once, within the per-submission cap.
+    failure_limit = submission.problem.failure_limit
+    checker = get_checker(submission.problem)
+    limits = execution_limits(submission.problem, submission.language_id)
+    if failure_limit is None:
+        pieces = iter_test_cases(submission.code, submission.language_id, test_cases,
+                                 user_key=submission.user_id, limits=limits)
+    else:
+        # A generator, so a chunk only starts once the previous one is judged
+        pieces = (run_test_cases(submission.code, submission.language_id, test_cases[start:start + JUDGE_FAIL_FAST_CHUNK_SIZE],
+                                 user_key=submission.user_id, limits=limits)
+                  for start in range(0, len(test_cases), JUDGE_FAIL_FAST_CHUNK_SIZE))
+    hub = get_progress_hub()
+    failures = 0
+
+    try:
+        for run_result in pieces:
+            if not run_result.get('success'):
+                # If the API call itself fails, it's an internal error.
+                submission.status = 'Internal Error'
+                submission.error = run_result.get('error')
+                submission.result_rows = []
+                return submission
+
+            for data in run_result['data']:
+                case = test_cases[len(test_results)]
+                status_desc = data.get('status', {}).get('description', 'Unknown')
+                is_correct = False
+                checker_time = None
+
+                if status_desc == 'Accepted':
+                    checker_started = time.perf_counter()
+                    try:
+                        is_correct = checker(case.input_source, case.expected_output_source, data.get('stdout') or '')
+                    except CheckerError as e:
+                        # A broken checker is the problem's fault, not the contestant's
+                        submission.status = 'Internal Error'
+                        submission.error = str(e)
+                        submission.result_rows = []
+                        return submission
+                    checker_time = round(time.perf_counter() - checker_started, 3)
+                    if is_correct:
+                        passed_tests += 1
+                    else:
+                        if final_status == 'Accepted': final_status = 'Wrong Answer'
+                else:
+                    if final_status == 'Accepted': final_status = status_desc
+
+                if not is_correct:
+                    failures += 1
+                result = {
+                    'passed': is_correct,
+                    'status': status_desc,
+                    'is_sample': case.is_sample,
+                    'time': float(data['time']) if data.get('time') else None,
+                    'memory': data.get('memory'),
+                    'checker_time': checker_time,
+                }
+                submission.result_rows.append(SubmissionTestResult(
+                    submission=submission,
+                    test_case=case,
+                    position=len(test_results),
+                    stdout=SubmissionTestResult.truncate(data.get('stdout')),
+                    stderr=SubmissionTestResult.truncate(
+                        data.get('stderr') or data.get('compile_output') or data.get('message')),
+                    **result,
+                ))
+                test_results.append(result)
+                hub.publish(submission.id, {
+                    'type': 'test',
+                    'position': len(test_results) - 1,
+                    'total_tests': len(test_cases),
+                    'passed_tests': passed_tests,
+                    'score': int((passed_tests / len(test_cases)) * 100),
+                    **result,
+                })
+                if failure_limit is not None and failures >= failure_limit:
+                    break
+            if failure_limit is not None and failures >= failure_limit:
+                break
+    finally:
+        # Runs not started yet are abandoned
+        pieces.close()
+
+    # Tests not run because judging stopped early count as failed
+    for case in test_cases[len(test_results):]:
+        submission.result_rows.append(SubmissionTestResult(
+            submission=submission, test_case=case, position=len(test_results),
+            status='Skipped', is_sample=case.is_sample,
+        ))
+        test_results.append({
+            'passed': False,
+            'status': 'Skipped',
+            'is_sample': case.is_sample,
+        })
+
+    times = [result['time'] for result in test_results if result.get('time') is not None]
+    memories = [result['memory'] for result in test_results if result.get('memory') is not None]
+    submission.execution_time = max(times, default=None)
+    submission.memory = max(memories, default=None)
+    submission.status = final_status
+    submission.score = int((passed_tests / len(test_cases)) * 100)
+    submission.test_results = test_results
+    submission.output = f"Passed {passed_tests}/{len(test_cases)} test cases."
+    return submission
+
+
+# --- Background Queue ---
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=JUDGE_WORKERS, thread_name_prefix='judge')
+    return _executor
+
+def judge_submission(submission_id):
+    """Judge a queued submission and persist the result. Safe to call from any thread."""
+    updated = Submission.objects.filter(
+        id=submission_id, status__in=Submission.PENDING_STATUSES,
+    ).update(status='Processing')
+    if not updated:
+        return  # Already judged, or picked up by another worker
+
+    submission = Submission.objects.select_related('problem').get(id=submission_id)
+    try:
+        grade_submission(submission)
+    except Exception as e:
+        logger.exception(f"Judging submission {submission_id} failed: {e}")
+        submission.status = 'Internal Error'
+        submission.error = 'An unexpected internal error occurred.'
+        submission.result_rows = []
+    save_judged_submission(submission)
+
+def save_judged_submission(submission):
+    """
+    Store the verdict of a graded submission, replace its per-test rows and
+    update the quiz leaderboard, in a constant number of queries whatever
+    the number of tests.
+    """
+    with transaction.atomic():
+        submission.save(update_fields=['status', 'score', 'output', 'error', 'test_results', 'execution_time', 'memory'])
+        SubmissionTestResult.objects.filter(submission=submission).delete()
+        SubmissionTestResult.objects.bulk_create(getattr(submission, 'result_rows', []))
+        if submission.user_id is not None:
+            get_leaderboard().record(submission.problem.quiz_id, submission.user_id, submission.problem_id,
+                                     submission.score, submission.submitted_at)
+        verdict = submission_verdict(submission)
+        transaction.on_commit(lambda: get_progress_hub().publish(submission.id, {'type': 'done', **verdict}))
+
+def _judge_in_worker(submission_id):
+    close_old_connections()
+    try:
+        judge_submission(submission_id)
+    finally:
+        close_old_connections()
+
+def enqueue_submission(submission):
+    """
+    Hand `submission` to the judge workers once the current transaction commits.
+    With JUDGE_WORKERS = 0 the submission is judged inline instead.
+    """
+    if JUDGE_WORKERS <= 0:
+        transaction.on_commit(lambda: judge_submission(submission.id))
+    else:
+        transaction.on_commit(lambda: _get_executor().submit(_judge_in_worker, submission.id))
@@ -0,0 +1,206 @@
+"""
+Per-quiz leaderboards, maintained incrementally as submissions are judged.
+
+A user's score in a quiz is the sum of their best score on each problem.
+Ties go to whoever reached their total first: the time a problem's best
+score was first reached counts, and the latest of those is when the total
+was reached. Both are packed into one sort key::
+
+    sort_key = total * 10**10 + (10**10 - 1 - reached_at as a Unix timestamp)
+
+so a higher key always ranks higher. The LeaderboardEntry table is the
+record of standings and is updated in the judging transaction. With the
+'redis' backend the keys are also kept in one sorted set per quiz, which
+answers top-N and rank queries in O(log n); reads fall back to the table
+(ranked through its (quiz, -sort_key) index) if Redis is unavailable, and
+a sorted set missing after a Redis restart is reloaded from the table.
+
+The 'database' backend reads top-N from that index too. Ranks come from one
+window query over the index per version of the quiz's standings (bumped
+whenever they change), cached as a {user id: rank} map in the default
+cache, so every lookup between two verdicts is free whoever asks; use
+'redis' for quizzes with many thousands of contestants.
+
+Configure with the QUIZ_LEADERBOARD setting, e.g.::
+
+    QUIZ_LEADERBOARD = {
+        'BACKEND': 'redis',      # 'redis' or 'database'
+        'REDIS_URL': 'redis://redis:6379/1',
+    }
+
+`manage.py rebuild_leaderboard` recomputes everything from the submissions.
+"""
+import logging
+import threading
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import Rank
+
+from .models import LeaderboardEntry
+from .page_cache import bump_versions, get_versions
+
+logger = logging.getLogger(__name__)
+
+TIME_SPAN = 10 ** 10  # seconds, well past any Unix timestamp of this century
+LEADERBOARD_RANK_CACHE_TIMEOUT = getattr(settings, 'LEADERBOARD_RANK_CACHE_TIMEOUT', 300)
+
+
+def sort_key(total, reached_at):
+    return total * TIME_SPAN + (TIME_SPAN - 1 - int(reached_at.timestamp()))
+
+
+def unpack_sort_key(key):
+    """Return (total, reached_at) from a sort key."""
+    total, remainder = divmod(int(key), TIME_SPAN)
+    return total, datetime.fromtimestamp(TIME_SPAN - 1 - remainder, tz=timezone.utc)
+
+
+def apply_score(problem_scores, problem_id, score, achieved_at):
+    """
+    Fold one judged score into a {problem id: [best score, first reached]}
+    dict. Returns (total, reached_at) if the best score improved, else None.
+
+    Judged scores may arrive in any order, so reaching the best score again
+    at an earlier time also counts as an improvement: the result is always
+    the highest score and the earliest time it was reached.
+    """
+    best = problem_scores.get(str(problem_id))
+    if score <= 0:
+        return None
+    if best is not None and (best[0] > score or (best[0] == score and best[1] <= achieved_at.timestamp())):
+        return None
+    problem_scores[str(problem_id)] = [score, achieved_at.timestamp()]
+    total = sum(best_score for best_score, _ in problem_scores.values())
+    reached_at = max(reached for _, reached in problem_scores.values())
+    return total, datetime.fromtimestamp(reached_at, tz=timezone.utc)
+
+
+class DatabaseLeaderboard:
+    """Standings kept in the LeaderboardEntry table."""
+
+    def record(self, quiz_id, user_id, problem_id, score, achieved_at):
+        """Count a judged score; call inside the transaction that stores the verdict."""
+        if score <= 0:
+            return None
+        with transaction.atomic():
+            entry, _ = LeaderboardEntry.objects.select_for_update().get_or_create(
+                quiz_id=quiz_id, user_id=user_id, defaults={'reached_at': achieved_at},
+            )
+            improved = apply_score(entry.problem_scores, problem_id, score, achieved_at)
+            if improved is None:
+                return None
+            entry.total_score, entry.reached_at = improved
+            entry.sort_key = sort_key(*improved)
+            entry.save(update_fields=['problem_scores', 'total_score', 'reached_at', 'sort_key'])
+            bump_versions(('leaderboard', quiz_id))
+        return entry
+
+    def top(self, quiz_id, limit=10):
+        """[(user id, total score, reached_at)] of the best `limit` users."""
+        entries = LeaderboardEntry.objects.filter(quiz_id=quiz_id).order_by('-sort_key')[:limit]
+        return [(entry.user_id, entry.total_score, entry.reached_at)
+                for entry in entries.only('user_id', 'total_score', 'reached_at')]
+
+    def rank(self, quiz_id, user_id):
+        """(1-based rank, total score) of a user, or None if they have no score yet."""
+        return self._standings(quiz_id).get(user_id)
+
+    def _standings(self, quiz_id):
+        """{user id: (rank, total score)}, ranked once per version of the quiz's standings."""
+        version, = get_versions(('leaderboard', quiz_id))
+        key = f'codequiz:leaderboard:ranks:{quiz_id}:{version}'
+        standings = cache.get(key)
+        if standings is None:
+            entries = LeaderboardEntry.objects.filter(quiz_id=quiz_id).annotate(
+                position=Window(Rank(), order_by=F('sort_key').desc()),
+            ).values_list('user_id', 'position', 'total_score')
+            standings = {user_id: (position, total) for user_id, position, total in entries}
+            cache.set(key, standings, LEADERBOARD_RANK_CACHE_TIMEOUT)
+        return standings
+
+    def clear(self, quiz_id):
+        LeaderboardEntry.objects.filter(quiz_id=quiz_id).delete()
+        bump_versions(('leaderboard', quiz_id))
+
+
+class RedisLeaderboard(DatabaseLeaderboard):
+    """Table-backed standings with a Redis sorted set per quiz for fast reads."""
+
+    def __init__(self, url, prefix='codequiz:leaderboard'):
+        import redis
+        self.redis = redis.Redis.from_url(url, socket_timeout=0.5)
+        self.prefix = prefix
+
+    def _key(self, quiz_id):
+        return f'{self.prefix}:{quiz_id}'
+
+    def record(self, quiz_id, user_id, problem_id, score, achieved_at):
+        entry = super().record(quiz_id, user_id, problem_id, score, achieved_at)
+        if entry is not None:
+            transaction.on_commit(lambda: self._add(quiz_id, {user_id: entry.sort_key}))
+        return entry
+
+    def _add(self, quiz_id, keys):
+        try:
+            # GT: a late write from an older, lower standing never wins
+            self.redis.zadd(self._key(quiz_id), keys, gt=True)
+        except Exception as e:
+            logger.warning(f"Could not update the Redis leaderboard: {e}")
+
+    def _ensure_loaded(self, quiz_id):
+        if self.redis.exists(f'{self._key(quiz_id)}:loaded'):
+            return
+        keys = dict(LeaderboardEntry.objects.filter(quiz_id=quiz_id).values_list('user_id', 'sort_key'))
+        pipe = self.redis.pipeline()
+        if keys:
+            pipe.zadd(self._key(quiz_id), keys, gt=True)
+        pipe.set(f'{self._key(quiz_id)}:loaded', 1)
+        pipe.execute()
+
+    def top(self, quiz_id, limit=10):
+        try:
+            self._ensure_loaded(quiz_id)
+            members = self.redis.zrevrange(self._key(quiz_id), 0, limit - 1, withscores=True)
+        except Exception as e:
+            logger.warning(f"Redis leaderboard unavailable, reading the table: {e}")
+            return super().top(quiz_id, limit)
+        return [(int(member), *unpack_sort_key(key)) for member, key in members]
+
+    def rank(self, quiz_id, user_id):
+        try:
+            self._ensure_loaded(quiz_id)
+            pipe = self.redis.pipeline()
+            pipe.zrevrank(self._key(quiz_id), user_id)
+            pipe.zscore(self._key(quiz_id), user_id)
+            position, key = pipe.execute()
+        except Exception as e:
+            logger.warning(f"Redis leaderboard unavailable, reading the table: {e}")
+            return super().rank(quiz_id, user_id)
+        if position is None:
+            return None
+        return position + 1, unpack_sort_key(key)[0]
+
+    def clear(self, quiz_id):
+        super().clear(quiz_id)
+        # Reloaded from the table on the next read
+        transaction.on_commit(lambda: self.redis.delete(self._key(quiz_id), f'{self._key(quiz_id)}:loaded'))
+
+
+_leaderboard = None
+_leaderboard_lock = threading.Lock()
+
+def get_leaderboard():
+    global _leaderboard
+    if _leaderboard is None:
+        with _leaderboard_lock:
+            if _leaderboard is None:
+                config = getattr(settings, 'QUIZ_LEADERBOARD', {})
+                if config.get('BACKEND') == 'redis':
+                    _leaderboard = RedisLeaderboard(config.get('REDIS_URL', 'redis://redis:6379/1'))
+                else:
+                    _leaderboard = DatabaseLeaderboard()
+    return _leaderboard
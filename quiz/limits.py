@@ -0,0 +1,71 @@
+"""
+Per-problem execution limits.
+
+A problem's CPU time, wall time and memory limits apply to its reference
+language (`Problem.language_id`). Submissions in other languages get them
+scaled by the ratio of the languages' multipliers, so a JVM submission to a
+problem written in C++ gets twice the time and memory. Limits left empty
+fall back to the execution backend's defaults.
+
+`derive_limits` sets a problem's limits from its reference solution's
+measured runs (see `manage.py validate_reference_solutions --derive-limits`).
+"""
+from django.conf import settings
+from django.db.models import Max
+
+COMPILED = {'time': 1.0, 'memory': 1.0}
+MANAGED = {'time': 2.0, 'memory': 2.0}
+SCRIPTED = {'time': 3.0, 'memory': 1.0}
+DEFAULT_LANGUAGE_LIMIT_MULTIPLIERS = {
+    **dict.fromkeys((50, 49, 54, 55, 56, 57, 58, 59, 60, 67, 73, 74, 75, 76), COMPILED),
+    **dict.fromkeys((52, 61, 62, 77, 78, 79), MANAGED),
+    **dict.fromkeys((63, 64, 65, 68, 69, 70, 71, 72, 80), SCRIPTED),
+}
+JUDGE_LANGUAGE_LIMIT_MULTIPLIERS = {
+    **DEFAULT_LANGUAGE_LIMIT_MULTIPLIERS, **getattr(settings, 'JUDGE_LANGUAGE_LIMIT_MULTIPLIERS', {}),
+}
+# Floors for derived and scaled limits, so fast languages and very fast
+# reference solutions still leave room for start-up and measurement noise.
+JUDGE_MIN_CPU_TIME_LIMIT = getattr(settings, 'JUDGE_MIN_CPU_TIME_LIMIT', 0.25)  # seconds
+JUDGE_MIN_MEMORY_LIMIT = getattr(settings, 'JUDGE_MIN_MEMORY_LIMIT', 65536)  # KB
+
+
+def _multiplier(language_id, kind):
+    return JUDGE_LANGUAGE_LIMIT_MULTIPLIERS.get(int(language_id), COMPILED)[kind]
+
+
+def _scale(limit, scale, floor):
+    # A limit set below the floor by hand is kept as it is
+    return limit if scale == 1 else round(max(min(limit, floor), limit * scale), 3)
+
+
+def execution_limits(problem, language_id):
+    """Limits for running a `language_id` submission to `problem`, as Judge0 submission fields."""
+    time_scale = _multiplier(language_id, 'time') / _multiplier(problem.language_id, 'time')
+    memory_scale = _multiplier(language_id, 'memory') / _multiplier(problem.language_id, 'memory')
+    limits = {}
+    if problem.cpu_time_limit:
+        limits['cpu_time_limit'] = _scale(problem.cpu_time_limit, time_scale, JUDGE_MIN_CPU_TIME_LIMIT)
+    if problem.wall_time_limit:
+        limits['wall_time_limit'] = _scale(problem.wall_time_limit, time_scale, JUDGE_MIN_CPU_TIME_LIMIT)
+    if problem.memory_limit:
+        limits['memory_limit'] = int(_scale(problem.memory_limit, memory_scale, JUDGE_MIN_MEMORY_LIMIT))
+    return limits
+
+
+def derive_limits(problem, time_factor=3.0, memory_factor=2.0):
+    """
+    Set `problem`'s limits to a multiple of the slowest and largest reference
+    run of its test cases and save them. Returns False, changing nothing, if
+    no reference runs have been recorded.
+    """
+    reference = problem.testcase_set.aggregate(time=Max('reference_time'), memory=Max('reference_memory'))
+    if reference['time'] is None:
+        return False
+    problem.cpu_time_limit = max(JUDGE_MIN_CPU_TIME_LIMIT, round(reference['time'] * time_factor, 3))
+    # Enough wall time for I/O waits, but a sleeping program is still stopped quickly
+    problem.wall_time_limit = round(max(problem.cpu_time_limit * 2, problem.cpu_time_limit + 0.5), 3)
+    if reference['memory']:
+        problem.memory_limit = max(JUDGE_MIN_MEMORY_LIMIT, int(reference['memory'] * memory_factor))
+    problem.save(update_fields=['cpu_time_limit', 'wall_time_limit', 'memory_limit'])
+    return True
@@ -0,0 +1,148 @@
+import asyncio
+import socket
+import threading
+import time
+import uuid
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from quiz import scheduler
+from quiz.fake_judge0 import FakeJudge0Server
+from quiz.judge0_client import reset_judge0_client
+from quiz.management.commands.benchmark_judging import percentile
+from quiz.models import Problem, Quiz, TestCase
+from quiz.ratelimit import reset_rate_limiter
+
+PATHS = {'sync': 'quiz:run_code_sync', 'async': 'quiz:run_code'}
+
+
+class Command(BaseCommand):
+    help = ('Compare how many Run requests in flight the ASGI application holds with the threaded and the '
+            'async endpoints, against a slow fake Judge0')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', choices=['sync', 'async', 'both'], default='both')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per path (default: 1000)')
+        parser.add_argument('--concurrency', type=int, default=1000, help='Requests sent at once (default: 1000)')
+        parser.add_argument('--latency', type=float, default=0.5, help='Fake Judge0 run latency in seconds')
+        parser.add_argument('--capacity', type=int,
+                            help='Judging scheduler capacity (default: JUDGE_SCHEDULER_CAPACITY)')
+        parser.add_argument('--pool-size', type=int,
+                            help='Connections of the threaded Judge0 client (default: JUDGE0_POOL_SIZE)')
+
+    def handle(self, *args, **options):
+        try:
+            import httpx
+            import uvicorn
+        except ImportError as e:
+            raise CommandError(f'{e.name} is required: pip install -r requirements.txt')
+
+        judge0 = FakeJudge0Server(latency=options['latency']).start()
+        capacity = options['capacity'] or scheduler.JUDGE_SCHEDULER_CAPACITY
+        paths = ['sync', 'async'] if options['path'] == 'both' else [options['path']]
+        pool_size = options['pool_size'] or settings.JUDGE0_POOL_SIZE
+        # Rate limits are off, and every request sends new code so none is served from the result cache
+        with override_settings(JUDGE0_URL=judge0.url, JUDGE0_POOL_SIZE=pool_size,
+                               EXECUTION_BACKENDS={'default': 'quiz.backends.judge0.Judge0Backend'},
+                               JUDGE_RATE_LIMITS={'BACKEND': None}), \
+                mock.patch.object(scheduler, '_scheduler', scheduler.JudgingScheduler(capacity)):
+            reset_judge0_client()
+            reset_rate_limiter()
+            quiz, problem = self._create_fixtures()
+            server, base_url = self._serve(uvicorn, options['concurrency'])
+            try:
+                for path in paths:
+                    url = base_url + reverse(PATHS[path], args=[problem.id])
+                    result = asyncio.run(self._drive(httpx, url, options))
+                    self._report(path, options, capacity, pool_size, *result)
+            finally:
+                server.should_exit = True
+                quiz.delete()
+                reset_judge0_client()
+                reset_rate_limiter()
+                judge0.stop()
+
+    def _create_fixtures(self):
+        tag = uuid.uuid4().hex[:8]
+        quiz = Quiz.objects.create(title=f'Benchmark {tag}', description='Temporary quiz for benchmark_concurrency')
+        problem = Problem.objects.create(
+            quiz=quiz, title='Echo', description='Print the input.', solution='print(input())', difficulty='easy',
+        )
+        TestCase.objects.create(problem=problem, input_data='1\n', expected_output='1\n', is_sample=True)
+        return quiz, problem
+
+    def _serve(self, uvicorn, backlog):
+        """Serve CodeQuiz.asgi with uvicorn on a background thread; returns (server, base URL)."""
+        from CodeQuiz.asgi import application
+
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        server = uvicorn.Server(uvicorn.Config(application, lifespan='off', log_level='warning',
+                                               backlog=max(backlog, 2048)))
+        threading.Thread(target=server.run, kwargs={'sockets': [sock]}, name='benchmark-asgi', daemon=True).start()
+        while not server.started:
+            time.sleep(0.01)
+        host, port = sock.getsockname()
+        return server, f'http://{host}:{port}'
+
+    async def _drive(self, httpx, url, options):
+        latencies = []
+        failures = []
+        counter = iter(range(options['requests']))
+        tag = uuid.uuid4().hex[:8]
+        thread_counts = []
+        sampling = True
+
+        def sample_threads():
+            # Threads of this process, not counting the fake Judge0's connection handlers
+            while sampling:
+                thread_counts.append(
+                    sum(1 for thread in threading.enumerate() if 'process_request_thread' not in thread.name)
+                )
+                time.sleep(0.02)
+
+        async def worker(client):
+            for number in counter:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(url, json={'code': f'print(input())  # {tag} {number}',
+                                                            'language_id': 71, 'input': '1\n'})
+                    error = None if response.status_code == 200 else f'HTTP {response.status_code}'
+                except httpx.HTTPError as e:
+                    error = f'{type(e).__name__}: {e}'
+                latencies.append(time.perf_counter() - started)
+                if error:
+                    failures.append(error)
+
+        sampler = threading.Thread(target=sample_threads, daemon=True)
+        sampler.start()
+        limits = httpx.Limits(max_connections=options['concurrency'], max_keepalive_connections=options['concurrency'])
+        async with httpx.AsyncClient(limits=limits, timeout=None) as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(client) for _ in range(options['concurrency'])))
+            elapsed = time.perf_counter() - started
+        sampling = False
+        sampler.join()
+        return elapsed, sorted(latencies), failures, sorted(thread_counts)
+
+    def _report(self, path, options, capacity, pool_size, elapsed, latencies, failures, thread_counts):
+        count = len(latencies)
+        connections = pool_size if path == 'sync' else settings.JUDGE0_ASYNC_POOL_SIZE
+        self.stdout.write(self.style.SUCCESS(
+            f"{path}: {count} runs, concurrency {options['concurrency']}, Judge0 latency {options['latency']}s, "
+            f"scheduler capacity {capacity}, {connections} Judge0 connections"
+        ))
+        self.stdout.write(f'  throughput:      {count / elapsed:.1f} req/s')
+        self.stdout.write(f'  in flight (avg): {sum(latencies) / elapsed:.0f}')
+        self.stdout.write('  latency p50/p95/p99: ' + ' / '.join(
+            f'{percentile(latencies, fraction) * 1000:.0f}' for fraction in (0.50, 0.95, 0.99)
+        ) + ' ms')
+        # Requests arriving together each take a thread briefly (see views._release_request_thread)
+        self.stdout.write(f'  threads p50/max: {percentile(thread_counts, 0.5)} / {thread_counts[-1] if thread_counts else 0}')
+        self.stdout.write(f'  failed:          {len(failures)}')
+        if failures:
+            self.stdout.write(f'  first failure:   {failures[0]}')
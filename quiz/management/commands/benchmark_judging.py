@@ -0,0 +1,166 @@
+import threading
+import time
+import uuid
+
+import requests
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from quiz.fake_judge0 import FakeJudge0Server, parse_verdicts
+from quiz.judge0_client import reset_judge0_client
+from quiz.models import Problem, Quiz, TestCase
+from quiz.ratelimit import reset_rate_limiter
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = ('Measure end-to-end judging throughput and latency of the threaded run and submit endpoints '
+            'against a fake Judge0')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', choices=['run', 'submit', 'both'], default='both')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint (default: 200)')
+        parser.add_argument('--concurrency', type=int, default=8, help='Simulated users sending requests at once')
+        parser.add_argument('--tests', type=int, default=10, help='Test cases in the benchmark problem')
+        parser.add_argument('--judge0-url', help='Use an already running (fake) Judge0 instead of starting one')
+        parser.add_argument('--latency', type=float, default=0.05, help='Fake Judge0 run latency in seconds')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Fake Judge0 extra random latency')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fake Judge0 HTTP 500 rate')
+        parser.add_argument('--verdicts', default='Accepted', help='Fake Judge0 verdict weights')
+        parser.add_argument('--same-code', action='store_true',
+                            help='Send identical code every time, so the result cache can serve repeats')
+
+    def handle(self, *args, **options):
+        try:
+            verdicts = parse_verdicts(options['verdicts'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        server = None
+        judge0_url = options['judge0_url']
+        if not judge0_url:
+            server = FakeJudge0Server(
+                latency=options['latency'], jitter=options['jitter'],
+                error_rate=options['error_rate'], verdicts=verdicts,
+            ).start()
+            judge0_url = server.url
+
+        def judge0_calls():
+            if server is not None:
+                return server.api_calls()
+            stats = requests.get(f'{judge0_url}/stats', timeout=5).json()
+            return sum(count for name, count in stats.items() if name.split(' ')[0] in ('GET', 'POST'))
+
+        endpoints = ['run', 'submit'] if options['endpoint'] == 'both' else [options['endpoint']]
+        # Rate limits are off: the benchmark measures judging, not admission control
+        with override_settings(JUDGE0_URL=judge0_url,
+                               EXECUTION_BACKENDS={'default': 'quiz.backends.judge0.Judge0Backend'},
+                               JUDGE_RATE_LIMITS={'BACKEND': None}):
+            reset_judge0_client()
+            reset_rate_limiter()
+            quiz, problem, users = self._create_fixtures(options)
+            try:
+                for endpoint in endpoints:
+                    calls_before = judge0_calls()
+                    elapsed, latencies, failures = self._drive(endpoint, problem, users, options)
+                    calls = judge0_calls() - calls_before
+                    self._report(endpoint, options, elapsed, latencies, failures, calls)
+            finally:
+                quiz.delete()
+                User.objects.filter(id__in=[user.id for user in users]).delete()
+                reset_judge0_client()
+                reset_rate_limiter()
+                if server is not None:
+                    server.stop()
+
+    def _create_fixtures(self, options):
+        tag = uuid.uuid4().hex[:8]
+        quiz = Quiz.objects.create(title=f'Benchmark {tag}', description='Temporary quiz for benchmark_judging')
+        problem = Problem.objects.create(
+            quiz=quiz, title='Echo', description='Print the input.', solution='print(input())', difficulty='easy',
+        )
+        # The fake Judge0 echoes stdin, so expected output equal to the input is Accepted
+        TestCase.objects.bulk_create(
+            TestCase(problem=problem, input_data=f'{i}\n', expected_output=f'{i}\n', is_sample=i == 0)
+            for i in range(options['tests'])
+        )
+        users = [User.objects.create(username=f'benchmark-{tag}-{i}') for i in range(options['concurrency'])]
+        return quiz, problem, users
+
+    def _drive(self, endpoint, problem, users, options):
+        latencies = []
+        failures = []
+        lock = threading.Lock()
+        counter = iter(range(options['requests']))
+
+        def worker(user):
+            client = APIClient(HTTP_HOST='localhost')
+            client.force_authenticate(user)
+            try:
+                while True:
+                    with lock:
+                        number = next(counter, None)
+                    if number is None:
+                        return
+                    code = 'print(input())' if options['same_code'] else f'print(input())  # {number}'
+                    started = time.perf_counter()
+                    error = self._send(endpoint, client, problem, code)
+                    duration = time.perf_counter() - started
+                    with lock:
+                        latencies.append(duration)
+                        if error:
+                            failures.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(user,)) for user in users]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started, sorted(latencies), failures
+
+    def _send(self, endpoint, client, problem, code):
+        """Send one request, following a submission until it is judged. Returns an error or None."""
+        if endpoint == 'run':
+            response = client.post(reverse('quiz:run_code_sync', args=[problem.id]),
+                                   {'code': code, 'language_id': 71, 'input': '1\n'}, format='json')
+            return None if response.status_code == 200 else f'HTTP {response.status_code}'
+
+        response = client.post(reverse('quiz:submit_solution_sync', args=[problem.id]),
+                               {'code': code, 'language_id': 71}, format='json')
+        if response.status_code != 202:
+            return f'HTTP {response.status_code}'
+        status_url = response.json()['status_url']
+        while True:
+            result = client.get(status_url).json()
+            if result['finished']:
+                return result['error'] if result['status'] == 'Internal Error' else None
+            time.sleep(0.02)
+
+    def _report(self, endpoint, options, elapsed, latencies, failures, calls):
+        count = len(latencies)
+        self.stdout.write(self.style.SUCCESS(
+            f"{endpoint}: {count} requests, concurrency {options['concurrency']}, {options['tests']} tests/problem"
+        ))
+        self.stdout.write(f'  throughput:      {count / elapsed:.1f} req/s')
+        self.stdout.write('  latency p50/p95/p99: ' + ' / '.join(
+            f'{percentile(latencies, fraction) * 1000:.0f}' for fraction in (0.50, 0.95, 0.99)
+        ) + ' ms')
+        self.stdout.write(f'  failed:          {len(failures)}')
+        if failures:
+            self.stdout.write(f'  first failure:   {failures[0]}')
+        self.stdout.write(f'  Judge0 calls per {"submission" if endpoint == "submit" else "run"}: '
+                          f'{calls / max(count, 1):.2f}')
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz.fake_judge0 import FakeJudge0Server, parse_verdicts
+from quiz.models import Problem
+
+
+class Command(BaseCommand):
+    help = 'Run a fake Judge0 server with configurable latency, errors and verdicts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=2358)
+        parser.add_argument('--latency', type=float, default=0.05, help='Seconds each run takes (default: 0.05)')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Extra random latency, up to this many seconds')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 500')
+        parser.add_argument('--verdicts', default='Accepted',
+                            help="Verdict weights, e.g. 'Accepted=0.8,Wrong Answer=0.1,Time Limit Exceeded=0.1'")
+
+    def handle(self, *args, **options):
+        try:
+            verdicts = parse_verdicts(options['verdicts'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        server = FakeJudge0Server(
+            (options['host'], options['port']),
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            verdicts=verdicts,
+            languages=Problem.LANGUAGE_CHOICES,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Fake Judge0 listening on {server.url} (Ctrl+C to stop)'))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f'Requests served: {server.stats()}')
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from quiz.judging import judge_submission
+from quiz.models import Submission
+
+
+class Command(BaseCommand):
+    help = 'Judge submissions left in the queue, e.g. after the web process restarted mid-judging'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, default=300,
+            help='Only pick up submissions queued at least this many seconds ago (default: 300)',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options['older_than'])
+        stale = Submission.objects.filter(
+            status__in=Submission.PENDING_STATUSES, submitted_at__lte=cutoff,
+        ).order_by('submitted_at')
+        submission_ids = list(stale.values_list('id', flat=True))
+
+        # Submissions interrupted while 'Processing' are put back in the queue first
+        Submission.objects.filter(id__in=submission_ids, status='Processing').update(status='In Queue')
+
+        for submission_id in submission_ids:
+            judge_submission(submission_id)
+            submission = Submission.objects.get(id=submission_id)
+            self.stdout.write(f'Submission #{submission_id}: {submission.status} ({submission.score}%)')
+
+        self.stdout.write(self.style.SUCCESS(f'Judged {len(submission_ids)} pending submission(s)'))
@@ -0,0 +1,41 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from quiz.models import TestCase
+from quiz.testdata import TESTDATA_ROOT
+
+
+class Command(BaseCommand):
+    help = 'Delete stored test data files that no test case refers to any more'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, default=3600,
+            help='Only delete files written at least this many seconds ago (default: 3600)',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='List the files without deleting them')
+
+    def handle(self, *args, **options):
+        referenced = set(TestCase.objects.exclude(input_sha256='').values_list('input_sha256', flat=True))
+        referenced.update(TestCase.objects.exclude(output_sha256='').values_list('output_sha256', flat=True))
+        # Files newer than the cutoff may belong to a test case being saved right now
+        cutoff = time.time() - options['older_than']
+
+        removed = freed = 0
+        for directory, _, filenames in os.walk(TESTDATA_ROOT):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                if filename in referenced or os.path.getmtime(path) > cutoff:
+                    continue
+                size = os.path.getsize(path)
+                if options['dry_run']:
+                    self.stdout.write(path)
+                else:
+                    os.remove(path)
+                removed += 1
+                freed += size
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {removed} unreferenced file(s), {freed} bytes'))
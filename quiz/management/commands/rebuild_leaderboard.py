@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from quiz.leaderboard import apply_score, get_leaderboard, sort_key
+from quiz.models import LeaderboardEntry, Quiz, Submission
+
+
+class Command(BaseCommand):
+    help = 'Recompute quiz leaderboards from the judged submission history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz', type=int, action='append', dest='quizzes', help='Only this quiz id (repeatable)')
+
+    def handle(self, *args, **options):
+        quizzes = Quiz.objects.order_by('id')
+        if options['quizzes']:
+            quizzes = quizzes.filter(id__in=options['quizzes'])
+        if not quizzes.exists():
+            raise CommandError('No quizzes match the given filters.')
+
+        leaderboard = get_leaderboard()
+        for quiz in quizzes:
+            # Replayed in submission order, as the judge would have counted them
+            history = Submission.objects.filter(problem__quiz=quiz, user__isnull=False).exclude(
+                status__in=Submission.PENDING_STATUSES,
+            ).order_by('submitted_at', 'id').values_list('user_id', 'problem_id', 'score', 'submitted_at')
+
+            entries = {}
+            for user_id, problem_id, score, submitted_at in history.iterator(chunk_size=2000):
+                entry = entries.get(user_id)
+                if entry is None:
+                    entry = LeaderboardEntry(quiz=quiz, user_id=user_id, reached_at=submitted_at)
+                improved = apply_score(entry.problem_scores, problem_id, score, submitted_at)
+                if improved is not None:
+                    entry.total_score, entry.reached_at = improved
+                    entry.sort_key = sort_key(*improved)
+                    entries[user_id] = entry
+
+            with transaction.atomic():
+                leaderboard.clear(quiz.id)
+                LeaderboardEntry.objects.bulk_create(entries.values(), batch_size=500)
+            self.stdout.write(f'Quiz #{quiz.id} {quiz.title}: {len(entries)} user(s) ranked')
+
+        self.stdout.write(self.style.SUCCESS('Leaderboards rebuilt'))
@@ -0,0 +1,127 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz.checkers import get_checker
+from quiz.judging import run_test_cases
+from quiz.limits import derive_limits
+from quiz.models import Problem
+from quiz.special_judge import CheckerError
+
+
+class Command(BaseCommand):
+    help = (
+        "Run each problem's reference solution against its test cases, report (or fix) expected outputs "
+        "that disagree with it and record the reference CPU time and memory per test"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz', type=int, action='append', dest='quizzes', help='Only problems of this quiz id (repeatable)')
+        parser.add_argument('--problem', type=int, action='append', dest='problems', help='Only this problem id (repeatable)')
+        parser.add_argument('--fix', action='store_true', help="Replace wrong expected outputs with the reference solution's output")
+        parser.add_argument('--workers', type=int, default=4, help='Chunks of tests executed at once (default: 4)')
+        parser.add_argument('--chunk-size', type=int, default=20, help='Tests per execution batch (default: 20)')
+        parser.add_argument('--restart', action='store_true',
+                            help='Re-run tests already validated against the current solution instead of resuming')
+        parser.add_argument('--derive-limits', action='store_true',
+                            help="Set each problem's time and memory limits from the reference runs")
+        parser.add_argument('--time-factor', type=float, default=3.0,
+                            help='CPU time limit as a multiple of the slowest reference run (default: 3)')
+        parser.add_argument('--memory-factor', type=float, default=2.0,
+                            help='Memory limit as a multiple of the largest reference run (default: 2)')
+
+    def handle(self, *args, **options):
+        problems = Problem.objects.order_by('id')
+        if options['quizzes']:
+            problems = problems.filter(quiz_id__in=options['quizzes'])
+        if options['problems']:
+            problems = problems.filter(id__in=options['problems'])
+        if not problems.exists():
+            raise CommandError('No problems match the given filters.')
+
+        # Tests validated against the current solution version are skipped, so
+        # an interrupted run picks up where it stopped.
+        jobs = []
+        skipped = 0
+        for problem in problems:
+            if not problem.solution.strip():
+                self.stdout.write(self.style.WARNING(f'Problem #{problem.id} {problem.title}: no reference solution'))
+                continue
+            cases = list(problem.testcase_set.order_by('id'))
+            if not options['restart']:
+                pending = [case for case in cases if case.reference_version != problem.solution_version]
+                skipped += len(cases) - len(pending)
+                cases = pending
+            for start in range(0, len(cases), options['chunk_size']):
+                jobs.append((problem, cases[start:start + options['chunk_size']]))
+
+        self.stdout.write(f'{sum(len(cases) for _, cases in jobs)} test(s) to validate, {skipped} already done')
+        totals = {'ok': 0, 'mismatched': 0, 'fixed': 0, 'errors': 0}
+        # Workers only execute; results are checked and saved on this thread
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            futures = {
+                pool.submit(run_test_cases, problem.solution, problem.language_id, cases, priority='admin'): (problem, cases)
+                for problem, cases in jobs
+            }
+            for future in as_completed(futures):
+                problem, cases = futures[future]
+                self._record(problem, cases, future.result(), options, totals)
+
+        if options['derive_limits']:
+            for problem in problems:
+                if derive_limits(problem, options['time_factor'], options['memory_factor']):
+                    self.stdout.write(
+                        f'Problem #{problem.id} {problem.title}: limits set to {problem.cpu_time_limit}s CPU, '
+                        f'{problem.wall_time_limit}s wall, {problem.memory_limit} KB'
+                    )
+
+        summary = ', '.join(f'{count} {name}' for name, count in totals.items())
+        style = self.style.SUCCESS if not (totals['mismatched'] - totals['fixed'] or totals['errors']) else self.style.WARNING
+        self.stdout.write(style(f'Validated reference solutions: {summary}'))
+
+    def _record(self, problem, cases, run_result, options, totals):
+        if not run_result.get('success'):
+            totals['errors'] += len(cases)
+            self.stdout.write(self.style.ERROR(f"Problem #{problem.id} {problem.title}: {run_result.get('error')}"))
+            return
+
+        checker = get_checker(problem)
+        for case, data in zip(cases, run_result['data']):
+            status_desc = data.get('status', {}).get('description', 'Unknown')
+            case.reference_time = float(data['time']) if data.get('time') else None
+            case.reference_memory = data.get('memory')
+            update_fields = ['reference_time', 'reference_memory']
+            label = f'Problem #{problem.id} {problem.title}, test #{case.id}'
+
+            if status_desc != 'Accepted':
+                totals['errors'] += 1
+                self.stdout.write(self.style.ERROR(f'{label}: reference solution got {status_desc}'))
+                case.save(update_fields=update_fields)
+                continue
+
+            stdout = data.get('stdout') or ''
+            try:
+                matches = checker(case.input_source, case.expected_output_source, stdout)
+            except CheckerError as e:
+                totals['errors'] += 1
+                self.stdout.write(self.style.ERROR(f'{label}: {e}'))
+                case.save(update_fields=update_fields)
+                continue
+
+            if matches:
+                totals['ok'] += 1
+            else:
+                totals['mismatched'] += 1
+                preview = stdout[:60].replace('\n', '\\n')
+                self.stdout.write(self.style.WARNING(f'{label}: expected output differs, reference printed "{preview}"'))
+                if options['fix']:
+                    # Cleared so even an empty output replaces data stored out of row
+                    case.output_sha256 = ''
+                    case.expected_output = stdout
+                    update_fields.append('expected_output')
+                    totals['fixed'] += 1
+            # Mismatches left unfixed are checked again on the next run
+            if matches or options['fix']:
+                case.reference_version = problem.solution_version
+                update_fields.append('reference_version')
+            case.save(update_fields=update_fields)
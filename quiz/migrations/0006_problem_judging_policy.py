@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0005_submission_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problem',
+            name='judging_policy',
+            field=models.CharField(choices=[('all', 'Run all tests (partial credit)'), ('first_failure', 'Stop at first failure'), ('max_failures', 'Stop after N failures')], default='all', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='max_failures',
+            field=models.PositiveIntegerField(default=1, help_text="Failures allowed before judging stops (only for 'Stop after N failures')."),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:05
+
+from django.db import migrations, models
+
+from quiz.testdata import StoredData, should_inline, store
+
+FIELDS = (
+    ('input_data', 'input_sha256', 'input_size'),
+    ('expected_output', 'output_sha256', 'output_size'),
+)
+
+
+def move_large_data_out_of_row(apps, schema_editor):
+    TestCase = apps.get_model('quiz', 'TestCase')
+    last_pk = 0
+    while True:
+        # Batches by primary key, so rows are never updated while a cursor reads them
+        cases = list(TestCase.objects.filter(pk__gt=last_pk).order_by('pk')[:100])
+        if not cases:
+            break
+        for case in cases:
+            for field, sha_field, size_field in FIELDS:
+                text = getattr(case, field)
+                if should_inline(text):
+                    setattr(case, size_field, len(text.encode('utf-8')))
+                else:
+                    stored = store(text)
+                    setattr(case, field, '')
+                    setattr(case, sha_field, stored.sha256)
+                    setattr(case, size_field, stored.size)
+        TestCase.objects.bulk_update(cases, [name for names in FIELDS for name in names])
+        last_pk = cases[-1].pk
+
+
+def move_data_back_in_row(apps, schema_editor):
+    TestCase = apps.get_model('quiz', 'TestCase')
+    for case in list(TestCase.objects.exclude(input_sha256='', output_sha256='')):
+        for field, sha_field, size_field in FIELDS:
+            sha256 = getattr(case, sha_field)
+            if sha256:
+                setattr(case, field, StoredData(sha256, getattr(case, size_field)).read())
+        case.save(update_fields=['input_data', 'expected_output'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0006_problem_judging_policy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testcase',
+            name='input_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='testcase',
+            name='input_size',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='testcase',
+            name='output_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='testcase',
+            name='output_size',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='testcase',
+            name='expected_output',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='testcase',
+            name='input_data',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RunPython(move_large_data_out_of_row, move_data_back_in_row),
+    ]
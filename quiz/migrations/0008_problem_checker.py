@@ -0,0 +1,28 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0007_testcase_stored_data'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problem',
+            name='abs_tolerance',
+            field=models.FloatField(default=1e-06, help_text='Absolute tolerance for numbers (only for the tolerance checker).'),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='checker',
+            field=models.CharField(choices=[('default', 'Ignore leading/trailing whitespace'), ('exact', 'Exact match'), ('whitespace', 'Ignore trailing whitespace on each line'), ('token', 'Compare whitespace-separated tokens'), ('float', 'Compare tokens, numbers within tolerance')], default='default', help_text='How contestant output is compared with the expected output.', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='rel_tolerance',
+            field=models.FloatField(default=1e-06, help_text='Relative tolerance for numbers (only for the tolerance checker).'),
+        ),
+    ]
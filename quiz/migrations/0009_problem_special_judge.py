@@ -0,0 +1,28 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0008_problem_checker'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problem',
+            name='checker_code',
+            field=models.TextField(blank=True, help_text='testlib-style checker run as `checker input output answer`; exit 0 accepts, 1 or 2 rejects (only for the custom checker).'),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='checker_language_id',
+            field=models.IntegerField(choices=[(71, 'Python 3'), (54, 'C++'), (50, 'C')], default=71),
+        ),
+        migrations.AlterField(
+            model_name='problem',
+            name='checker',
+            field=models.CharField(choices=[('default', 'Ignore leading/trailing whitespace'), ('exact', 'Exact match'), ('whitespace', 'Ignore trailing whitespace on each line'), ('token', 'Compare whitespace-separated tokens'), ('float', 'Compare tokens, numbers within tolerance'), ('custom', 'Custom checker program')], default='default', help_text='How contestant output is compared with the expected output.', max_length=20),
+        ),
+    ]
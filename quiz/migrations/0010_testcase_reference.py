@@ -0,0 +1,28 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0009_problem_special_judge'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testcase',
+            name='reference_memory',
+            field=models.IntegerField(blank=True, editable=False, help_text='KB used by the reference solution.', null=True),
+        ),
+        migrations.AddField(
+            model_name='testcase',
+            name='reference_time',
+            field=models.FloatField(blank=True, editable=False, help_text='CPU seconds of the reference solution.', null=True),
+        ),
+        migrations.AddField(
+            model_name='testcase',
+            name='reference_version',
+            field=models.CharField(blank=True, editable=False, help_text='Solution version this test was last validated against.', max_length=64),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0010_testcase_reference'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problem',
+            name='cpu_time_limit',
+            field=models.FloatField(blank=True, help_text="CPU seconds per test in the problem's language; scaled for other languages. Empty uses the execution backend's default.", null=True),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='memory_limit',
+            field=models.PositiveIntegerField(blank=True, help_text="Memory per test in KB in the problem's language. Empty uses the execution backend's default.", null=True),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='wall_time_limit',
+            field=models.FloatField(blank=True, help_text="Wall-clock seconds per test in the problem's language. Empty uses the execution backend's default.", null=True),
+        ),
+    ]
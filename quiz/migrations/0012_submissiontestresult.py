@@ -0,0 +1,38 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0011_problem_limits'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionTestResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField(help_text='Index of the test in judging order.')),
+                ('status', models.CharField(max_length=50)),
+                ('passed', models.BooleanField(default=False)),
+                ('is_sample', models.BooleanField(default=False)),
+                ('time', models.FloatField(blank=True, help_text='CPU seconds.', null=True)),
+                ('memory', models.IntegerField(blank=True, help_text='KB.', null=True)),
+                ('checker_time', models.FloatField(blank=True, help_text='Seconds spent comparing the output.', null=True)),
+                ('stdout', models.TextField(blank=True)),
+                ('stderr', models.TextField(blank=True)),
+                ('submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='quiz.submission')),
+                ('test_case', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='quiz.testcase')),
+            ],
+            options={
+                'ordering': ['submission', 'position'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='submissiontestresult',
+            constraint=models.UniqueConstraint(fields=('submission', 'position'), name='unique_submission_test_position'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0012_submissiontestresult'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['user', '-submitted_at'], name='submission_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['status', '-submitted_at'], name='submission_status_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['-submitted_at'], name='submission_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testcase',
+            index=models.Index(fields=['problem', 'is_sample'], name='testcase_problem_sample_idx'),
+        ),
+    ]
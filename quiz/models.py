@@ -1,5 +1,10 @@
+import hashlib
+
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+
+from .testdata import StoredData, as_text, should_inline, store
 
 class Quiz(models.Model):
     title = models.CharField(max_length=200)
@@ -51,15 +56,122 @@ class Problem(models.Model):
         (59, 'C++ (GCC 4.9.2)'),
     ]
     language_id = models.IntegerField(choices=LANGUAGE_CHOICES, default=71, help_text="Programming language for this problem.")
+    JUDGING_POLICY_CHOICES = [
+        ('all', 'Run all tests (partial credit)'),
+        ('first_failure', 'Stop at first failure'),
+        ('max_failures', 'Stop after N failures'),
+    ]
+    judging_policy = models.CharField(max_length=20, choices=JUDGING_POLICY_CHOICES, default='all')
+    max_failures = models.PositiveIntegerField(default=1, help_text="Failures allowed before judging stops (only for 'Stop after N failures').")
+    CHECKER_CHOICES = [
+        ('default', 'Ignore leading/trailing whitespace'),
+        ('exact', 'Exact match'),
+        ('whitespace', 'Ignore trailing whitespace on each line'),
+        ('token', 'Compare whitespace-separated tokens'),
+        ('float', 'Compare tokens, numbers within tolerance'),
+        ('custom', 'Custom checker program'),
+    ]
+    checker = models.CharField(max_length=20, choices=CHECKER_CHOICES, default='default', help_text="How contestant output is compared with the expected output.")
+    abs_tolerance = models.FloatField(default=1e-6, help_text="Absolute tolerance for numbers (only for the tolerance checker).")
+    rel_tolerance = models.FloatField(default=1e-6, help_text="Relative tolerance for numbers (only for the tolerance checker).")
+    CHECKER_LANGUAGE_CHOICES = [
+        (71, 'Python 3'),
+        (54, 'C++'),
+        (50, 'C'),
+    ]
+    checker_language_id = models.IntegerField(choices=CHECKER_LANGUAGE_CHOICES, default=71)
+    checker_code = models.TextField(blank=True, help_text="testlib-style checker run as `checker input output answer`; exit 0 accepts, 1 or 2 rejects (only for the custom checker).")
+    cpu_time_limit = models.FloatField(blank=True, null=True, help_text="CPU seconds per test in the problem's language; scaled for other languages. Empty uses the execution backend's default.")
+    wall_time_limit = models.FloatField(blank=True, null=True, help_text="Wall-clock seconds per test in the problem's language. Empty uses the execution backend's default.")
+    memory_limit = models.PositiveIntegerField(blank=True, null=True, help_text="Memory per test in KB in the problem's language. Empty uses the execution backend's default.")
+
+    @property
+    def failure_limit(self):
+        """Number of failed tests after which judging stops, or None to run every test."""
+        if self.judging_policy == 'first_failure':
+            return 1
+        if self.judging_policy == 'max_failures':
+            return max(self.max_failures, 1)
+        return None
+
+    @property
+    def solution_version(self):
+        """Hash identifying the current reference solution."""
+        return hashlib.sha256(f'{self.language_id}\n{self.solution}'.encode('utf-8')).hexdigest()
+
+    def clean(self):
+        if self.checker == 'custom' and not self.checker_code.strip():
+            raise ValidationError({'checker_code': 'A custom checker needs checker code.'})
 
     def __str__(self):
         return self.title
 
 class TestCase(models.Model):
     problem = models.ForeignKey(Problem,on_delete=models.CASCADE)
-    input_data = models.TextField()
-    expected_output = models.TextField()
+    # Data larger than TESTDATA_INLINE_LIMIT is moved to the test data store
+    # on save (see quiz/testdata.py); the text field is then left empty.
+    input_data = models.TextField(blank=True)
+    expected_output = models.TextField(blank=True)
+    input_sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    input_size = models.PositiveBigIntegerField(default=0, editable=False)
+    output_sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    output_size = models.PositiveBigIntegerField(default=0, editable=False)
     is_sample = models.BooleanField(default=False)
+    # Filled by `manage.py validate_reference_solutions`
+    reference_time = models.FloatField(blank=True, null=True, editable=False, help_text="CPU seconds of the reference solution.")
+    reference_memory = models.IntegerField(blank=True, null=True, editable=False, help_text="KB used by the reference solution.")
+    reference_version = models.CharField(max_length=64, blank=True, editable=False, help_text="Solution version this test was last validated against.")
+
+    class Meta:
+        indexes = [
+            # Sample tests of a problem (editor, Run priority)
+            models.Index(fields=['problem', 'is_sample'], name='testcase_problem_sample_idx'),
+        ]
+
+    STORED_FIELDS = {
+        'input_data': ('input_sha256', 'input_size'),
+        'expected_output': ('output_sha256', 'output_size'),
+    }
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        for field, (sha_field, size_field) in self.STORED_FIELDS.items():
+            if update_fields is not None and field not in update_fields:
+                continue
+            text = getattr(self, field)
+            if not text and getattr(self, sha_field):
+                continue  # Already stored out of row and not replaced
+            if should_inline(text):
+                setattr(self, sha_field, '')
+                setattr(self, size_field, len(text.encode('utf-8')))
+            else:
+                stored = store(text)
+                setattr(self, field, '')
+                setattr(self, sha_field, stored.sha256)
+                setattr(self, size_field, stored.size)
+            if update_fields is not None:
+                kwargs['update_fields'] = update_fields = {*update_fields, sha_field, size_field}
+        super().save(*args, **kwargs)
+
+    @property
+    def input_source(self):
+        """The input as a string, or as StoredData when it is kept out of row."""
+        if self.input_sha256:
+            return StoredData(self.input_sha256, self.input_size)
+        return self.input_data
+
+    @property
+    def expected_output_source(self):
+        """The expected output as a string, or as StoredData when it is kept out of row."""
+        if self.output_sha256:
+            return StoredData(self.output_sha256, self.output_size)
+        return self.expected_output
+
+    def get_input_data(self):
+        return as_text(self.input_source)
+
+    def get_expected_output(self):
+        return as_text(self.expected_output_source)
 
     def __str__(self):
         return f"Test Case for {self.problem.title}"
@@ -79,8 +191,9 @@ class Submission(models.Model):
         ('Exec Format Error', 'Exec Format Error'),
         ('Unknown', 'Unknown'),
     ]
+    PENDING_STATUSES = ('In Queue', 'Processing')
     
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, blank=True, null=True)
     problem = models.ForeignKey(Problem, on_delete=models.CASCADE)
     code = models.TextField()
     language_id = models.IntegerField(default=71)
@@ -91,6 +204,77 @@ class Submission(models.Model):
     error = models.TextField(blank=True, null=True)
     execution_time = models.FloatField(blank=True, null=True)
     memory = models.IntegerField(blank=True, null=True)
+    test_results = models.JSONField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # A user's submissions, newest first (keyset pagination on submitted_at, id)
+            models.Index(fields=['user', '-submitted_at', '-id'], name='submission_user_history_idx'),
+            # Admin status filter and the pending-submission sweep
+            models.Index(fields=['status', '-submitted_at'], name='submission_status_recent_idx'),
+            # Admin date hierarchy and default ordering
+            models.Index(fields=['-submitted_at'], name='submission_recent_idx'),
+        ]
+
+    @property
+    def is_finished(self):
+        return self.status not in self.PENDING_STATUSES
+
+    def __str__(self):
+        username = self.user.username if self.user_id else 'anonymous'
+        return f"Submission by {username} for {self.problem.title}"
+
+class SubmissionTestResult(models.Model):
+    """Outcome of one test case for one submission, written in bulk when judging finishes."""
+    OUTPUT_LIMIT = 4096  # characters of stdout/stderr kept per test
+
+    submission = models.ForeignKey(Submission, related_name='results', on_delete=models.CASCADE)
+    test_case = models.ForeignKey(TestCase, on_delete=models.SET_NULL, blank=True, null=True)
+    position = models.PositiveIntegerField(help_text="Index of the test in judging order.")
+    status = models.CharField(max_length=50)
+    passed = models.BooleanField(default=False)
+    is_sample = models.BooleanField(default=False)
+    time = models.FloatField(blank=True, null=True, help_text="CPU seconds.")
+    memory = models.IntegerField(blank=True, null=True, help_text="KB.")
+    checker_time = models.FloatField(blank=True, null=True, help_text="Seconds spent comparing the output.")
+    stdout = models.TextField(blank=True)
+    stderr = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['submission', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['submission', 'position'], name='unique_submission_test_position'),
+        ]
+
+    @classmethod
+    def truncate(cls, text):
+        text = text or ''
+        return text[:cls.OUTPUT_LIMIT] + '\n[truncated]' if len(text) > cls.OUTPUT_LIMIT else text
+
+    def __str__(self):
+        return f"Test {self.position + 1} of submission {self.submission_id}: {self.status}"
+
+class LeaderboardEntry(models.Model):
+    """
+    A user's standing in a quiz, updated as their submissions are judged
+    (see quiz/leaderboard.py). `problem_scores` holds the best score per
+    problem and when it was first reached; `sort_key` packs the total score
+    and that time into one number that orders the leaderboard.
+    """
+    quiz = models.ForeignKey(Quiz, related_name='leaderboard', on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    problem_scores = models.JSONField(default=dict)
+    total_score = models.IntegerField(default=0)
+    reached_at = models.DateTimeField(help_text="When the current total was first reached.")
+    sort_key = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['quiz', 'user'], name='unique_leaderboard_quiz_user'),
+        ]
+        indexes = [
+            models.Index(fields=['quiz', '-sort_key'], name='leaderboard_rank_idx'),
+        ]
 
     def __str__(self):
-        return f"Submission by {self.user.username} for {self.problem.title}"
\ No newline at end of file
+        return f"{self.user_id} in {self.quiz_id}: {self.total_score}"
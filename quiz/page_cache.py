@@ -0,0 +1,79 @@
+"""
+Versioned caching of the read-mostly quiz pages.
+
+Every cache key for a page or template fragment includes version tokens of
+the content it shows: the quiz list, a quiz, or a problem. The signal
+handlers in `signals.py` replace those tokens whenever a Quiz, Problem or
+TestCase is saved or deleted, so new requests stop finding the old entries
+at once and stale ones simply expire. Tokens are random rather than
+counters, so an evicted version key can never come back with an old value.
+
+Versions are replaced both when the change is made and again when its
+transaction commits: a request that read the new version before the commit
+could otherwise cache the old rows under it.
+
+The cache must be shared by all web processes (see CACHES in settings),
+or a process would keep serving pages another process's edit invalidated.
+"""
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+PAGE_CACHE_TIMEOUT = getattr(settings, 'PAGE_CACHE_TIMEOUT', 300)
+PAGE_CACHE_PREFIX = 'codequiz:page'
+
+
+def _version_key(scope, object_id=None):
+    return f'{PAGE_CACHE_PREFIX}:version:{scope}' + (f':{object_id}' if object_id is not None else '')
+
+
+def get_versions(*scopes):
+    """
+    Return the current version token of each (scope, id) pair, in one cache
+    round trip. Missing versions are created.
+    """
+    keys = [_version_key(*scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # add() so concurrent first requests agree on one token
+            cache.add(key, uuid.uuid4().hex[:16], timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*scopes):
+    """Invalidate everything cached under the given (scope, id) pairs."""
+    def bump():
+        cache.set_many({_version_key(*scope): uuid.uuid4().hex[:16] for scope in scopes}, timeout=None)
+    bump()
+    transaction.on_commit(bump)
+
+
+def cache_anonymous_page(scopes_for):
+    """
+    Cache the whole response of a GET view for anonymous users, keyed on
+    the versions `scopes_for(**view_kwargs)` returns.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            versions = get_versions(*scopes_for(**kwargs))
+            key = f"{PAGE_CACHE_PREFIX}:{view.__name__}:{request.get_full_path()}:{':'.join(versions)}"
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+            response = view(request, *args, **kwargs)
+            # Responses setting cookies (e.g. a CSRF token) are specific to this client
+            if response.status_code == 200 and not response.cookies and not getattr(response, 'streaming', False):
+                cache.set(key, (response.content, response['Content-Type']), PAGE_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
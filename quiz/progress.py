@@ -0,0 +1,174 @@
+"""
+Live judging progress, streamed to the editor as each test is judged.
+
+`grade_submission` publishes a `test` event per judged test (its verdict,
+timings and the running score) and `save_judged_submission` a final `done`
+event once the verdict is stored. `views.submission_events` relays them as
+Server-Sent Events from an async view: under the ASGI application a
+connection waiting for its next event is a suspended coroutine and holds no
+thread.
+
+A submission's events are kept for a while after they are published, so a
+subscriber that connects late, or reconnects, first receives the ones it
+missed.
+
+The local hub delivers events to subscribers of the same process, which is
+enough while submissions are judged on the web process's own worker pool.
+When they are judged elsewhere (`judge_pending_submissions`) or several web
+processes serve the streams, use the Redis hub: events are appended to a
+list per submission and a pub/sub message wakes up the subscribers.
+
+Configure with the JUDGE_PROGRESS setting, e.g.::
+
+    JUDGE_PROGRESS = {
+        'BACKEND': 'redis',      # 'local' or 'redis'
+        'REDIS_URL': 'redis://redis:6379/1',
+        'TTL': 600,              # seconds events are kept
+    }
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def submission_verdict(submission):
+    """The judging state of a submission, as reported by the status endpoints."""
+    test_results = submission.test_results or []
+    return {
+        'submission_id': submission.id,
+        'finished': submission.is_finished,
+        'status': submission.status,
+        'score': submission.score,
+        'passed_tests': sum(1 for result in test_results if result['passed']),
+        'total_tests': len(test_results),
+        'test_results': test_results,
+        'error': submission.error,
+    }
+
+
+class LocalProgressHub:
+    """Delivers events from judging threads to the subscribers of this process."""
+
+    def __init__(self, max_submissions=1000):
+        self.max_submissions = max_submissions
+        self._events = OrderedDict()  # submission id -> events so far, least recent first
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def publish(self, submission_id, event):
+        """Record `event` and hand it to the current subscribers; safe to call from any thread."""
+        with self._lock:
+            self._events.setdefault(submission_id, []).append(event)
+            self._events.move_to_end(submission_id)
+            while len(self._events) > self.max_submissions:
+                self._events.popitem(last=False)
+            subscribers = list(self._subscribers.get(submission_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                pass  # The subscriber's event loop has closed
+
+    async def subscribe(self, submission_id, heartbeat=15):
+        """
+        Yield the events published for the submission so far, then each new
+        one as it arrives; None after `heartbeat` seconds without one.
+        """
+        queue = asyncio.Queue()
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            backlog = list(self._events.get(submission_id, ()))
+            self._subscribers.setdefault(submission_id, set()).add(subscriber)
+        try:
+            for event in backlog:
+                yield event
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(submission_id)
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[submission_id]
+
+
+class RedisProgressHub:
+    """Events kept in a Redis list per submission, announced on a pub/sub channel."""
+
+    def __init__(self, url, ttl=600, prefix='codequiz:progress'):
+        import redis
+        self.url = url
+        self.redis = redis.Redis.from_url(url, socket_timeout=0.5)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def publish(self, submission_id, event):
+        key = f'{self.prefix}:{submission_id}'
+        try:
+            pipe = self.redis.pipeline()
+            pipe.rpush(key, json.dumps(event))
+            pipe.expire(key, self.ttl)
+            # The list holds the events; the message only wakes up subscribers
+            pipe.publish(key, 1)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not publish judging progress: {e}")
+
+    async def subscribe(self, submission_id, heartbeat=15):
+        import redis.asyncio
+        key = f'{self.prefix}:{submission_id}'
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            # Subscribe before reading the list, so no event can fall in between
+            await pubsub.subscribe(key)
+            seen = 0
+            while True:
+                events = await client.lrange(key, seen, -1)
+                seen += len(events)
+                for raw in events:
+                    yield json.loads(raw)
+                if not await self._wait(pubsub, heartbeat):
+                    yield None
+        except Exception as e:
+            # Ends the stream; the editor then polls the status endpoint
+            logger.warning(f"Judging progress unavailable: {e}")
+        finally:
+            await pubsub.close()
+            await client.close()
+
+    async def _wait(self, pubsub, timeout):
+        """True once a message arrives, False after `timeout` seconds without one."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while loop.time() < deadline:
+            # Returns None early for the subscribe confirmation as well
+            if await pubsub.get_message(timeout=deadline - loop.time()) is not None:
+                return True
+        return False
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+def get_progress_hub():
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                config = getattr(settings, 'JUDGE_PROGRESS', {})
+                if config.get('BACKEND') == 'redis':
+                    _hub = RedisProgressHub(config.get('REDIS_URL', 'redis://redis:6379/1'),
+                                            ttl=config.get('TTL', 600))
+                else:
+                    _hub = LocalProgressHub()
+    return _hub
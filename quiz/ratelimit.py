@@ -0,0 +1,208 @@
+"""
+Token-bucket rate limits for the endpoints that start executions.
+
+Every request to a limited endpoint takes one token from each of its
+buckets: one per user for signed-in users and one per client IP. Buckets
+refill continuously at `rate` up to `burst` tokens, and a request is only
+admitted if all of its buckets have a token, so a rejected request never
+uses up another bucket's tokens. Rejected requests get HTTP 429 with a
+Retry-After header from DRF's throttling.
+
+Configure with the JUDGE_RATE_LIMITS setting, e.g.::
+
+    JUDGE_RATE_LIMITS = {
+        'BACKEND': 'redis',      # 'local', 'redis' or None to disable
+        'REDIS_URL': 'redis://redis:6379/1',
+        'RATES': {
+            'run': {'user': {'rate': '30/min', 'burst': 10}, 'ip': {'rate': '600/min', 'burst': 100}},
+            'submit': {'user': {'rate': '10/min', 'burst': 5}, 'ip': {'rate': '300/min', 'burst': 60}},
+        },
+    }
+
+The IP limits should stay generous: a whole exam room often shares one address.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATES = {
+    'run': {'user': {'rate': '30/min', 'burst': 10}, 'ip': {'rate': '600/min', 'burst': 100}},
+    'submit': {'user': {'rate': '10/min', 'burst': 5}, 'ip': {'rate': '300/min', 'burst': 60}},
+}
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def parse_rate(rate):
+    """Turn '30/min' into tokens per second."""
+    count, _, period = rate.partition('/')
+    return int(count) / PERIODS[period]
+
+
+class LocalRateLimiter:
+    """Buckets in this process's memory, for single-process deployments and tests."""
+
+    def __init__(self):
+        self._buckets = {}  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def acquire(self, buckets):
+        """
+        Take a token from every (key, burst, rate) bucket if all have one.
+        Returns 0 if admitted, otherwise the seconds until a retry can succeed.
+        """
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            wait = 0.0
+            for key, burst, rate in buckets:
+                tokens, updated_at = self._buckets.get(key, (burst, now))
+                tokens = min(burst, tokens + (now - updated_at) * rate)
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) / rate)
+                levels.append(tokens)
+            if wait:
+                return wait
+            for (key, _, _), tokens in zip(buckets, levels):
+                self._buckets[key] = (tokens - 1, now)
+            if len(self._buckets) > 100000:
+                self._prune(now)
+            return 0
+
+    def _prune(self, now):
+        # Drop buckets idle long enough to be full again; they are recreated on demand
+        idle = [key for key, (_, updated_at) in self._buckets.items() if now - updated_at > 3600]
+        for key in idle:
+            del self._buckets[key]
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+# Checks and updates every bucket of one request in a single atomic step,
+# using Redis's clock so web processes on different hosts agree on time.
+# KEYS: bucket keys. ARGV: burst and rate (tokens per second) for each key.
+# Returns '0' if admitted, otherwise the seconds to wait.
+ACQUIRE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local burst = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    if tokens < 1 then
+        wait = math.max(wait, (1 - tokens) / rate)
+    end
+    levels[i] = tokens
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    local burst = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    redis.call('HSET', key, 'tokens', tostring(levels[i] - 1), 'ts', tostring(now))
+    redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+end
+return '0'
+"""
+
+
+class RedisRateLimiter:
+    """
+    Buckets shared by every web process through Redis, updated atomically by
+    a Lua script in one round trip. Requests are admitted if Redis fails.
+    """
+
+    def __init__(self, url, prefix='codequiz:ratelimit'):
+        import redis
+        self.redis = redis.Redis.from_url(url, socket_timeout=0.5)
+        self.prefix = prefix
+        self._script = self.redis.register_script(ACQUIRE_SCRIPT)
+
+    def acquire(self, buckets):
+        keys = [f'{self.prefix}:{key}' for key, _, _ in buckets]
+        args = [value for _, burst, rate in buckets for value in (burst, rate)]
+        try:
+            return float(self._script(keys=keys, args=args))
+        except Exception as e:
+            logger.warning(f"Rate limit check failed, admitting request: {e}")
+            return 0
+
+    def clear(self):
+        keys = list(self.redis.scan_iter(f'{self.prefix}:*'))
+        if keys:
+            self.redis.delete(*keys)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """Return the configured rate limiter, or None when rate limiting is disabled."""
+    global _limiter
+    if _limiter is None:
+        config = getattr(settings, 'JUDGE_RATE_LIMITS', {})
+        backend = config.get('BACKEND')
+        if not backend:
+            return None
+        with _limiter_lock:
+            if _limiter is None:
+                if backend == 'redis':
+                    _limiter = RedisRateLimiter(config.get('REDIS_URL', 'redis://redis:6379/1'))
+                else:
+                    _limiter = LocalRateLimiter()
+    return _limiter
+
+
+def reset_rate_limiter():
+    """Drop the limiter so the next request rebuilds it from current settings."""
+    global _limiter
+    with _limiter_lock:
+        _limiter = None
+
+
+class JudgeRateThrottle(BaseThrottle):
+    """DRF throttle taking a token per user and per IP for `scope`."""
+
+    scope = None
+
+    def allow_request(self, request, view):
+        self._wait = 0
+        limiter = get_rate_limiter()
+        if limiter is None:
+            return True
+        rates = getattr(settings, 'JUDGE_RATE_LIMITS', {}).get('RATES', DEFAULT_RATES).get(self.scope, {})
+
+        identities = [('ip', self.get_ident(request))]
+        if request.user and request.user.is_authenticated:
+            identities.append(('user', request.user.pk))
+        buckets = [
+            (f'{self.scope}:{kind}:{ident}', rates[kind]['burst'], parse_rate(rates[kind]['rate']))
+            for kind, ident in identities if kind in rates
+        ]
+        if not buckets:
+            return True
+        self._wait = limiter.acquire(buckets)
+        return not self._wait
+
+    def wait(self):
+        return self._wait
+
+
+class RunRateThrottle(JudgeRateThrottle):
+    scope = 'run'
+
+
+class SubmitRateThrottle(JudgeRateThrottle):
+    scope = 'submit'
@@ -0,0 +1,216 @@
+"""
+Content-addressed cache of execution results.
+
+Results are keyed on a hash of (source code, language, stdin, limits), so the
+same program run on the same input is only executed once while the entry
+lives. Only deterministic verdicts are stored: a Time Limit Exceeded or an
+internal error may be caused by a busy sandbox and must be re-run.
+
+Configure with the JUDGE_RESULT_CACHE setting, e.g.::
+
+    JUDGE_RESULT_CACHE = {
+        'BACKEND': 'local',      # 'local', 'redis' or None to disable
+        'MAX_ENTRIES': 5000,
+        'TTL': 3600,             # seconds
+        'REDIS_URL': 'redis://redis:6379/1',
+    }
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .testdata import StoredData
+
+logger = logging.getLogger(__name__)
+
+# Judge0 status ids whose outcome depends only on the program and its input:
+# Accepted, Wrong Answer, Compilation Error and the Runtime Error family
+# (SIGSEGV, SIGXFSZ, SIGFPE, SIGABRT, NZEC). Time Limit Exceeded (5),
+# Runtime Error (Other) (12, e.g. killed under memory pressure), Internal
+# Error (13) and Exec Format Error (14) are never cached.
+CACHEABLE_STATUS_IDS = frozenset({3, 4, 6, 7, 8, 9, 10, 11})
+
+
+def make_cache_key(code, language_id, stdin=None, limits=None):
+    """Return the content hash identifying one execution."""
+    material = json.dumps({
+        'code': code,
+        'language_id': int(language_id),
+        'stdin': stdin.key if isinstance(stdin, StoredData) else stdin or '',
+        'limits': limits or {},
+    }, sort_keys=True)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def is_cacheable(data):
+    """True if a Judge0 result has a deterministic verdict."""
+    return (data.get('status') or {}).get('id') in CACHEABLE_STATUS_IDS
+
+
+class BaseResultCache:
+    """Interface shared by the cache backends, with hit/miss counters."""
+
+    def __init__(self, max_entries=5000, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key):
+        data = self._get(key)
+        with self._stats_lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return data
+
+    def set(self, key, data):
+        if is_cacheable(data):
+            self._set(key, data)
+
+    async def aget(self, key):
+        """`get` for coroutines; network-backed caches run it on a thread."""
+        return await sync_to_async(self.get, thread_sensitive=False)(key)
+
+    async def aset(self, key, data):
+        await sync_to_async(self.set, thread_sensitive=False)(key, data)
+
+    def stats(self):
+        with self._stats_lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self)}
+
+    def _get(self, key):
+        raise NotImplementedError
+
+    def _set(self, key, data):
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+class LocalMemoryResultCache(BaseResultCache):
+    """In-process LRU cache with per-entry expiry."""
+
+    def __init__(self, max_entries=5000, ttl=3600):
+        super().__init__(max_entries, ttl)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return data
+
+    def _set(self, key, data):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def aget(self, key):
+        return self.get(key)  # Memory only, nothing to wait for
+
+    async def aset(self, key, data):
+        self.set(key, data)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class RedisResultCache(BaseResultCache):
+    """
+    Cache shared by every web process through Redis.
+
+    Entries expire through Redis TTLs; a sorted set of keys scored by last
+    access time keeps the cache at `max_entries` by evicting the least
+    recently used keys. Redis errors are logged and treated as misses.
+    """
+
+    def __init__(self, url, max_entries=5000, ttl=3600, prefix='codequiz:results'):
+        super().__init__(max_entries, ttl)
+        import redis
+        self.redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.lru_key = f'{prefix}:lru'
+
+    def _entry_key(self, key):
+        return f'{self.prefix}:{key}'
+
+    def _get(self, key):
+        try:
+            raw = self.redis.get(self._entry_key(key))
+            if raw is None:
+                self.redis.zrem(self.lru_key, key)
+                return None
+            self.redis.zadd(self.lru_key, {key: time.time()})
+            return json.loads(raw)
+        except Exception as e:
+            logger.warning(f"Result cache lookup failed: {e}")
+            return None
+
+    def _set(self, key, data):
+        try:
+            pipe = self.redis.pipeline()
+            pipe.set(self._entry_key(key), json.dumps(data), ex=self.ttl)
+            pipe.zadd(self.lru_key, {key: time.time()})
+            pipe.zcard(self.lru_key)
+            size = pipe.execute()[-1]
+            if size > self.max_entries:
+                evicted = [member for member, _ in self.redis.zpopmin(self.lru_key, size - self.max_entries)]
+                if evicted:
+                    self.redis.delete(*(self._entry_key(member.decode()) for member in evicted))
+        except Exception as e:
+            logger.warning(f"Result cache store failed: {e}")
+
+    def clear(self):
+        keys = [self._entry_key(member.decode()) for member in self.redis.zrange(self.lru_key, 0, -1)]
+        self.redis.delete(self.lru_key, *keys)
+
+    def __len__(self):
+        try:
+            return self.redis.zcard(self.lru_key)
+        except Exception:
+            return 0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_result_cache():
+    """Return the configured result cache, or None when caching is disabled."""
+    global _cache
+    if _cache is None:
+        config = getattr(settings, 'JUDGE_RESULT_CACHE', {})
+        backend = config.get('BACKEND')
+        if not backend:
+            return None
+        with _cache_lock:
+            if _cache is None:
+                options = {'max_entries': config.get('MAX_ENTRIES', 5000), 'ttl': config.get('TTL', 3600)}
+                if backend == 'redis':
+                    _cache = RedisResultCache(config.get('REDIS_URL', 'redis://redis:6379/1'), **options)
+                else:
+                    _cache = LocalMemoryResultCache(**options)
+    return _cache
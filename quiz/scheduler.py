@@ -0,0 +1,205 @@
+"""
+Admission scheduler in front of the execution backends.
+
+Every backend call takes capacity from one scheduler per process before it
+runs. Capacity is counted in executions (a batch of 20 inputs costs 20), up
+to JUDGE_SCHEDULER_CAPACITY in flight. When calls have to wait, the next one
+admitted is chosen by:
+
+1. Priority class: graded submissions, then runs on sample input, then runs
+   on custom input, then admin solution tests.
+2. Weighted fair queuing between users within a class: each call gets a
+   virtual finish tag of max(class clock, user's last tag) + cost, and the
+   lowest tag goes first. A user with a large backlog cannot make another
+   user's single call wait behind all of it.
+
+Threads take capacity with `slot()` and coroutines with `aslot()`, which
+waits on the event loop instead of blocking it; both share one queue.
+
+Queue depth and waiting times per class are available from `metrics()`.
+"""
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+from django.conf import settings
+
+# Highest priority first
+PRIORITY_CLASSES = ('submit', 'sample', 'custom', 'admin')
+
+JUDGE_SCHEDULER_CAPACITY = getattr(settings, 'JUDGE_SCHEDULER_CAPACITY', 32)
+JUDGE_SCHEDULER_USER_WEIGHTS = getattr(settings, 'JUDGE_SCHEDULER_USER_WEIGHTS', {})
+
+RECENT_WAITS = 1000  # per class, for the wait time percentiles
+
+
+class _ClassStats:
+    def __init__(self):
+        self.queued = 0
+        self.running = 0
+        self.admitted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent_waits = deque(maxlen=RECENT_WAITS)
+
+    def as_dict(self):
+        waits = sorted(self.recent_waits)
+        def percentile(fraction):
+            return round(waits[min(len(waits) - 1, int(fraction * len(waits)))], 4) if waits else 0.0
+        return {
+            'queued': self.queued,
+            'running': self.running,
+            'admitted': self.admitted,
+            'wait_avg': round(self.total_wait / self.admitted, 4) if self.admitted else 0.0,
+            'wait_p50': percentile(0.50),
+            'wait_p95': percentile(0.95),
+            'wait_max': round(self.max_wait, 4),
+        }
+
+
+class JudgingScheduler:
+    """Priority and weighted-fair admission of backend calls; see the module docstring."""
+
+    def __init__(self, capacity=32, user_weights=None):
+        self.capacity = capacity
+        self.user_weights = user_weights or {}
+        self._in_flight = 0
+        self._waiting = []  # heap of (class rank, finish tag, sequence)
+        self._sequence = itertools.count()
+        self._clock = {name: 0.0 for name in PRIORITY_CLASSES}
+        self._last_tag = {}  # (class, user) -> finish tag of the user's last call
+        self._stats = {name: _ClassStats() for name in PRIORITY_CLASSES}
+        self._async_waiters = {}  # queue entry -> (event loop, asyncio.Event) of a waiting coroutine
+        self._condition = threading.Condition()
+
+    def _can_admit(self, entry, cost):
+        if self._waiting[0] is not entry:
+            return False
+        # A call bigger than the whole capacity still runs, just alone
+        return self._in_flight == 0 or self._in_flight + cost <= self.capacity
+
+    def _enqueue(self, priority, user_key, cost):
+        flow = (priority, user_key)
+        start = max(self._clock[priority], self._last_tag.get(flow, 0.0))
+        tag = start + cost / self.user_weights.get(user_key, 1)
+        self._last_tag[flow] = tag
+        entry = (PRIORITY_CLASSES.index(priority), tag, next(self._sequence))
+        heapq.heappush(self._waiting, entry)
+        self._stats[priority].queued += 1
+        return entry
+
+    def _admit(self, priority, entry, cost, queued_at):
+        heapq.heappop(self._waiting)
+        self._in_flight += cost
+        # Self-clocked fair queuing: the class clock is the tag of the call admitted last
+        self._clock[priority] = entry[1]
+        if len(self._last_tag) > 10000:
+            self._forget_idle_users()
+
+        stats = self._stats[priority]
+        waited = time.monotonic() - queued_at
+        stats.queued -= 1
+        stats.running += 1
+        stats.admitted += 1
+        stats.total_wait += waited
+        stats.max_wait = max(stats.max_wait, waited)
+        stats.recent_waits.append(waited)
+        # The next waiter may fit in the capacity that is left
+        self._notify()
+
+    def _release(self, priority, cost):
+        with self._condition:
+            self._in_flight -= cost
+            self._stats[priority].running -= 1
+            self._notify()
+
+    def _notify(self):
+        self._condition.notify_all()
+        # Only the head of the queue can be admitted, so only its coroutine is woken
+        waiter = self._async_waiters.get(self._waiting[0]) if self._waiting else None
+        if waiter is not None:
+            loop, event = waiter
+            loop.call_soon_threadsafe(event.set)
+
+    def _check(self, priority, cost):
+        if priority not in self._clock:
+            raise ValueError(f"Unknown priority class '{priority}'")
+        return max(1, cost)
+
+    @contextmanager
+    def slot(self, priority, user_key=None, cost=1):
+        """Wait until the call may run, and hold its capacity for the `with` block."""
+        cost = self._check(priority, cost)
+        queued_at = time.monotonic()
+        with self._condition:
+            entry = self._enqueue(priority, user_key, cost)
+            while not self._can_admit(entry, cost):
+                self._condition.wait()
+            self._admit(priority, entry, cost, queued_at)
+        try:
+            yield
+        finally:
+            self._release(priority, cost)
+
+    @asynccontextmanager
+    async def aslot(self, priority, user_key=None, cost=1):
+        """`slot` for coroutines: waits for capacity without holding a thread."""
+        cost = self._check(priority, cost)
+        queued_at = time.monotonic()
+        event = asyncio.Event()
+        with self._condition:
+            entry = self._enqueue(priority, user_key, cost)
+            self._async_waiters[entry] = (asyncio.get_running_loop(), event)
+        try:
+            while True:
+                with self._condition:
+                    if self._can_admit(entry, cost):
+                        self._admit(priority, entry, cost, queued_at)
+                        break
+                    event.clear()
+                await event.wait()
+        except BaseException:
+            # Cancelled while queued, e.g. the client went away
+            with self._condition:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._stats[priority].queued -= 1
+                self._notify()
+            raise
+        finally:
+            with self._condition:
+                del self._async_waiters[entry]
+        try:
+            yield
+        finally:
+            self._release(priority, cost)
+
+    def _forget_idle_users(self):
+        # A tag at or behind its class clock no longer affects anyone's order
+        self._last_tag = {
+            flow: tag for flow, tag in self._last_tag.items() if tag > self._clock[flow[0]]
+        }
+
+    def metrics(self):
+        with self._condition:
+            return {
+                'capacity': self.capacity,
+                'in_flight': self._in_flight,
+                'classes': {name: self._stats[name].as_dict() for name in PRIORITY_CLASSES},
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = JudgingScheduler(JUDGE_SCHEDULER_CAPACITY, JUDGE_SCHEDULER_USER_WEIGHTS)
+    return _scheduler
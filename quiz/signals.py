@@ -0,0 +1,48 @@
+"""
+Invalidation of the cached quiz pages (see `page_cache`) when content changes.
+
+A quiz's page shows its problems and their test counts, the quiz list shows
+every quiz with its problem count, and a problem's editor page may show its
+quiz and neighbouring problems, so each change replaces the versions of all
+pages that can display it.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Problem, Quiz, TestCase
+from .page_cache import bump_versions
+
+
+def _quiz_scopes(*quiz_ids):
+    quiz_ids = {quiz_id for quiz_id in quiz_ids if quiz_id is not None}
+    problem_ids = Problem.objects.filter(quiz_id__in=quiz_ids).values_list('id', flat=True)
+    return [('quizzes',), *(('quiz', quiz_id) for quiz_id in quiz_ids),
+            *(('problem', problem_id) for problem_id in problem_ids)]
+
+
+@receiver(pre_save, sender=Problem)
+def remember_previous_quiz(sender, instance, **kwargs):
+    # A problem moved to another quiz must also leave the old quiz's pages
+    instance._previous_quiz_id = (
+        Problem.objects.filter(pk=instance.pk).values_list('quiz_id', flat=True).first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+def quiz_changed(sender, instance, **kwargs):
+    bump_versions(*_quiz_scopes(instance.pk))
+
+
+@receiver(post_save, sender=Problem)
+@receiver(post_delete, sender=Problem)
+def problem_changed(sender, instance, **kwargs):
+    bump_versions(('problem', instance.pk),
+                  *_quiz_scopes(instance.quiz_id, getattr(instance, '_previous_quiz_id', None)))
+
+
+@receiver(post_save, sender=TestCase)
+@receiver(post_delete, sender=TestCase)
+def test_case_changed(sender, instance, **kwargs):
+    quiz_id = Problem.objects.filter(pk=instance.problem_id).values_list('quiz_id', flat=True).first()
+    bump_versions(('problem', instance.problem_id), *([('quiz', quiz_id)] if quiz_id is not None else []))
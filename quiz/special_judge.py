@@ -0,0 +1,192 @@
+"""
+Special judges: per-problem checker programs for problems with many correct answers.
+
+A checker follows the testlib convention. It is run as
+`checker <input> <contestant output> <expected output>` and exits with 0 if
+the contestant's answer is correct and 1 (wrong answer) or 2 (presentation
+error) if it is not; any other outcome means the checker itself failed.
+
+Checkers are trusted code written by problem authors and run on this machine.
+Each version of a checker is compiled once: C and C++ checkers into
+SPECIAL_JUDGE_ROOT, where the binary is reused across tests, submissions
+and restarts, and Python checkers into a code object kept by warm local
+workers, which fork a child per check.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+from .backends.local import LocalSubprocessBackend
+from .testdata import StoredData
+
+logger = logging.getLogger(__name__)
+
+SPECIAL_JUDGE_ROOT = getattr(settings, 'SPECIAL_JUDGE_ROOT', os.path.join(settings.BASE_DIR, 'checkers'))
+SPECIAL_JUDGE_TIME_LIMIT = getattr(settings, 'SPECIAL_JUDGE_TIME_LIMIT', 10)  # seconds per check
+SPECIAL_JUDGE_MEMORY_LIMIT = getattr(settings, 'SPECIAL_JUDGE_MEMORY_LIMIT', 524288)  # KB, Python checkers
+SPECIAL_JUDGE_COMPILE_TIMEOUT = getattr(settings, 'SPECIAL_JUDGE_COMPILE_TIMEOUT', 120)
+
+PYTHON_LANGUAGE_ID = 71
+DEFAULT_SPECIAL_JUDGE_COMPILERS = {
+    50: {'source': 'checker.c', 'command': ['gcc', '-O2', '-o', '{binary}', '{source}', '-lm']},
+    54: {'source': 'checker.cpp', 'command': ['g++', '-O2', '-std=c++17', '-o', '{binary}', '{source}']},
+}
+SPECIAL_JUDGE_COMPILERS = getattr(settings, 'SPECIAL_JUDGE_COMPILERS', DEFAULT_SPECIAL_JUDGE_COMPILERS)
+
+# testlib exit codes
+CHECKER_OK = 0
+CHECKER_WRONG = (1, 2)  # Wrong answer, presentation error
+
+
+class CheckerError(Exception):
+    """Raised when a checker cannot be compiled or fails instead of giving a verdict."""
+
+
+def checker_version(problem):
+    """Hash identifying the current version of a problem's checker."""
+    material = f'{problem.checker_language_id}\n{problem.checker_code}'
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class NativeChecker:
+    """A compiled checker binary."""
+
+    def __init__(self, binary):
+        self.binary = binary
+
+    def run(self, input_path, output_path, answer_path):
+        try:
+            completed = subprocess.run(
+                [self.binary, input_path, output_path, answer_path],
+                stdin=subprocess.DEVNULL, capture_output=True, timeout=SPECIAL_JUDGE_TIME_LIMIT,
+            )
+        except subprocess.TimeoutExpired:
+            raise CheckerError(f"The checker did not finish within {SPECIAL_JUDGE_TIME_LIMIT}s.")
+        return completed.returncode, completed.stderr.decode('utf-8', errors='replace')
+
+
+_python_runner = None
+
+def _get_python_runner():
+    global _python_runner
+    if _python_runner is None:
+        with _lock:
+            if _python_runner is None:
+                _python_runner = LocalSubprocessBackend()
+    return _python_runner
+
+
+class PythonChecker:
+    """A Python checker, compiled once per worker and forked for every check."""
+
+    def __init__(self, code, version):
+        self.code = code
+        self.version = version
+
+    def run(self, input_path, output_path, answer_path):
+        result = _get_python_runner().run_job({
+            'code': self.code,
+            'code_key': self.version,
+            'argv': ['checker.py', input_path, output_path, answer_path],
+            'stdin': '',
+            'cpu_time_limit': SPECIAL_JUDGE_TIME_LIMIT,
+            'wall_time_limit': SPECIAL_JUDGE_TIME_LIMIT * 2,
+            'memory_limit': SPECIAL_JUDGE_MEMORY_LIMIT,
+            'max_output': 64 * 1024,
+        })
+        if result['status']['id'] == 6:
+            raise CheckerError(f"The checker does not compile:\n{result['compile_output']}")
+        if result['exit_code'] is None:
+            raise CheckerError(f"The checker failed: {result['status']['description']}")
+        return result['exit_code'], result['stderr']
+
+
+def _compile(language_id, code, version):
+    """Compile a native checker into SPECIAL_JUDGE_ROOT unless this version already is."""
+    compiler = SPECIAL_JUDGE_COMPILERS.get(language_id)
+    if compiler is None:
+        raise CheckerError(f"Checkers in language {language_id} are not supported.")
+    binary = os.path.join(SPECIAL_JUDGE_ROOT, version, 'checker')
+    if os.path.exists(binary):
+        return binary
+
+    os.makedirs(SPECIAL_JUDGE_ROOT, exist_ok=True)
+    build_dir = tempfile.mkdtemp(dir=SPECIAL_JUDGE_ROOT, prefix='.build-')
+    try:
+        source = os.path.join(build_dir, compiler['source'])
+        with open(source, 'w') as handle:
+            handle.write(code)
+        command = [part.format(binary=os.path.join(build_dir, 'checker'), source=source)
+                   for part in compiler['command']]
+        logger.info(f"Compiling checker {version[:12]}")
+        try:
+            completed = subprocess.run(command, capture_output=True, timeout=SPECIAL_JUDGE_COMPILE_TIMEOUT)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise CheckerError(f"The checker could not be compiled: {e}")
+        if completed.returncode != 0:
+            raise CheckerError(
+                f"The checker does not compile:\n{completed.stderr.decode('utf-8', errors='replace')[-4000:]}"
+            )
+        # Publish the finished build in one step, so other processes never see half of it
+        try:
+            os.rename(build_dir, os.path.dirname(binary))
+        except OSError:
+            if not os.path.exists(binary):
+                raise
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
+    return binary
+
+
+_checkers = {}
+_lock = threading.Lock()
+
+def get_special_judge(problem):
+    """Return the ready-to-run checker for the current version of `problem`'s checker code."""
+    version = checker_version(problem)
+    checker = _checkers.get(version)
+    if checker is None:
+        with _lock:
+            checker = _checkers.get(version)
+            if checker is None:
+                if problem.checker_language_id == PYTHON_LANGUAGE_ID:
+                    checker = PythonChecker(problem.checker_code, version)
+                else:
+                    checker = NativeChecker(_compile(problem.checker_language_id, problem.checker_code, version))
+                _checkers[version] = checker
+    return checker
+
+
+def _as_file(value, directory, name):
+    """Path of a file holding `value`: stored test data is used in place."""
+    if isinstance(value, StoredData):
+        return value.path
+    path = os.path.join(directory, name)
+    with open(path, 'w', encoding='utf-8', newline='') as handle:
+        handle.write(value or '')
+    return path
+
+
+def run_checker(problem, input_data, expected, actual):
+    """Run `problem`'s checker on one test and return True if the answer is correct."""
+    checker = get_special_judge(problem)
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = [
+            _as_file(input_data, workdir, 'input.txt'),
+            _as_file(actual, workdir, 'output.txt'),
+            _as_file(expected, workdir, 'answer.txt'),
+        ]
+        exit_code, message = checker.run(*paths)
+    if exit_code == CHECKER_OK:
+        return True
+    if exit_code in CHECKER_WRONG:
+        return False
+    logger.error(f"Checker for problem {problem.id} exited with status {exit_code}: {message[-1000:]}")
+    raise CheckerError(f"The checker exited with status {exit_code}.")
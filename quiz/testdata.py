@@ -0,0 +1,81 @@
+"""
+Content-addressed storage for large test case data.
+
+Test inputs and expected outputs above TESTDATA_INLINE_LIMIT bytes are kept
+out of the database, in files named after the SHA-256 of their content under
+TESTDATA_ROOT (`ab/cd/abcd...`). Identical data used by several test cases or
+problems is stored once. Rows stay small, so loading test cases never pulls
+their data from the database. The local runner feeds a stored input to the
+program straight from its file and the output checkers read expected output
+in chunks; Judge0 takes stdin inline in its JSON payload, so the Judge0
+backend reads a stored input into memory for each run that needs it.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+
+TESTDATA_ROOT = getattr(settings, 'TESTDATA_ROOT', os.path.join(settings.BASE_DIR, 'testdata'))
+TESTDATA_INLINE_LIMIT = getattr(settings, 'TESTDATA_INLINE_LIMIT', 64 * 1024)
+
+
+def blob_path(sha256):
+    return os.path.join(TESTDATA_ROOT, sha256[:2], sha256[2:4], sha256)
+
+
+class StoredData:
+    """Test data stored in TESTDATA_ROOT, identified by its SHA-256."""
+
+    def __init__(self, sha256, size):
+        self.sha256 = sha256
+        self.size = size
+
+    def __repr__(self):
+        return f'<StoredData {self.sha256[:12]} ({self.size} bytes)>'
+
+    @property
+    def path(self):
+        return blob_path(self.sha256)
+
+    @property
+    def key(self):
+        """Stands in for the content wherever a hashable identity is enough."""
+        return f'sha256:{self.sha256}'
+
+    def open(self):
+        return open(self.path, 'rb')
+
+    def read(self):
+        with self.open() as handle:
+            return handle.read().decode('utf-8', errors='replace')
+
+
+def store(text):
+    """Write `text` to the store if it is not there yet and return its StoredData."""
+    data = text.encode('utf-8') if isinstance(text, str) else text
+    sha256 = hashlib.sha256(data).hexdigest()
+    path = blob_path(sha256)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write under a temporary name so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                handle.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    return StoredData(sha256, len(data))
+
+
+def should_inline(text):
+    return len(text.encode('utf-8')) <= TESTDATA_INLINE_LIMIT
+
+
+def as_text(value):
+    """Return the text of an inline string or StoredData."""
+    if isinstance(value, StoredData):
+        return value.read()
+    return value or ''
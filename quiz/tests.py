@@ -1,3 +1,1345 @@
-from django.test import TestCase
+import asyncio
+import base64
+import json
+import random
+import re
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import SyncToAsync
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.forms.models import model_to_dict
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import checkers, judge0_client, judging, progress, ratelimit, result_cache, testdata, views
+from .backends import ExecutionBackend, ExecutionError, judge0 as judge0_backend, multitest
+from .backends.judge0 import Judge0Backend
+from .coalescing import LocalCoalescer
+from .fake_judge0 import FakeJudge0Server
+from .judge0_client import AsyncJudge0Client, CircuitBreaker, Judge0Client, Judge0Error, Judge0Unavailable, reset_judge0_client
+from .leaderboard import apply_score, get_leaderboard
+from .scheduler import JudgingScheduler
+from .models import LeaderboardEntry, Problem, Quiz, Submission, SubmissionTestResult, TestCase as ProblemTestCase
+
+
+class ScriptedBackend(ExecutionBackend):
+    """
+    Prints each input back after a short delay, 'wrong' as something else;
+    'crash' cannot be run at all. Counts runs and the most run at once.
+    """
+    lock = threading.Lock()
+    delay = 0.02
+    runs = in_flight = peak = 0
+
+    @classmethod
+    def reset(cls):
+        cls.runs = cls.in_flight = cls.peak = 0
+
+    def execute(self, code, language_id, stdin=None, limits=None):
+        cls = type(self)
+        with cls.lock:
+            cls.runs += 1
+            cls.in_flight += 1
+            cls.peak = max(cls.peak, cls.in_flight)
+        try:
+            time.sleep(cls.delay)
+            if stdin == 'crash':
+                raise ExecutionError('Judge0 is unavailable.')
+            return {'stdout': 'nope' if stdin == 'wrong' else stdin, 'stderr': None,
+                    'status': {'id': 3, 'description': 'Accepted'}, 'time': '0.010', 'memory': 3000}
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+
+@override_settings(EXECUTION_BACKENDS={'default': 'quiz.tests.ScriptedBackend'})
+class GradeSubmissionTests(TestCase):
+    """Scoring, fail-fast policies and the concurrency caps of judging."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('student', password='password')
+        cls.quiz = Quiz.objects.create(title='Quiz', description='')
+
+    def setUp(self):
+        ScriptedBackend.reset()
+        self.events = []
+        hub = mock.Mock(publish=lambda submission_id, event: self.events.append(event))
+        patcher = mock.patch.object(judging, 'get_progress_hub', return_value=hub)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def grade(self, inputs, **problem_fields):
+        problem = Problem.objects.create(quiz=self.quiz, title='Problem', description='', solution='',
+                                         difficulty='easy', **problem_fields)
+        for stdin in inputs:
+            ProblemTestCase.objects.create(problem=problem, input_data=stdin, expected_output=stdin)
+        # Code unique to the test, so no result comes from the result cache
+        submission = Submission.objects.create(user=self.user, problem=problem, code=self.id(), language_id=71)
+        return judging.grade_submission(submission)
+
+    def test_all_tests(self):
+        submission = self.grade(['1', '2', 'wrong', '4'])
+        self.assertEqual(submission.status, 'Wrong Answer')
+        self.assertEqual(submission.score, 75)
+        self.assertEqual([result['passed'] for result in submission.test_results], [True, True, False, True])
+        self.assertEqual([row.position for row in submission.result_rows], [0, 1, 2, 3])
+        self.assertEqual([event['position'] for event in self.events], [0, 1, 2, 3])
+        self.assertEqual(self.events[-1]['score'], 75)
+
+    def test_first_failure_skips_the_rest(self):
+        submission = self.grade(['1', 'wrong'] + [str(i) for i in range(2, 12)], judging_policy='first_failure')
+        self.assertEqual(submission.status, 'Wrong Answer')
+        self.assertEqual([result['status'] for result in submission.test_results],
+                         ['Accepted', 'Accepted'] + ['Skipped'] * 10)
+        # Skipped tests count as failed
+        self.assertEqual(submission.score, int(100 / 12))
+        self.assertEqual(len(submission.result_rows), 12)
+        self.assertEqual(len(self.events), 2)
+        # Only the first chunk ran
+        self.assertEqual(ScriptedBackend.runs, judging.JUDGE_FAIL_FAST_CHUNK_SIZE)
+
+    def test_max_failures(self):
+        inputs = ['wrong', '1', 'wrong', '2', '3', '4', 'wrong', 'wrong', '5']
+        submission = self.grade(inputs, judging_policy='max_failures', max_failures=3)
+        self.assertEqual([result['status'] for result in submission.test_results][6:], ['Accepted', 'Skipped', 'Skipped'])
+        self.assertEqual(submission.score, int(4 / 9 * 100))
+
+    def test_per_submission_cap(self):
+        submission = self.grade([str(i) for i in range(16)])
+        self.assertEqual(submission.status, 'Accepted')
+        self.assertEqual(ScriptedBackend.runs, 16)
+        self.assertLessEqual(ScriptedBackend.peak, judging.JUDGE_MAX_CONCURRENT_PER_SUBMISSION)
+        self.assertEqual(judging._user_slots._in_flight, {})
+
+    def test_failed_run_keeps_no_results(self):
+        submission = self.grade([str(i) for i in range(6)] + ['crash'] + [str(i) for i in range(100, 120)])
+        self.assertEqual(submission.status, 'Internal Error')
+        self.assertEqual(submission.error, 'Judge0 is unavailable.')
+        self.assertEqual(submission.result_rows, [])
+        judging.save_judged_submission(submission)
+        self.assertFalse(SubmissionTestResult.objects.filter(submission=submission).exists())
+        # The runs queued after the failure were abandoned, and their slots given back
+        time.sleep(0.1)
+        self.assertLessEqual(ScriptedBackend.runs, 7 + judging.JUDGE_MAX_CONCURRENT_PER_SUBMISSION)
+        self.assertEqual(judging._user_slots._in_flight, {})
+
+
+class HotQueryPlanTests(TestCase):
+    """
+    The queries behind the submission list, the editor, the admin filters and
+    the pending-submission sweep must be answered from an index, never by
+    scanning a whole table. Runs on SQLite and PostgreSQL.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('student', password='password')
+        cls.quiz = Quiz.objects.create(title='Quiz', description='')
+        cls.problem = Problem.objects.create(
+            quiz=cls.quiz, title='Problem', description='', solution='', difficulty='easy',
+        )
+        ProblemTestCase.objects.create(problem=cls.problem, input_data='1', expected_output='1', is_sample=True)
+        Submission.objects.create(user=cls.user, problem=cls.problem, code='', status='Accepted')
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # Tiny test tables are cheaper to scan; ask whether an index can be used at all
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertNoFullScan(self, queryset, *tables):
+        plan = queryset.explain()
+        for table in tables:
+            if connection.vendor == 'sqlite':
+                # 'SCAN t' reads every row of t, 'SCAN t USING INDEX i' every entry of i
+                full_scan = re.search(rf'\bSCAN (TABLE )?{table}\b', plan)
+            elif connection.vendor == 'postgresql':
+                full_scan = re.search(rf'Seq Scan on {table}\b', plan)
+            else:
+                self.skipTest(f'No plan check for {connection.vendor}')
+            self.assertIsNone(full_scan, f'Full scan of {table}:\n{plan}')
+
+    def test_submission_list(self):
+        queryset = Submission.objects.filter(user=self.user).order_by('-submitted_at', '-id')
+        self.assertNoFullScan(queryset, 'quiz_submission')
+
+    def test_sample_test_cases(self):
+        queryset = ProblemTestCase.objects.filter(problem=self.problem, is_sample=True)
+        self.assertNoFullScan(queryset, 'quiz_testcase')
+
+    def test_admin_status_filter(self):
+        queryset = Submission.objects.filter(status='Accepted').order_by('-submitted_at')
+        self.assertNoFullScan(queryset, 'quiz_submission')
+
+    def test_admin_date_filter(self):
+        since = timezone.now() - timedelta(days=1)
+        queryset = Submission.objects.filter(submitted_at__gte=since).order_by('-submitted_at')
+        self.assertNoFullScan(queryset, 'quiz_submission')
+
+    def test_admin_quiz_filter(self):
+        queryset = Submission.objects.filter(problem__quiz=self.quiz).order_by('-submitted_at')
+        self.assertNoFullScan(queryset, 'quiz_submission', 'quiz_problem')
+
+    def test_pending_submissions(self):
+        queryset = Submission.objects.filter(
+            status__in=Submission.PENDING_STATUSES, submitted_at__lte=timezone.now(),
+        ).order_by('submitted_at')
+        self.assertNoFullScan(queryset, 'quiz_submission')
+
+
+class CodeEditorQueryTests(TestCase):
+    """The editor page costs the same few queries whatever the size of the quiz."""
+
+    def make_quiz(self, problem_count):
+        quiz = Quiz.objects.create(title=f'Quiz of {problem_count}', description='')
+        problems = [
+            Problem.objects.create(
+                quiz=quiz, title=f'Problem {i}', description='x' * 1000, solution='y' * 1000, difficulty='easy',
+            )
+            for i in range(problem_count)
+        ]
+        for problem in problems:
+            for i in range(3):
+                ProblemTestCase.objects.create(problem=problem, input_data=str(i), expected_output=str(i), is_sample=i < 2)
+        return problems
+
+    def test_constant_queries(self):
+        for problem_count in (3, 60):
+            problems = self.make_quiz(problem_count)
+            middle = problems[problem_count // 2]
+            with self.assertNumQueries(4):
+                response = self.client.get(reverse('quiz:code_editor', args=[middle.id]))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context['current_index'], problem_count // 2)
+            self.assertEqual(response.context['total_problems'], problem_count)
+            self.assertEqual(response.context['prev_problem'], problems[problem_count // 2 - 1])
+            self.assertEqual(response.context['next_problem'], problems[problem_count // 2 + 1])
+            self.assertEqual(len(response.context['sample_test_cases']), 2)
+
+    def test_first_and_last_problem(self):
+        problems = self.make_quiz(3)
+        response = self.client.get(reverse('quiz:code_editor', args=[problems[0].id]))
+        self.assertIsNone(response.context['prev_problem'])
+        self.assertEqual(response.context['next_problem'], problems[1])
+        response = self.client.get(reverse('quiz:code_editor', args=[problems[-1].id]))
+        self.assertEqual(response.context['prev_problem'], problems[1])
+        self.assertIsNone(response.context['next_problem'])
+
+
+class SubmissionEventsTests(TransactionTestCase):
+    """The progress stream relays judging events and ends with the verdict."""
+
+    def setUp(self):
+        quiz = Quiz.objects.create(title='Quiz', description='')
+        self.problem = Problem.objects.create(quiz=quiz, title='Problem', description='', solution='', difficulty='easy')
+        self.hub = progress.LocalProgressHub()
+        patcher = mock.patch.object(progress, '_hub', self.hub)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stream(self, submission, publish=()):
+        async def read():
+            response = await self.async_client.get(reverse('quiz:submission_events', args=[submission.id]))
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            chunks = []
+            async for chunk in response.streaming_content:
+                chunks.append(chunk.decode())
+                if len(chunks) == 1 and publish:
+                    # Published from a judging thread while the stream waits
+                    threading.Thread(target=lambda: [self.hub.publish(submission.id, e) for e in publish]).start()
+            return chunks
+        return asyncio.run(read())
+
+    def test_live_events(self):
+        submission = Submission.objects.create(problem=self.problem, code='', status='Processing')
+        self.hub.publish(submission.id, {'type': 'test', 'position': 0, 'passed': True, 'score': 50})
+        chunks = self.stream(submission, publish=[
+            {'type': 'test', 'position': 1, 'passed': False, 'score': 50},
+            {'type': 'done', 'status': 'Wrong Answer', 'score': 50},
+        ])
+        self.assertEqual([chunk.split('\n')[0] for chunk in chunks], ['event: test', 'event: test', 'event: done'])
+        self.assertIn('"position": 1', chunks[1])
+        self.assertEqual(self.hub._subscribers, {})
+
+    def test_finished_submission(self):
+        submission = Submission.objects.create(
+            problem=self.problem, code='', status='Accepted', score=100,
+            test_results=[{'passed': True, 'status': 'Accepted', 'is_sample': True}],
+        )
+        chunks = self.stream(submission)
+        self.assertEqual(len(chunks), 1)
+        self.assertTrue(chunks[0].startswith('event: done'))
+        self.assertIn('"passed_tests": 1', chunks[0])
+
+    def test_other_users_submission(self):
+        owner = User.objects.create_user('owner', password='password')
+        submission = Submission.objects.create(user=owner, problem=self.problem, code='', status='Processing')
+        response = asyncio.run(self.async_client.get(reverse('quiz:submission_events', args=[submission.id])))
+        self.assertEqual(response.status_code, 404)
+
+
+class SubmissionStatusTests(TransactionTestCase):
+    """The status endpoint long-polls on the progress hub rather than the database."""
+
+    def setUp(self):
+        quiz = Quiz.objects.create(title='Quiz', description='')
+        self.problem = Problem.objects.create(quiz=quiz, title='Problem', description='', solution='', difficulty='easy')
+        self.hub = progress.LocalProgressHub()
+        patcher = mock.patch.object(progress, '_hub', self.hub)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def status(self, submission, wait=None, on_wait=None):
+        async def get():
+            url = reverse('quiz:submission_status', args=[submission.id])
+            request = asyncio.ensure_future(self.async_client.get(url, {'wait': wait} if wait is not None else {}))
+            if on_wait is not None:
+                while not self.hub._subscribers:
+                    await asyncio.sleep(0.01)
+                threading.Thread(target=on_wait).start()
+            return await request
+        started = time.monotonic()
+        response = asyncio.run(asyncio.wait_for(get(), 10))
+        return response, time.monotonic() - started
+
+    def test_finished_submission(self):
+        submission = Submission.objects.create(problem=self.problem, code='', status='Accepted', score=100, test_results=[])
+        response, _ = self.status(submission, wait=20)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['finished'], response.json()['score']), (True, 100))
+
+    def test_wait_for_verdict(self):
+        submission = Submission.objects.create(problem=self.problem, code='', status='Processing')
+
+        def judge():
+            Submission.objects.filter(id=submission.id).update(status='Wrong Answer', score=50)
+            self.hub.publish(submission.id, {'type': 'done', 'status': 'Wrong Answer'})
+
+        # The database is not read again while the events keep coming
+        with mock.patch.object(Submission, 'arefresh_from_db', wraps=Submission.arefresh_from_db, autospec=True) as refresh:
+            response, elapsed = self.status(submission, wait=20, on_wait=judge)
+        self.assertLess(elapsed, 5)
+        self.assertEqual(refresh.call_count, 1)
+        self.assertEqual((response.json()['finished'], response.json()['status']), (True, 'Wrong Answer'))
+
+    def test_wait_runs_out(self):
+        submission = Submission.objects.create(problem=self.problem, code='', status='Processing')
+        response, elapsed = self.status(submission, wait=0.3)
+        self.assertGreaterEqual(elapsed, 0.3)
+        self.assertFalse(response.json()['finished'])
+        self.assertEqual(self.hub._subscribers, {})
+        # Without `wait` the state is reported at once
+        response, elapsed = self.status(submission)
+        self.assertEqual((response.status_code, response.json()['finished']), (200, False))
+
+    def test_expired_events(self):
+        submission = Submission.objects.create(problem=self.problem, code='', status='Processing')
+        # Judged without an event reaching this hub; seen at the next heartbeat
+        with mock.patch('quiz.views.JUDGE_PROGRESS_HEARTBEAT', 0.2):
+            response, elapsed = self.status(submission, wait=20, on_wait=lambda: Submission.objects.filter(
+                id=submission.id).update(status='Accepted', score=100))
+        self.assertLess(elapsed, 5)
+        self.assertEqual(response.json()['status'], 'Accepted')
+
+    def test_other_users_submission(self):
+        owner = User.objects.create_user('owner', password='password')
+        submission = Submission.objects.create(user=owner, problem=self.problem, code='', status='Processing')
+        response, _ = self.status(submission)
+        self.assertEqual(response.status_code, 404)
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+        self.assertEqual(self.client.get(reverse('quiz:submission_status', args=[submission.id])).status_code, 200)
+
+
+class AsyncRunTests(TestCase):
+    """The async Run endpoint answers like the threaded one, through the async Judge0 client."""
+
+    @classmethod
+    def setUpTestData(cls):
+        quiz = Quiz.objects.create(title='Quiz', description='')
+        cls.problem = Problem.objects.create(quiz=quiz, title='Problem', description='', solution='', difficulty='easy')
+        ProblemTestCase.objects.create(problem=cls.problem, input_data='1', expected_output='1', is_sample=True)
+
+    def setUp(self):
+        judge0 = FakeJudge0Server().start()
+        self.addCleanup(judge0.stop)
+        settings = override_settings(JUDGE0_URL=judge0.url, JUDGE_RATE_LIMITS={'BACKEND': None},
+                                     EXECUTION_BACKENDS={'default': 'quiz.backends.judge0.Judge0Backend'})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        reset_judge0_client()
+        self.addCleanup(reset_judge0_client)
+
+    def test_same_answer_as_sync_view(self):
+        for name in ('quiz:run_code', 'quiz:run_code_sync'):
+            response = self.client.post(reverse(name, args=[self.problem.id]),
+                                        {'code': f'print(input())  # {name}', 'language_id': 71, 'input': '42'},
+                                        content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['output'], '42')
+            self.assertEqual(response.json()['status'], 'Accepted')
+
+    def test_bad_requests(self):
+        url = reverse('quiz:run_code', args=[self.problem.id])
+        self.assertEqual(self.client.post(url, {'language_id': 71}, content_type='application/json').status_code, 400)
+        self.assertEqual(self.client.post(url, 'not json', content_type='application/json').status_code, 400)
+        self.assertEqual(self.client.get(url).status_code, 405)
+        missing = reverse('quiz:run_code', args=[0])
+        self.assertEqual(self.client.post(missing, {'code': 'x', 'language_id': 71},
+                                          content_type='application/json').status_code, 404)
+
+    def test_unknown_language(self):
+        for name in ('quiz:run_code', 'quiz:submit_solution', 'quiz:run_code_sync', 'quiz:submit_solution_sync'):
+            for language_id in ('python', 9999, [71]):
+                with self.subTest(view=name, language_id=language_id):
+                    response = self.client.post(reverse(name, args=[self.problem.id]),
+                                                {'code': 'print(1)', 'language_id': language_id},
+                                                content_type='application/json')
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.json(), {'success': False, 'error': 'Unsupported language.'})
+        self.assertFalse(Submission.objects.exists())
+
+    def test_authentication(self):
+        user = User.objects.create_user('api', password='secret')
+        url = reverse('quiz:submit_solution', args=[self.problem.id])
+        payload = {'code': 'print(input())', 'language_id': 71}
+
+        def basic(password):
+            return 'Basic ' + base64.b64encode(f'api:{password}'.encode()).decode()
+
+        # API clients signing in with HTTP Basic get their own submissions
+        response = self.client.post(url, payload, content_type='application/json', HTTP_AUTHORIZATION=basic('secret'))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Submission.objects.get(id=response.json()['submission_id']).user, user)
+        response = self.client.post(url, payload, content_type='application/json', HTTP_AUTHORIZATION=basic('wrong'))
+        self.assertEqual(response.status_code, 403)
+
+        # Session users must pass the CSRF check
+        client = self.client_class(enforce_csrf_checks=True)
+        client.force_login(user)
+        self.assertEqual(client.post(url, payload, content_type='application/json').status_code, 403)
+
+    def test_cancelled_wait_leaves_the_scheduler_queue(self):
+        scheduler = JudgingScheduler(capacity=1)
+
+        async def run():
+            async with scheduler.aslot('custom'):
+                waiter = asyncio.create_task(scheduler.aslot('custom').__aenter__())
+                await asyncio.sleep(0.01)
+                waiter.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await waiter
+            # The cancelled call no longer blocks the head of the queue
+            async with scheduler.aslot('submit'):
+                pass
+
+        asyncio.run(asyncio.wait_for(run(), 5))
+        self.assertEqual(scheduler.metrics()['classes']['custom']['queued'], 0)
+        self.assertEqual(scheduler.metrics()['in_flight'], 0)
+
+
+class AsgiRequestThreadTests(TransactionTestCase):
+    """
+    Under the ASGI application, a Run waiting on Judge0 no longer holds the
+    executor thread Django's ASGIHandler gives each request (this relies on
+    asgiref internals, see `views._release_request_thread`).
+    """
+
+    def setUp(self):
+        quiz = Quiz.objects.create(title='Quiz', description='')
+        self.problem = Problem.objects.create(quiz=quiz, title='Problem', description='', solution='', difficulty='easy')
+        self.judge0 = FakeJudge0Server(latency=0.5).start()
+        self.addCleanup(self.judge0.stop)
+        settings = override_settings(JUDGE0_URL=self.judge0.url, JUDGE_RATE_LIMITS={'BACKEND': None},
+                                     EXECUTION_BACKENDS={'default': 'quiz.backends.judge0.Judge0Backend'})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        reset_judge0_client()
+        self.addCleanup(reset_judge0_client)
+
+    def test_run_releases_request_thread(self):
+        path = reverse('quiz:run_code', args=[self.problem.id])
+        body = json.dumps({'code': f'print(input())  # {self.id()}', 'language_id': 71, 'input': '7'}).encode()
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'POST', 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+            'headers': [(b'host', b'testserver'), (b'content-type', b'application/json')],
+            'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+        }
+
+        async def run():
+            messages = []
+            received = asyncio.Event()
+
+            async def receive():
+                if not received.is_set():
+                    received.set()
+                    return {'type': 'http.request', 'body': body, 'more_body': False}
+                await asyncio.Event().wait()  # The client never disconnects
+
+            async def send(message):
+                messages.append(message)
+
+            request = asyncio.create_task(get_asgi_application()(scope, receive, send))
+            # Until the run is waiting on Judge0
+            for _ in range(500):
+                if self.judge0.stats().get('POST /submissions') or request.done():
+                    break
+                await asyncio.sleep(0.01)
+            waiting_executors = len(SyncToAsync.context_to_thread_executor)
+            await asyncio.wait_for(request, 10)
+            return waiting_executors, messages
+
+        waiting_executors, messages = asyncio.run(run())
+        self.assertEqual(waiting_executors, 0)
+        self.assertEqual(messages[0]['status'], 200)
+        self.assertEqual(json.loads(b''.join(m.get('body', b'') for m in messages[1:]))['output'], '7')
+
+    def test_warns_without_asgiref_internals(self):
+        with mock.patch.object(views, '_thread_release_unsupported', False), \
+                mock.patch.object(SyncToAsync, 'context_to_thread_executor', None):
+            with self.assertLogs('quiz.views', 'WARNING') as logs:
+                asyncio.run(views._release_request_thread())
+                asyncio.run(views._release_request_thread())
+        self.assertEqual(len(logs.records), 1)
+
+
+class LeaderboardTests(TestCase):
+    """Incrementally maintained standings agree with a rebuild from the history."""
+
+    T0 = datetime(2026, 1, 1, 2, 44, tzinfo=dt_timezone.utc)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.quiz = Quiz.objects.create(title='Quiz', description='')
+        cls.problems = [
+            Problem.objects.create(quiz=cls.quiz, title=f'Problem {i}', description='', solution='', difficulty='easy')
+            for i in range(2)
+        ]
+        cls.users = [User.objects.create_user(name, password='password') for name in ('alice', 'bob', 'carol')]
+
+    def judge(self, user, problem, score, minutes):
+        """Record a judged submission made `minutes` after T0, as the judge workers do."""
+        submitted_at = self.T0 + timedelta(minutes=minutes)
+        submission = Submission.objects.create(user=user, problem=problem, code='', status='Accepted', score=score)
+        Submission.objects.filter(id=submission.id).update(submitted_at=submitted_at)
+        get_leaderboard().record(self.quiz.id, user.id, problem.id, score, submitted_at)
+
+    def standings(self):
+        return list(LeaderboardEntry.objects.filter(quiz=self.quiz).order_by('-sort_key').values_list(
+            'user_id', 'total_score', 'reached_at', 'sort_key', 'problem_scores'))
+
+    def test_apply_score(self):
+        scores = {}
+        self.assertEqual(apply_score(scores, 1, 50, self.T0 + timedelta(minutes=10)), (50, self.T0 + timedelta(minutes=10)))
+        self.assertIsNone(apply_score(scores, 1, 40, self.T0))
+        self.assertIsNone(apply_score(scores, 1, 0, self.T0))
+        self.assertIsNone(apply_score(scores, 1, 50, self.T0 + timedelta(minutes=20)))
+        # The same best score reached earlier moves the time back
+        self.assertEqual(apply_score(scores, 1, 50, self.T0), (50, self.T0))
+        self.assertEqual(apply_score(scores, 2, 100, self.T0 + timedelta(minutes=5)), (150, self.T0 + timedelta(minutes=5)))
+
+    def test_out_of_order_verdicts_match_rebuild(self):
+        alice, bob, carol = self.users
+        first, second = self.problems
+        # Verdicts finish out of submission order on parallel judge workers
+        self.judge(alice, first, 100, 30)
+        self.judge(alice, first, 100, 0)
+        self.judge(bob, first, 100, 10)
+        self.judge(bob, second, 50, 40)
+        self.judge(alice, second, 50, 45)
+        self.judge(bob, second, 0, 5)
+        self.judge(carol, second, 100, 20)
+        self.judge(carol, first, 40, 25)
+        self.judge(alice, second, 40, 35)
+
+        incremental = self.standings()
+        self.assertEqual([user_id for user_id, *_ in incremental], [bob.id, alice.id, carol.id])
+        self.assertEqual(incremental[1][2], self.T0 + timedelta(minutes=45))
+        self.assertEqual(get_leaderboard().rank(self.quiz.id, alice.id), (2, 150))
+
+        call_command('rebuild_leaderboard', stdout=StringIO())
+        self.assertEqual(self.standings(), incremental)
+
+    def test_cached_rank_follows_new_verdicts(self):
+        alice, bob, carol = self.users
+        first, second = self.problems
+        self.judge(alice, first, 100, 0)
+        self.judge(bob, first, 50, 5)
+        leaderboard = get_leaderboard()
+        self.assertEqual(leaderboard.rank(self.quiz.id, bob.id), (2, 50))
+        self.assertIsNone(leaderboard.rank(self.quiz.id, carol.id))
+        with self.assertNumQueries(0):
+            self.assertEqual(leaderboard.rank(self.quiz.id, bob.id), (2, 50))
+            self.assertIsNone(leaderboard.rank(self.quiz.id, carol.id))
+
+        self.judge(bob, second, 100, 10)
+        self.judge(carol, second, 20, 15)
+        with self.assertNumQueries(1):
+            self.assertEqual(leaderboard.rank(self.quiz.id, bob.id), (1, 150))
+            self.assertEqual(leaderboard.rank(self.quiz.id, alice.id), (2, 100))
+            self.assertEqual(leaderboard.rank(self.quiz.id, carol.id), (3, 20))
+
+    def test_leaderboard_endpoint(self):
+        alice, bob, _ = self.users
+        self.judge(alice, self.problems[0], 100, 0)
+        self.judge(bob, self.problems[0], 60, 5)
+        self.client.force_login(bob)
+        response = self.client.get(reverse('quiz:quiz_leaderboard', args=[self.quiz.id]), {'limit': 1})
+        self.assertEqual([row['username'] for row in response.json()['leaderboard']], ['alice'])
+        self.assertEqual(response.json()['me'], {'rank': 2, 'total_score': 60})
+
+
+class StoredTestDataAdminTests(TestCase):
+    """Test data kept out of row can be seen and replaced from the admin."""
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        for name, value in (('TESTDATA_ROOT', root.name), ('TESTDATA_INLINE_LIMIT', 16)):
+            patcher = mock.patch.object(testdata, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client.force_login(User.objects.create_superuser('admin', password='password'))
+        quiz = Quiz.objects.create(title='Quiz', description='')
+        self.problem = Problem.objects.create(quiz=quiz, title='Problem', description='', solution='', difficulty='easy')
+        self.case = ProblemTestCase.objects.create(problem=self.problem, input_data='1 2 3 ' * 10, expected_output='6')
+        self.url = reverse('admin:quiz_testcase_change', args=[self.case.id])
+
+    def post(self, **fields):
+        data = {'problem': self.problem.id, 'input_data': '', 'expected_output': '6', **fields}
+        return self.client.post(self.url, data)
+
+    def test_preview(self):
+        self.assertTrue(self.case.input_sha256)
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Stored file, 60')
+        self.assertContains(response, '1 2 3 1 2 3')
+
+    def test_empty_field_keeps_stored_data(self):
+        self.assertEqual(self.post().status_code, 302)
+        self.case.refresh_from_db()
+        self.assertEqual(self.case.get_input_data(), '1 2 3 ' * 10)
+
+    def test_upload_replaces_data(self):
+        upload = SimpleUploadedFile('big.in', ('9 ' * 50).encode())
+        self.assertEqual(self.post(input_file=upload).status_code, 302)
+        self.case.refresh_from_db()
+        self.assertEqual(self.case.input_data, '')
+        self.assertEqual(self.case.get_input_data(), '9 ' * 50)
+        self.assertEqual(self.case.input_size, 100)
+
+        self.assertEqual(self.post(input_data='small').status_code, 302)
+        self.case.refresh_from_db()
+        self.assertEqual((self.case.input_data, self.case.input_sha256), ('small', ''))
+
+
+class MultitestOutputTests(TestCase):
+    """A multi-test job's output splits into one Judge0-shaped result per test."""
+
+    def job(self, *tests, status=3):
+        lines = []
+        for header, stdout, stderr in tests:
+            lines += [f'{multitest.HEADER} {header}', base64.b64encode(stdout.encode()).decode(), base64.b64encode(stderr.encode()).decode()]
+        return {'status': {'id': status}, 'stdout': '\n'.join(lines) + '\n'}
+
+    def test_per_test_usage(self):
+        results = multitest.parse_output(self.job(('0 0 40 0.12 0.02 2048', '3\n', ''), ('1 1 30 0.01 0.00 4096', '', 'oops')), 2)
+        self.assertEqual(results[0]['stdout'], '3\n')
+        self.assertEqual((results[0]['status']['id'], results[0]['time'], results[0]['memory']), (3, '0.140', 2048))
+        self.assertEqual((results[1]['status']['id'], results[1]['stderr'], results[1]['memory']), (11, 'oops', 4096))
+
+    def test_without_gnu_time(self):
+        results = multitest.parse_output(self.job(('0 0 40 ', '3\n', '')), 2)
+        self.assertEqual((results[0]['time'], results[0]['memory']), ('0.040', None))
+
+    def test_time_limits(self):
+        results = multitest.parse_output(self.job(
+            ('0 137 2001', '', ''),
+            ('1 137 500', '', ''),
+            ('2 137 1002', '', ''),
+            ('3 152 900 1.00 0.00 512', '', ''),
+            ('4 0 1500 1.20 0.00 512', '', ''),
+        ), 2, cpu_time_limit=1)
+        self.assertEqual([results[i]['status']['id'] for i in range(5)], [5, 12, 5, 5, 5])
+
+    def test_memory_limit(self):
+        results = multitest.parse_output(self.job(
+            ('0 0 40 0.01 0.00 65536', '1\n', ''),
+            ('1 0 40 0.01 0.00 65537', '1\n', ''),
+            ('2 137 40 0.01 0.00 70000', '', ''),
+            ('3 0 40', '1\n', ''),
+        ), 2, memory_limit=65536)
+        self.assertEqual([results[i]['status']['description'] for i in range(4)],
+                         ['Accepted', 'Memory Limit Exceeded', 'Memory Limit Exceeded', 'Accepted'])
+
+    def test_allocation_failure(self):
+        job = self.job(('0 134 40 0.01 0.00 2048', '', "terminate called after throwing an instance of 'std::bad_alloc'"))
+        self.assertEqual(multitest.parse_output(job, 2, memory_limit=65536)[0]['status']['description'], 'Memory Limit Exceeded')
+        self.assertEqual(multitest.parse_output(job, 2)[0]['status']['description'], 'Runtime Error (SIGABRT)')
+
+    def test_memory_rlimit(self):
+        def run_script(language_id):
+            archive = base64.b64decode(multitest.build_archive('', multitest.get_toolchain(language_id), ['1'], 2, 1, 65536))
+            return zipfile.ZipFile(BytesIO(archive)).read('run').decode()
+        self.assertIn('ulimit -v 65536 && ', run_script(54))
+        self.assertNotIn('ulimit -v', run_script(62))
+
+    def test_compile_error(self):
+        self.assertIsNone(multitest.parse_output(self.job(status=6), 2))
+
+    def test_truncated_job(self):
+        job = self.job(('0 0 10', '1\n', ''), ('1 0 10', '2\n', ''))
+        job['stdout'] = job['stdout'][:-12]
+        self.assertEqual(list(multitest.parse_output(job, 2)), [0])
+
+
+class MultitestJobTests(TestCase):
+    """Compiled submissions are compiled once per chunk of tests, not once per test."""
+
+    def setUp(self):
+        self.stdins = [f'{i}\n' for i in range(50)]
+        for patcher in (mock.patch.object(judge0_backend, 'JUDGE0_MULTITEST_CHUNK_SIZE', 25),
+                        mock.patch.object(judge0_backend, 'logger')):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def execute_many(self, **options):
+        judge0 = FakeJudge0Server(**options).start()
+        self.addCleanup(judge0.stop)
+        with override_settings(JUDGE0_URL=judge0.url):
+            reset_judge0_client()
+            self.addCleanup(reset_judge0_client)
+            results = Judge0Backend().execute_many('int main() {}', 54, self.stdins, {'cpu_time_limit': 1})
+        self.assertEqual([result['stdout'] for result in results], self.stdins)
+        return judge0.stats()
+
+    def test_one_compilation_per_chunk(self):
+        stats = self.execute_many()
+        self.assertEqual((stats['compilations'], stats['submissions']), (2, 2))
+        self.assertEqual(stats['multitest_runs'], 50)
+
+    def test_memory_limit(self):
+        judge0 = FakeJudge0Server(memory=70000).start()
+        self.addCleanup(judge0.stop)
+        with override_settings(JUDGE0_URL=judge0.url):
+            reset_judge0_client()
+            self.addCleanup(reset_judge0_client)
+            results = Judge0Backend().execute_many('int main() {}', 54, self.stdins,
+                                                   {'cpu_time_limit': 1, 'memory_limit': 65536})
+        self.assertEqual({result['status']['description'] for result in results}, {'Memory Limit Exceeded'})
+        self.assertEqual(judge0.stats()['compilations'], 2)
+
+    def test_unreached_tests_run_one_by_one(self):
+        stats = self.execute_many(multitest_reach=20)
+        self.assertEqual((stats['compilations'], stats['multitest_runs']), (2, 40))
+        self.assertEqual(stats['submissions'], 2 + 10)
+
+
+class CheckerTests(TestCase):
+    """Output checkers, including comparisons that straddle stream chunks."""
+
+    def setUp(self):
+        patcher = mock.patch.object(checkers, 'CHUNK_SIZE', 3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_default_matches_normalize_output(self):
+        # The comparison every problem used before checker modes existed
+        def normalize_output(output):
+            if not output:
+                return ""
+            return re.sub(r'\s+$', '', output.strip()).replace('\r\n', '\n')
+
+        generator = random.Random(0)
+        for _ in range(3000):
+            expected, actual = (''.join(generator.choices(' \r\n\tab', k=generator.randint(0, 9))) for _ in range(2))
+            if generator.random() < 0.5:
+                actual = generator.choice(['', ' ', '\r\n', '\n ']) + expected + generator.choice(['', '\n', '\r\n', ' \t'])
+            with self.subTest(expected=expected, actual=actual):
+                self.assertEqual(checkers.check_output(expected, actual),
+                                 normalize_output(expected) == normalize_output(actual))
+
+    def test_modes(self):
+        cases = [
+            # expected, actual, {mode: verdict}
+            ('1 2\n3\n', '1 2\n3\n', {'exact': True, 'whitespace': True, 'token': True, 'float': True}),
+            ('1 2\n3\n', '1 2\n3', {'exact': False, 'whitespace': True, 'token': True}),
+            ('1 2\n3\n', '1 2   \n3\n\n\n', {'exact': False, 'whitespace': True, 'token': True}),
+            ('1 2\n3\n', '1\n2 3\n', {'default': False, 'whitespace': False, 'token': True}),
+            ('1 2\n3\n', '  1 2\n3\n', {'default': True, 'whitespace': False, 'token': True}),
+            ('1 2\n\n3\n', '1 2\n3\n', {'whitespace': False, 'token': True}),
+            ('abcdefgh', 'abcdefgi', {'exact': False, 'token': False, 'float': False}),
+            ('0.3333333', '0.33333333', {'token': False, 'float': True}),
+            ('1000000', '1000000.5', {'float': True}),
+            ('1', '1.01', {'float': False}),
+            ('nan', 'nan', {'float': True}),
+            ('inf 1', '1e999 1', {'float': False}),
+            ('yes', 'YES', {'float': False}),
+            ('1 2', '1 2 3', {'token': False, 'float': False}),
+        ]
+        for expected, actual, verdicts in cases:
+            for mode, verdict in verdicts.items():
+                with self.subTest(mode=mode, expected=expected, actual=actual):
+                    self.assertIs(checkers.check_output(expected, actual, mode), verdict)
+
+    def test_stored_data(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        with mock.patch.object(testdata, 'TESTDATA_ROOT', root.name):
+            stored = testdata.store('1 2\r\n3\r\n\r\n')
+            self.assertTrue(checkers.check_output(stored, '1 2\n3'))
+            self.assertFalse(checkers.check_output(stored, '1 2\n3', 'exact'))
+            self.assertTrue(checkers.check_output(stored, '1 2\n3', 'token'))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            checkers.check_output('1', '1', 'fuzzy')
+
+
+class RateLimitTests(TestCase):
+    """Token buckets refill over time, and refused Run requests get 429 with Retry-After."""
+
+    def test_refill(self):
+        limiter = ratelimit.LocalRateLimiter()
+        user, ip = ('run:user:1', 2, 1.0), ('run:ip:1.2.3.4', 3, 0.5)
+        with mock.patch.object(ratelimit.time, 'monotonic', return_value=100.0) as clock:
+            self.assertEqual([limiter.acquire([user, ip]) for _ in range(2)], [0, 0])
+            self.assertEqual(limiter.acquire([user, ip]), 1.0)
+            clock.return_value = 100.5
+            self.assertEqual(limiter.acquire([user, ip]), 0.5)
+            clock.return_value = 101.0
+            self.assertEqual(limiter.acquire([user, ip]), 0)
+            # Three of the IP bucket's tokens were taken (the refusals took none)
+            # and half a token refilled, so a whole one is a second away
+            self.assertEqual(limiter.acquire([ip]), 1.0)
+            clock.return_value = 1000.0
+            self.assertEqual([limiter.acquire([user]) for _ in range(3)], [0, 0, 1.0])
+
+    def test_throttled_runs(self):
+        judge0 = FakeJudge0Server().start()
+        self.addCleanup(judge0.stop)
+        limits = {'BACKEND': 'local', 'RATES': {'run': {'user': {'rate': '1/min', 'burst': 2}}}}
+        settings = override_settings(JUDGE0_URL=judge0.url, JUDGE_RATE_LIMITS=limits,
+                                     EXECUTION_BACKENDS={'default': 'quiz.backends.judge0.Judge0Backend'})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        for reset in (reset_judge0_client, ratelimit.reset_rate_limiter):
+            reset()
+            self.addCleanup(reset)
+        quiz = Quiz.objects.create(title='Quiz', description='')
+        problem = Problem.objects.create(quiz=quiz, title='Problem', description='', solution='', difficulty='easy')
+        self.client.force_login(User.objects.create_user('alice'))
+
+        for name in ('quiz:run_code', 'quiz:run_code_sync'):
+            url = reverse(name, args=[problem.id])
+            with self.subTest(view=name):
+                ratelimit.get_rate_limiter().clear()
+                responses = [self.client.post(url, {'code': f'print({n})', 'language_id': 71}, content_type='application/json')
+                             for n in range(3)]
+                self.assertEqual([response.status_code for response in responses], [200, 200, 429])
+                self.assertEqual(responses[2]['Retry-After'], '60')
+
+        # Buckets are per user
+        self.client.force_login(User.objects.create_user('bob'))
+        response = self.client.post(url, {'code': 'print(3)', 'language_id': 71}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+
+class CoalescingTests(TestCase):
+    """Identical executions in flight at the same time run once."""
+
+    def setUp(self):
+        self.coalescer = LocalCoalescer()
+        self.computes = 0
+
+    def compute(self, result='42', error=None):
+        self.computes += 1
+        time.sleep(0.2)
+        if error:
+            raise error
+        return result
+
+    def run_in_threads(self, count, call):
+        results = [None] * count
+
+        def target(i):
+            try:
+                results[i] = call()
+            except Exception as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=target, args=[i]) for i in range(count)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.01)
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_threads(self):
+        results = self.run_in_threads(5, lambda: self.coalescer.run('key', self.compute))
+        self.assertEqual(results, ['42'] * 5)
+        self.assertEqual((self.computes, self.coalescer.coalesced), (1, 4))
+        # Nothing is kept once the call is over, and other keys never wait
+        self.coalescer.run('key', self.compute)
+        self.coalescer.run('other', self.compute)
+        self.assertEqual((self.computes, self.coalescer.coalesced), (3, 4))
+
+    def test_errors_reach_followers(self):
+        error = ValueError('no')
+        results = self.run_in_threads(3, lambda: self.coalescer.run('key', lambda: self.compute(error=error)))
+        self.assertEqual(results, [error] * 3)
+        self.assertEqual(self.computes, 1)
+        self.assertEqual(self.coalescer.run('key', self.compute), '42')
+
+    def test_coroutines_and_threads(self):
+        async def acompute():
+            await asyncio.sleep(0.2)
+            return self.compute(result='async')
+
+        async def run():
+            leader = asyncio.ensure_future(self.coalescer.arun('key', acompute))
+            await asyncio.sleep(0.05)
+            thread = asyncio.ensure_future(asyncio.to_thread(self.coalescer.run, 'key', self.compute))
+            followers = [self.coalescer.arun('key', acompute) for _ in range(3)]
+            # The caller that started the call giving up does not stop it
+            leader.cancel()
+            results = await asyncio.gather(thread, *followers)
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return results
+
+        self.assertEqual(asyncio.run(asyncio.wait_for(run(), 5)), ['async'] * 4)
+        self.assertEqual((self.computes, self.coalescer.coalesced), (1, 4))
+
+    @override_settings(EXECUTION_BACKENDS={'default': 'quiz.tests.ScriptedBackend'})
+    def test_runs_share_one_execution(self):
+        ScriptedBackend.reset()
+        code = f'print(input())  # {self.id()}'
+        # Without the result cache, so later callers can only be served by joining the first
+        with mock.patch.object(judging, 'get_result_cache', return_value=None), \
+                mock.patch.object(ScriptedBackend, 'delay', 0.2):
+            results = self.run_in_threads(4, lambda: judging.call_judge0_api(code, 71, stdin='7'))
+        self.assertEqual([result['data']['stdout'] for result in results], ['7'] * 4)
+        self.assertEqual(ScriptedBackend.runs, 1)
+
+
+class PageCacheInvalidationTests(TestCase):
+    """Edits made in the admin show up at once on the cached quiz pages."""
+
+    def setUp(self):
+        self.admin = self.client_class()
+        self.admin.force_login(User.objects.create_superuser('admin', password='password'))
+        self.member = self.client_class()
+        self.member.force_login(User.objects.create_user('alice'))
+        self.quiz = Quiz.objects.create(title='Arrays', description='Lists of things')
+        self.other = Quiz.objects.create(title='Strings', description='Text')
+        self.problem = Problem.objects.create(quiz=self.quiz, title='Two Sum', description='Add two numbers',
+                                              solution='print(sum(map(int, input().split())))', difficulty='easy')
+        self.quiz_list = reverse('quiz:quiz_list')
+        self.quiz_detail = reverse('quiz:quiz_detail', args=[self.quiz.id])
+        self.code_editor = reverse('quiz:code_editor', args=[self.problem.id])
+
+    def shown(self, text, *urls):
+        """Whether each page shows `text` to an anonymous and to a signed-in visitor."""
+        return [text in client.get(url).content.decode() for url in urls for client in (self.client, self.member)]
+
+    def change(self, obj, **fields):
+        data = {key: '' if value is None else value for key, value in {**model_to_dict(obj), **fields}.items()}
+        url = reverse(f'admin:quiz_{obj._meta.model_name}_change', args=[obj.id])
+        self.assertEqual(self.admin.post(url, data).status_code, 302)
+
+    def test_problem_edit(self):
+        self.assertEqual(self.shown('Two Sum', self.quiz_detail, self.code_editor), [True] * 4)
+        # Served from the cache until something changes
+        with self.assertNumQueries(0):
+            self.client.get(self.quiz_detail)
+
+        self.change(self.problem, title='Three Sum', description='Add three numbers')
+        self.assertEqual(self.shown('Three Sum', self.quiz_detail, self.code_editor), [True] * 4)
+        self.assertEqual(self.shown('Add three numbers', self.code_editor), [True] * 2)
+
+    def test_quiz_edit(self):
+        self.assertEqual(self.shown('Arrays', self.quiz_list, self.quiz_detail), [True] * 4)
+        self.change(self.quiz, title='Lists')
+        self.assertEqual(self.shown('Arrays', self.quiz_list, self.quiz_detail), [False] * 4)
+        self.assertEqual(self.shown('Lists', self.quiz_list, self.quiz_detail), [True] * 4)
+
+    def test_test_case_added(self):
+        self.assertEqual(self.shown('0 test cases', self.quiz_detail), [True] * 2)
+        response = self.admin.post(reverse('admin:quiz_testcase_add'),
+                                   {'problem': self.problem.id, 'input_data': '1 2', 'expected_output': '3'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.shown('1 test cases', self.quiz_detail), [True] * 2)
+
+    def test_problem_moved(self):
+        other_detail = reverse('quiz:quiz_detail', args=[self.other.id])
+        self.assertEqual(self.shown('Two Sum', self.quiz_detail, other_detail), [True, True, False, False])
+        self.change(self.problem, quiz=self.other.id)
+        self.assertEqual(self.shown('Two Sum', self.quiz_detail, other_detail), [False, False, True, True])
+
+
+class Judge0ClientTests(TestCase):
+    """The circuit breaker's states, and which requests are retried."""
+
+    def setUp(self):
+        patcher = mock.patch.object(judge0_client, 'logger')
+        self.logger = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_circuit_breaker(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+        with mock.patch.object(judge0_client.time, 'monotonic', return_value=1000.0) as clock:
+            # Only consecutive failures count
+            breaker.record_failure()
+            breaker.record_failure()
+            breaker.record_success()
+            breaker.record_failure()
+            breaker.record_failure()
+            self.assertEqual((breaker.state, breaker.allow_request()), (CircuitBreaker.CLOSED, True))
+            breaker.record_failure()
+            self.assertEqual((breaker.state, breaker.allow_request()), (CircuitBreaker.OPEN, False))
+            self.logger.warning.assert_called_once()
+
+            # One trial request once the timeout has passed; a failed trial re-opens the circuit
+            clock.return_value = 1029.9
+            self.assertFalse(breaker.allow_request())
+            clock.return_value = 1030.0
+            self.assertEqual([breaker.allow_request(), breaker.allow_request()], [True, False])
+            self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+            breaker.record_failure()
+            self.assertEqual((breaker.state, breaker.allow_request()), (CircuitBreaker.OPEN, False))
+
+            # A successful trial closes it
+            clock.return_value = 1060.0
+            self.assertTrue(breaker.allow_request())
+            breaker.record_success()
+            self.assertEqual((breaker.state, breaker.allow_request()), (CircuitBreaker.CLOSED, True))
+            breaker.record_failure()
+            self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def judge0(self, **options):
+        judge0 = FakeJudge0Server(**options).start()
+        self.addCleanup(judge0.stop)
+        return judge0
+
+    def test_open_circuit_skips_judge0(self):
+        judge0 = self.judge0(error_rate=1.0)
+        client = Judge0Client(judge0.url, retries=0, circuit_breaker=CircuitBreaker(failure_threshold=2))
+        self.addCleanup(client.session.close)
+        for _ in range(2):
+            with self.assertRaises(Judge0Error):
+                client.languages()
+        with self.assertRaises(Judge0Unavailable):
+            client.submit({'source_code': '', 'language_id': 71})
+        self.assertEqual(judge0.api_calls(), 2)
+
+    def test_only_reads_are_retried(self):
+        judge0 = self.judge0(error_rate=1.0, error_status=503)
+        client = Judge0Client(judge0.url, retries=3, backoff_factor=0, circuit_breaker=CircuitBreaker(failure_threshold=100))
+        self.addCleanup(client.session.close)
+        for call in (client.languages, lambda: client.submit({'source_code': '', 'language_id': 71})):
+            with self.assertRaises(Judge0Error):
+                call()
+        self.assertEqual(judge0.stats(), {'GET /languages': 4, 'POST /submissions': 1, 'injected_errors': 5})
+
+        # Errors outside the retried statuses are reported at once
+        judge0.error_status = 500
+        judge0.reset_stats()
+        with self.assertRaises(Judge0Error):
+            client.languages()
+        self.assertEqual(judge0.stats()['GET /languages'], 1)
+
+    def test_async_client_retries_reads_only(self):
+        judge0 = self.judge0(error_rate=1.0, error_status=503)
+
+        async def run():
+            client = AsyncJudge0Client(judge0.url, retries=3, backoff_factor=0,
+                                       circuit_breaker=CircuitBreaker(failure_threshold=100))
+            try:
+                for method, path in (('GET', '/languages'), ('POST', '/submissions')):
+                    with self.assertRaises(Judge0Error):
+                        await client.request(method, path)
+            finally:
+                await client.http.aclose()
+
+        asyncio.run(run())
+        self.assertEqual(judge0.stats(), {'GET /languages': 4, 'POST /submissions': 1, 'injected_errors': 5})
+
+
+class ResultCacheTests(TestCase):
+    """Execution results are cached by content, least recently used first out, for a while."""
+
+    def result(self, status_id, stdout='1'):
+        return {'stdout': stdout, 'status': {'id': status_id, 'description': ''}}
+
+    def test_lru_eviction(self):
+        cache = result_cache.LocalMemoryResultCache(max_entries=2)
+        cache.set('a', self.result(3, 'a'))
+        cache.set('b', self.result(3, 'b'))
+        self.assertEqual(cache.get('a')['stdout'], 'a')  # Now the most recently used
+        cache.set('c', self.result(3, 'c'))
+        self.assertEqual([cache.get(key) and cache.get(key)['stdout'] for key in 'abc'], ['a', None, 'c'])
+        self.assertEqual(len(cache), 2)
+
+    def test_ttl(self):
+        cache = result_cache.LocalMemoryResultCache(ttl=60)
+        with mock.patch.object(result_cache.time, 'monotonic', return_value=100.0) as clock:
+            cache.set('a', self.result(3))
+            clock.return_value = 159.9
+            self.assertIsNotNone(cache.get('a'))
+            clock.return_value = 160.0
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual((len(cache), cache.stats()['hits'], cache.stats()['misses']), (0, 1, 1))
+
+    def test_only_deterministic_verdicts(self):
+        cache = result_cache.LocalMemoryResultCache()
+        for status_id in range(1, 15):
+            cache.set(str(status_id), self.result(status_id))
+        self.assertEqual(sorted(int(key) for key in cache._entries), [3, 4, 6, 7, 8, 9, 10, 11])
+        cache.set('no status', {'stdout': '1'})
+        self.assertIsNone(cache.get('no status'))
+
+    def test_key(self):
+        key = result_cache.make_cache_key('print(1)', 71, '1', {'cpu_time_limit': 1})
+        self.assertEqual(key, result_cache.make_cache_key('print(1)', '71', '1', {'cpu_time_limit': 1}))
+        self.assertEqual(result_cache.make_cache_key('print(1)', 71), result_cache.make_cache_key('print(1)', 71, ''))
+        for other in (('print(2)', 71, '1', {'cpu_time_limit': 1}), ('print(1)', 70, '1', {'cpu_time_limit': 1}),
+                      ('print(1)', 71, '2', {'cpu_time_limit': 1}), ('print(1)', 71, '1', {'cpu_time_limit': 2}),
+                      ('print(1)', 71, '1', {'cpu_time_limit': 1, 'memory_limit': 65536}), ('print(1)', 71, '1')):
+            self.assertNotEqual(result_cache.make_cache_key(*other), key)
+
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        with mock.patch.object(testdata, 'TESTDATA_ROOT', root.name):
+            stored = testdata.store('1 2 3')
+        self.assertEqual(result_cache.make_cache_key('x', 71, stored), result_cache.make_cache_key('x', 71, testdata.StoredData(stored.sha256, 5)))
+        self.assertNotEqual(result_cache.make_cache_key('x', 71, stored), result_cache.make_cache_key('x', 71, '1 2 3'))
+
+    @override_settings(EXECUTION_BACKENDS={'default': 'quiz.tests.ScriptedBackend'})
+    def test_runs(self):
+        cache = result_cache.LocalMemoryResultCache()
+        ScriptedBackend.reset()
+        with mock.patch.object(judging, 'get_result_cache', return_value=cache):
+            for stdin in ('1', '1', 'crash', 'crash'):
+                judging.call_judge0_api(f'# {self.id()}', 71, stdin=stdin)
+            # Failed executions are never stored
+            self.assertEqual((ScriptedBackend.runs, len(cache)), (3, 1))
+            judging.call_judge0_api(f'# {self.id()}', 71, stdin='1', limits={'cpu_time_limit': 1})
+        self.assertEqual((ScriptedBackend.runs, len(cache)), (4, 2))
+
+
+class SchedulerOrderTests(TestCase):
+    """Waiting calls are admitted by priority class, then fairly between users."""
+
+    def admission_order(self, scheduler, calls):
+        """Queue `calls` of (priority, user, label) behind a running call, in order; return the labels as admitted."""
+        order = []
+        release = threading.Event()
+        started = threading.Event()
+
+        def holder():
+            with scheduler.slot('admin'):
+                started.set()
+                release.wait(5)
+
+        def waiter(priority, user, label):
+            with scheduler.slot(priority, user):
+                order.append(label)
+
+        threads = [threading.Thread(target=holder)]
+        threads[0].start()
+        started.wait(5)
+        for queued, call in enumerate(calls, 1):
+            threads.append(threading.Thread(target=waiter, args=call))
+            threads[-1].start()
+            # Queue them one at a time, so their order of arrival is known
+            while sum(stats['queued'] for stats in scheduler.metrics()['classes'].values()) < queued:
+                time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        return order
+
+    def test_priority_classes(self):
+        calls = [('admin', 1, 'admin'), ('custom', 1, 'custom'), ('sample', 1, 'sample'), ('submit', 1, 'submit'),
+                 ('custom', 2, 'custom 2')]
+        self.assertEqual(self.admission_order(JudgingScheduler(capacity=1), calls),
+                         ['submit', 'sample', 'custom', 'custom 2', 'admin'])
+
+    def test_fair_queuing(self):
+        # One user's backlog of five tests does not hold back another user's one
+        calls = [('submit', 'alice', f'alice {n}') for n in range(5)] + [('submit', 'bob', 'bob')]
+        self.assertEqual(self.admission_order(JudgingScheduler(capacity=1), calls),
+                         ['alice 0', 'bob', 'alice 1', 'alice 2', 'alice 3', 'alice 4'])
+
+        # A user of weight 2 gets two calls in for each of another's
+        calls = [('submit', 'alice', f'alice {n}') for n in range(3)] + [('submit', 'bob', f'bob {n}') for n in range(4)]
+        self.assertEqual(self.admission_order(JudgingScheduler(capacity=1, user_weights={'bob': 2}), calls),
+                         ['bob 0', 'alice 0', 'bob 1', 'bob 2', 'alice 1', 'bob 3', 'alice 2'])
+
+    def test_metrics(self):
+        scheduler = JudgingScheduler(capacity=1)
+        self.admission_order(scheduler, [('submit', 1, 'a'), ('custom', 1, 'b')])
+        metrics = scheduler.metrics()
+        self.assertEqual(metrics['in_flight'], 0)
+        self.assertEqual([metrics['classes'][name]['admitted'] for name in ('submit', 'custom', 'admin')], [1, 1, 1])
+        self.assertGreater(metrics['classes']['custom']['wait_max'], 0)
+
+
+class SubmissionListTests(TestCase):
+    """Keyset pages of a user's submissions, and the filters offered with them."""
+
+    T0 = datetime(2026, 1, 1, 2, 44, tzinfo=dt_timezone.utc)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('student', password='password')
+        cls.quiz = Quiz.objects.create(title='Arrays', description='')
+        cls.problem = Problem.objects.create(quiz=cls.quiz, title='Two Sum', description='', solution='', difficulty='easy')
+        other_quiz = Quiz.objects.create(title='Graphs', description='')
+        cls.other_problem = Problem.objects.create(quiz=other_quiz, title='Shortest Path', description='',
+                                                   solution='', difficulty='hard')
+        Problem.objects.create(quiz=cls.quiz, title='Three Sum', description='', solution='', difficulty='easy')
+        Submission.objects.create(user=User.objects.create_user('other'), problem=cls.other_problem, code='')
+        submissions = [Submission.objects.create(user=cls.user, problem=cls.problem, code='') for _ in range(8)]
+        # Several submissions share a timestamp, including across page boundaries
+        times = [cls.T0 + timedelta(minutes=minutes) for minutes in (0, 0, 1, 1, 1, 1, 2, 2)]
+        for submission, submitted_at in zip(submissions, times):
+            Submission.objects.filter(id=submission.id).update(submitted_at=submitted_at)
+        cls.newest_first = [submission.id for submission in sorted(
+            submissions, key=lambda submission: (times[submissions.index(submission)], submission.id), reverse=True)]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        patcher = mock.patch.object(views, 'SUBMISSION_PAGE_SIZE', 3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def page(self, query=''):
+        response = self.client.get(reverse('quiz:submission_list') + (f'?{query}' if query else ''))
+        self.assertEqual(response.status_code, 200)
+        context = response.context
+        return [submission.id for submission in context['submissions']], context['older_query'], context['newer_query']
+
+    def test_pages(self):
+        pages, query = [], ''
+        while True:
+            ids, older, newer = self.page(query)
+            self.assertEqual(newer is None, not pages)
+            pages.append((ids, newer))
+            if older is None:
+                break
+            query = older
+        self.assertEqual([ids for ids, _ in pages], [self.newest_first[0:3], self.newest_first[3:6], self.newest_first[6:8]])
+
+        # And back again, from the last page to the first
+        for (ids, newer), (previous_ids, _) in zip(pages[:0:-1], pages[-2::-1]):
+            self.assertEqual(self.page(newer)[0], previous_ids)
+
+    def test_bad_cursors(self):
+        first = self.page()
+        for cursor in ('x', '1.2.3', '1.', '99999999999999999999.1', '-99999999999999999999.1', '1e9.1'):
+            for key in ('after', 'before'):
+                with self.subTest(cursor=cursor, key=key):
+                    self.assertEqual(self.page(f'{key}={cursor}'), first)
+
+    def test_filter_choices(self):
+        response = self.client.get(reverse('quiz:submission_list'))
+        self.assertEqual([quiz.title for quiz in response.context['quizzes']], ['Arrays'])
+        self.assertEqual([problem.title for problem in response.context['problems']], ['Two Sum'])
+
+        self.client.logout()
+        response = self.client.get(reverse('quiz:submission_list'))
+        self.assertEqual((list(response.context['quizzes']), list(response.context['problems'])), ([], []))
+
+
+@override_settings(EXECUTION_BACKENDS={'default': 'quiz.tests.ScriptedBackend'})
+class ValidateReferenceSolutionsTests(TestCase):
+    """The reference solution check resumes where it stopped and can fix expected outputs."""
+
+    def setUp(self):
+        quiz = Quiz.objects.create(title='Quiz', description='')
+        self.problem = Problem.objects.create(quiz=quiz, title='Echo', description='', difficulty='easy',
+                                              solution=f'print(input())  # {self.id()}')
+        for value in range(1, 6):
+            ProblemTestCase.objects.create(problem=self.problem, input_data=str(value), expected_output=str(value))
+        self.wrong = ProblemTestCase.objects.create(problem=self.problem, input_data='6', expected_output='7')
+        self.executed = []
+        run_test_cases = judging.run_test_cases
+
+        def run(code, language_id, cases, **kwargs):
+            if getattr(self, 'interrupt_at', None) == len(self.executed):
+                raise RuntimeError('interrupted')
+            self.executed.append([case.input_data for case in cases])
+            return run_test_cases(code, language_id, cases, **kwargs)
+
+        patcher = mock.patch('quiz.management.commands.validate_reference_solutions.run_test_cases', run)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def validate(self, *args):
+        self.executed.clear()
+        out = StringIO()
+        call_command('validate_reference_solutions', '--workers', '1', '--chunk-size', '2', *args, stdout=out)
+        return out.getvalue()
+
+    def test_report(self):
+        out = self.validate()
+        self.assertIn('6 test(s) to validate, 0 already done', out)
+        self.assertIn('5 ok, 1 mismatched, 0 fixed, 0 errors', out)
+        self.assertIn(f'test #{self.wrong.id}: expected output differs, reference printed "6"', out)
+        self.assertEqual(set(ProblemTestCase.objects.values_list('reference_memory', flat=True)), {3000})
+        self.wrong.refresh_from_db()
+        self.assertEqual((self.wrong.expected_output, self.wrong.reference_version), ('7', ''))
+
+        # Only the mismatch is checked again
+        out = self.validate()
+        self.assertIn('1 test(s) to validate, 5 already done', out)
+        self.assertEqual(self.executed, [['6']])
+
+    def test_resume(self):
+        self.interrupt_at = 1
+        with self.assertRaisesMessage(RuntimeError, 'interrupted'):
+            self.validate()
+        self.assertEqual(self.executed, [['1', '2']])
+
+        self.interrupt_at = None
+        out = self.validate()
+        self.assertIn('4 test(s) to validate, 2 already done', out)
+        self.assertEqual(self.executed, [['3', '4'], ['5', '6']])
+
+        # A new solution is validated from scratch, as is everything with --restart
+        self.assertIn('1 test(s) to validate, 5 already done', self.validate())
+        self.assertIn('6 test(s) to validate, 0 already done', self.validate('--restart'))
+        self.problem.solution += '\n'
+        self.problem.save()
+        self.assertIn('6 test(s) to validate, 0 already done', self.validate())
+
+    def test_fix(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        with mock.patch.object(testdata, 'TESTDATA_ROOT', root.name), \
+                mock.patch.object(testdata, 'TESTDATA_INLINE_LIMIT', 4):
+            # Also a wrong expected output kept out of row
+            stored = ProblemTestCase.objects.create(problem=self.problem, input_data='8', expected_output='8 but longer')
+            self.assertTrue(stored.output_sha256)
+            out = self.validate('--fix')
+            self.assertIn('5 ok, 2 mismatched, 2 fixed, 0 errors', out)
+            for case, expected in ((self.wrong, '6'), (stored, '8')):
+                case.refresh_from_db()
+                self.assertEqual((case.get_expected_output(), case.output_sha256), (expected, ''))
+                self.assertEqual(case.reference_version, self.problem.solution_version)
+            self.assertIn('0 test(s) to validate, 7 already done', self.validate('--fix'))
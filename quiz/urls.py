@@ -13,4 +13,11 @@ urlpatterns = [
     # API endpoints are now also in views.py
     path('api/run/<int:problem_id>/', views.run_code, name='run_code'),
     path('api/submit/<int:problem_id>/', views.submit_solution, name='submit_solution'),
+    # Threaded versions of the two above, for WSGI deployments
+    path('api/sync/run/<int:problem_id>/', views.run_code_sync, name='run_code_sync'),
+    path('api/sync/submit/<int:problem_id>/', views.submit_solution_sync, name='submit_solution_sync'),
+    path('api/submissions/<int:submission_id>/status/', views.submission_status, name='submission_status'),
+    path('api/submissions/<int:submission_id>/events/', views.submission_events, name='submission_events'),
+    path('api/quizzes/<int:quiz_id>/leaderboard/', views.quiz_leaderboard, name='quiz_leaderboard'),
+    path('api/judging/metrics/', views.judging_metrics, name='judging_metrics'),
 ]
@@ -1,80 +1,59 @@
+import asyncio
 import os
-import requests
 import logging
 import json
-import re
+import math
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db import connections
+from django.db.models import Count, Max, Min, Q
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from django.urls import reverse
+from asgiref.sync import SyncToAsync, sync_to_async
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
 from django.conf import settings
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from django.contrib.auth.models import User
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework import status
 from .models import Quiz, Problem, Submission, TestCase
+from .judging import acall_judge0_api, call_judge0_api, enqueue_submission
+from .leaderboard import get_leaderboard
+from .limits import execution_limits
+from .page_cache import PAGE_CACHE_TIMEOUT, cache_anonymous_page, get_versions
+from .progress import get_progress_hub, submission_verdict
+from .ratelimit import RunRateThrottle, SubmitRateThrottle
+from .scheduler import get_scheduler
 
 # --- Configuration ---
 logger = logging.getLogger(__name__)
-JUDGE0_URL = getattr(settings, 'JUDGE0_URL', 'http://judge0:2358')
-
-# --- Helper Functions ---
-
-def call_judge0_api(code, language_id, stdin=None):
-    """
-    A single, robust helper function to submit code to the Judge0 API.
-    """
-    api_url = f"{JUDGE0_URL}/submissions?base64_encoded=false&wait=true"
-    payload = {
-        "source_code": code,
-        "language_id": int(language_id),
-        "stdin": stdin or "",
-    }
-    headers = {"Content-Type": "application/json"}
-
-    try:
-        logger.info(f"Sending request to Judge0: {api_url} with language_id: {language_id}")
-        response = requests.post(api_url, headers=headers, json=payload, timeout=20)
-        response.raise_for_status()  # Raises an exception for 4xx/5xx errors
-        return {"success": True, "data": response.json()}
-    except requests.exceptions.Timeout:
-        logger.error("Judge0 API request timed out.")
-        return {"success": False, "error": "Code execution timed out."}
-    except requests.exceptions.ConnectionError:
-        logger.error("Failed to connect to Judge0 API. Check if the service is running and accessible.")
-        return {"success": False, "error": "Could not connect to the code execution service."}
-    except requests.exceptions.RequestException as e:
-        # This will catch the 500 error from Judge0
-        logger.error(f"Judge0 API request failed: {e}")
-        error_details = f"The code execution service returned an error: {e.response.status_code}"
-        try:
-            # Try to get more specific error from Judge0's response
-            judge0_error = e.response.json()
-            if 'error' in judge0_error:
-                 error_details = judge0_error['error']
-        except (ValueError, AttributeError):
-            pass # Keep the generic error if response is not JSON
-        return {"success": False, "error": error_details}
-    except Exception as e:
-        logger.error(f"An unexpected error occurred while calling Judge0: {e}")
-        return {"success": False, "error": "An unexpected internal error occurred."}
-
-def normalize_output(output):
-    """Normalize output by removing extra whitespace and newlines."""
-    if not output:
-        return ""
-    return re.sub(r'\s+$', '', output.strip()).replace('\r\n', '\n')
-
-def compare_outputs(expected, actual):
-    """Compare expected and actual outputs with normalization."""
-    return normalize_output(expected) == normalize_output(actual)
+JUDGE_STATUS_MAX_WAIT = getattr(settings, 'JUDGE_STATUS_MAX_WAIT', 25)
+JUDGE_PROGRESS_STREAM_TIMEOUT = getattr(settings, 'JUDGE_PROGRESS_STREAM_TIMEOUT', 300)
+JUDGE_PROGRESS_HEARTBEAT = getattr(settings, 'JUDGE_PROGRESS_HEARTBEAT', 15)
+SUBMISSION_PAGE_SIZE = getattr(settings, 'SUBMISSION_PAGE_SIZE', 25)
+LEADERBOARD_MAX_LIMIT = 100
+LANGUAGE_IDS = {language_id for language_id, _ in Problem.LANGUAGE_CHOICES}
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
 
 
 # --- Template-Rendering Views ---
 
+@cache_anonymous_page(lambda: [('quizzes',)])
 def quiz_list(request):
     """Displays a list of all available quizzes."""
     quizzes = Quiz.objects.all()
-    return render(request, 'quiz/quiz_list.html', {'quizzes': quizzes})
+    context = {
+        'quizzes': quizzes,
+        'page_version': ':'.join(get_versions(('quizzes',))),
+        'page_cache_timeout': PAGE_CACHE_TIMEOUT,
+    }
+    return render(request, 'quiz/quiz_list.html', context)
 
+@cache_anonymous_page(lambda quiz_id: [('quiz', quiz_id)])
 def quiz_detail(request, quiz_id):
     """Displays the details and problems for a single quiz."""
     quiz = get_object_or_404(Quiz, id=quiz_id)
@@ -82,46 +61,170 @@ def quiz_detail(request, quiz_id):
     context = {
         'quiz': quiz,
         'problems': problems,
+        'page_version': ':'.join(get_versions(('quiz', quiz_id))),
+        'page_cache_timeout': PAGE_CACHE_TIMEOUT,
     }
     return render(request, 'quiz/quiz_detail.html', context)
 
+@cache_anonymous_page(lambda problem_id: [('problem', problem_id)])
 def code_editor(request, problem_id):
-    """The main code editor interface for a specific problem."""
-    problem = get_object_or_404(Problem, id=problem_id)
+    """
+    The main code editor interface for a specific problem.
+
+    Renders in four queries however large the quiz is: the problem with its
+    quiz, the position and neighbour ids from one aggregate over the quiz's
+    problem index, the neighbours' titles, and the sample tests.
+    """
+    problem = get_object_or_404(
+        Problem.objects.select_related('quiz').only(
+            'id', 'quiz_id', 'title', 'description', 'starter_code', 'language_id',
+            'quiz__id', 'quiz__title', 'quiz__time_limit',
+        ),
+        id=problem_id,
+    )
     quiz = problem.quiz
-    all_problems = quiz.problems.all().order_by('id')
-    current_index = list(all_problems).index(problem)
-    sample_test_cases = problem.testcase_set.filter(is_sample=True)
-    
+    all_problems = quiz.problems.order_by('id').only('id', 'quiz_id', 'title')
+    before, after = Q(id__lt=problem.id), Q(id__gt=problem.id)
+    position = all_problems.aggregate(
+        current_index=Count('id', filter=before),
+        total_problems=Count('id'),
+        prev_id=Max('id', filter=before),
+        next_id=Min('id', filter=after),
+    )
+    neighbours = {
+        neighbour.id: neighbour
+        for neighbour in all_problems.filter(id__in=[position['prev_id'], position['next_id']])
+    }
+    sample_test_cases = list(problem.testcase_set.filter(is_sample=True).order_by('id').only(
+        'id', 'problem_id', 'input_data', 'expected_output', 'input_sha256', 'input_size', 'output_sha256', 'output_size',
+    ))
+
     context = {
         'problem': problem,
         'quiz': quiz,
         'all_problems': all_problems,
         'supported_languages': Problem.LANGUAGE_CHOICES,
-        'current_index': current_index,
-        'total_problems': all_problems.count(),
+        'current_index': position['current_index'],
+        'total_problems': position['total_problems'],
         'sample_test_cases': sample_test_cases,
-        'next_problem': all_problems[current_index + 1] if current_index + 1 < len(all_problems) else None,
-        'prev_problem': all_problems[current_index - 1] if current_index > 0 else None,
+        'next_problem': neighbours.get(position['next_id']),
+        'prev_problem': neighbours.get(position['prev_id']),
+        'page_version': ':'.join(get_versions(('problem', problem_id))),
+        'page_cache_timeout': PAGE_CACHE_TIMEOUT,
     }
     return render(request, 'quiz/code_editor.html', context)
 
+def _encode_cursor(submission):
+    micros = (submission.submitted_at - EPOCH) // timedelta(microseconds=1)
+    return f'{micros}.{submission.id}'
+
+def _decode_cursor(value):
+    """Turn a cursor back into (submitted_at, id), or None if it is malformed."""
+    try:
+        micros, submission_id = (int(part) for part in value.split('.'))
+        return EPOCH + timedelta(microseconds=micros), submission_id
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+def _int_param(request, name):
+    value = request.GET.get(name, '')
+    return int(value) if value.isdigit() else None
+
 def submission_list(request):
-    """Displays a list of the current user's past submissions."""
+    """
+    Displays the current user's past submissions, newest first, one page at a time.
+
+    Pages are keyset-paginated on (submitted_at, id): `after` holds the cursor
+    of the last row seen for older submissions, `before` the first row for
+    newer ones. Each page is one indexed query whatever the history length,
+    with the problem joined in and the code and output columns left out.
+    The filters only offer the quizzes and problems the user has submitted to.
+    """
+    if request.user.is_authenticated:
+        problems = Problem.objects.filter(
+            id__in=Submission.objects.filter(user=request.user).values('problem_id'),
+        ).order_by('quiz_id', 'id').only('id', 'title', 'quiz_id')
+        quizzes = Quiz.objects.filter(id__in=problems.values('quiz_id')).order_by('id').only('id', 'title')
+    else:
+        problems, quizzes = Problem.objects.none(), Quiz.objects.none()
+    filters = {
+        'quiz': _int_param(request, 'quiz'),
+        'problem': _int_param(request, 'problem'),
+        'status': request.GET.get('status', ''),
+    }
+    context = {
+        'quizzes': quizzes,
+        'problems': problems,
+        'status_choices': Submission.STATUS_CHOICES,
+        'filters': filters,
+        'submissions': [],
+    }
     if not request.user.is_authenticated:
-        return render(request, 'quiz/submission_list.html', {'submissions': []})
-    submissions = Submission.objects.filter(user=request.user).order_by('-submitted_at')
-    return render(request, 'quiz/submission_list.html', {'submissions': submissions})
+        return render(request, 'quiz/submission_list.html', context)
+
+    submissions = Submission.objects.filter(user=request.user).select_related('problem').only(
+        'id', 'problem_id', 'language_id', 'status', 'score', 'submitted_at', 'execution_time', 'memory',
+        'problem__id', 'problem__title', 'problem__quiz_id',
+    )
+    if filters['quiz'] is not None:
+        submissions = submissions.filter(problem__quiz_id=filters['quiz'])
+    if filters['problem'] is not None:
+        submissions = submissions.filter(problem_id=filters['problem'])
+    if filters['status']:
+        submissions = submissions.filter(status=filters['status'])
+
+    after = _decode_cursor(request.GET.get('after'))
+    before = _decode_cursor(request.GET.get('before')) if after is None else None
+    if before is not None:
+        # Newer rows: walk forwards from the cursor, then flip back to newest first
+        submitted_at, submission_id = before
+        page = list(submissions.filter(
+            Q(submitted_at__gte=submitted_at), Q(submitted_at__gt=submitted_at) | Q(id__gt=submission_id),
+        ).order_by('submitted_at', 'id')[:SUBMISSION_PAGE_SIZE + 1])
+        has_newer = len(page) > SUBMISSION_PAGE_SIZE
+        page = page[:SUBMISSION_PAGE_SIZE][::-1]
+        has_older = True
+    else:
+        if after is not None:
+            submitted_at, submission_id = after
+            submissions = submissions.filter(
+                Q(submitted_at__lte=submitted_at), Q(submitted_at__lt=submitted_at) | Q(id__lt=submission_id),
+            )
+        page = list(submissions.order_by('-submitted_at', '-id')[:SUBMISSION_PAGE_SIZE + 1])
+        has_older = len(page) > SUBMISSION_PAGE_SIZE
+        page = page[:SUBMISSION_PAGE_SIZE]
+        has_newer = after is not None
+
+    languages = dict(Problem.LANGUAGE_CHOICES)
+    for submission in page:
+        submission.language_name = languages.get(submission.language_id, submission.language_id)
+
+    def page_query(key, row):
+        params = request.GET.copy()
+        params.pop('after', None)
+        params.pop('before', None)
+        params[key] = _encode_cursor(row)
+        return params.urlencode()
+
+    context.update({
+        'submissions': page,
+        'older_query': page_query('after', page[-1]) if page and has_older else None,
+        'newer_query': page_query('before', page[0]) if page and has_newer else None,
+    })
+    return render(request, 'quiz/submission_list.html', context)
 
 
 # --- API Views ---
 
 @api_view(['POST'])
 @permission_classes([AllowAny]) # Use IsAuthenticated in production
-def run_code(request, problem_id):
+@throttle_classes([RunRateThrottle])
+def run_code_sync(request, problem_id):
     """
     API endpoint to run code with custom input. Does not create a submission.
-    This is used for the "Run" button in the editor.
+
+    Threaded version of `run_code` for WSGI deployments, where each async
+    view call would start an event loop of its own.
     """
     code = request.data.get('code')
     language_id = request.data.get('language_id')
@@ -129,8 +232,17 @@ def run_code(request, problem_id):
 
     if not all([code, language_id]):
         return Response({'success': False, 'error': 'Code and language are required.'}, status=status.HTTP_400_BAD_REQUEST)
+    language_id = _language_id(language_id)
+    if language_id is None:
+        return Response({'success': False, 'error': 'Unsupported language.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    result = call_judge0_api(code, language_id, stdin=custom_input)
+    problem = get_object_or_404(Problem, id=problem_id)
+    # Runs on a sample input rank above experiments with custom input
+    is_sample_run = TestCase.objects.filter(problem_id=problem_id, is_sample=True, input_data=custom_input).exists()
+    result = call_judge0_api(code, language_id, stdin=custom_input,
+                             priority='sample' if is_sample_run else 'custom',
+                             user_key=request.user.id,
+                             limits=execution_limits(problem, language_id))
 
     if not result.get('success'):
         return Response(result, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -150,10 +262,14 @@ def run_code(request, problem_id):
 
 @api_view(['POST'])
 @permission_classes([AllowAny]) # Use IsAuthenticated in production
-def submit_solution(request, problem_id):
+@throttle_classes([SubmitRateThrottle])
+def submit_solution_sync(request, problem_id):
     """
     API endpoint to submit a solution for final evaluation against all test cases.
-    This is used for the "Submit" button.
+
+    The submission is stored with status `In Queue` and judged in the background;
+    poll `submission_status` for the verdict. Threaded version of `submit_solution`
+    for WSGI deployments.
     """
     problem = get_object_or_404(Problem, id=problem_id)
     code = request.data.get('code')
@@ -161,61 +277,382 @@ def submit_solution(request, problem_id):
 
     if not all([code, language_id]):
         return Response({'success': False, 'error': 'Code and language are required.'}, status=status.HTTP_400_BAD_REQUEST)
+    language_id = _language_id(language_id)
+    if language_id is None:
+        return Response({'success': False, 'error': 'Unsupported language.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    test_cases = TestCase.objects.filter(problem=problem)
-    if not test_cases.exists():
+    if not TestCase.objects.filter(problem=problem).exists():
         return Response({'success': False, 'error': 'No test cases found for this problem.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    passed_tests = 0
-    test_results = []
-    final_status = 'Accepted' # Assume success until a test fails
-
-    for case in test_cases:
-        result = call_judge0_api(code, language_id, case.input_data)
-        
-        if not result.get('success'):
-            # If the API call itself fails, it's an internal error.
-            return Response(result, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        data = result['data']
-        status_desc = data.get('status', {}).get('description', 'Unknown')
-        is_correct = False
-
-        if status_desc == 'Accepted':
-            if compare_outputs(case.expected_output, data.get('stdout', '')):
-                is_correct = True
-                passed_tests += 1
-            else:
-                if final_status == 'Accepted': final_status = 'Wrong Answer'
+    submission = Submission.objects.create(
+        user=request.user if request.user.is_authenticated else None,
+        problem=problem,
+        code=code,
+        language_id=language_id,
+        status='In Queue',
+    )
+    enqueue_submission(submission)
+
+    return Response({
+        'success': True,
+        'submission_id': submission.id,
+        'status': submission.status,
+        'status_url': reverse('quiz:submission_status', args=[submission.id]),
+        'events_url': reverse('quiz:submission_events', args=[submission.id]),
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+# Plain async views: DRF 3.14 has no async support, so what its API views
+# do before the view runs (the configured authenticators, with the CSRF check
+# of session users, and rate limits) is done by `_admit`.
+
+def _authenticate(request):
+    """
+    Return the request's user with the configured DRF authenticators, or
+    (None, an error response) if its credentials are refused.
+    """
+    request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        return request.user, None
+    except (AuthenticationFailed, PermissionDenied) as e:
+        # DRF answers 401 only if the first authenticator can ask for credentials
+        header = request.authenticators[0].authenticate_header(request) if request.authenticators else None
+        if isinstance(e, AuthenticationFailed) and header:
+            response = JsonResponse({'detail': str(e.detail)}, status=status.HTTP_401_UNAUTHORIZED)
+            response['WWW-Authenticate'] = header
         else:
-            if final_status == 'Accepted': final_status = status_desc
-        
-        test_results.append({
-            'passed': is_correct,
-            'status': status_desc,
-            'is_sample': case.is_sample,
-        })
-    
-    score = int((passed_tests / test_cases.count()) * 100)
-    
-    # Create the submission record
-    submission_user = request.user if request.user.is_authenticated else None
-    if submission_user:
-        Submission.objects.create(
-            user=submission_user,
-            problem=problem,
-            code=code,
-            language_id=language_id,
-            status=final_status,
-            score=score,
-            output=f"Passed {passed_tests}/{test_cases.count()} test cases.",
-        )
+            response = JsonResponse({'detail': str(e.detail)}, status=status.HTTP_403_FORBIDDEN)
+        return None, response
+
+
+def _admit(request, throttle_class):
+    """
+    Return the authenticated user's id (or None), or an error response if
+    the request must be refused, like DRF would for the threaded views.
+    """
+    user, refused = _authenticate(request)
+    if refused is not None:
+        return None, refused
+    throttle = throttle_class()
+    if not throttle.allow_request(request, None):
+        wait = math.ceil(throttle.wait())
+        response = JsonResponse({'detail': f'Request was throttled. Expected available in {wait} seconds.'},
+                                status=status.HTTP_429_TOO_MANY_REQUESTS)
+        response['Retry-After'] = str(wait)
+        return None, response
+    return (user.id if user.is_authenticated else None), None
+
+
+_thread_release_unsupported = False
+
+async def _release_request_thread():
+    """
+    Let go of this request's thread before a long wait. Django's ASGIHandler
+    runs a request's sync code (starting with the request_started signal) on
+    an executor thread of its own that lives until the response is sent, so
+    every waiting request would otherwise hold an idle thread. Sync calls
+    later in the request start a new one.
+
+    Neither Django nor asgiref has a supported way to do this: the handler
+    sends request_started on that thread before any view runs, so a view
+    cannot avoid it. This relies on the per-context executors of asgiref 3.x
+    (pinned in requirements.txt), and logs a warning, once, and keeps the
+    thread if they are not there. AsgiRequestThreadTests fails if it stops
+    working.
+    """
+    global _thread_release_unsupported
+    executors = getattr(SyncToAsync, 'context_to_thread_executor', None)
+    current_context = getattr(SyncToAsync, 'thread_sensitive_context', None)
+    if executors is None or current_context is None:
+        if not _thread_release_unsupported:
+            _thread_release_unsupported = True
+            logger.warning("This asgiref version has no per-context executors; waiting requests keep their thread.")
+        return
+    context = current_context.get(None)
+    if context is None or context not in executors:
+        return  # Not under ASGIHandler (e.g. the test client), or already released
+    # Runs on that thread, so it closes the connections the thread opened;
+    # they would outlive it otherwise
+    await sync_to_async(connections.close_all)()
+    executors.pop(context).shutdown(wait=False)
+
+
+def _csrf_exempt(view):
+    # Like DRF's views, which check CSRF for signed-in users only. Django's
+    # csrf_exempt would wrap the view in a sync function before Django 5.0.
+    view.csrf_exempt = True
+    return view
+
+
+def _json_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _language_id(value):
+    """`value` as the id of a language in Problem.LANGUAGE_CHOICES, or None."""
+    try:
+        language_id = int(value)
+    except (TypeError, ValueError):
+        return None
+    return language_id if language_id in LANGUAGE_IDS else None
 
+
+@_csrf_exempt
+async def run_code(request, problem_id):
+    """
+    API endpoint to run code with custom input. Does not create a submission.
+    This is used for the "Run" button in the editor.
+
+    The call to Judge0 is awaited on the async client, so under the ASGI
+    application a run in flight holds no thread.
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    user_id, refused = await sync_to_async(_admit)(request, RunRateThrottle)
+    if refused is not None:
+        return refused
+
+    data = _json_body(request)
+    if data is None:
+        return JsonResponse({'detail': 'JSON parse error.'}, status=status.HTTP_400_BAD_REQUEST)
+    code = data.get('code')
+    language_id = data.get('language_id')
+    custom_input = data.get('input', '')
+
+    if not all([code, language_id]):
+        return JsonResponse({'success': False, 'error': 'Code and language are required.'}, status=status.HTTP_400_BAD_REQUEST)
+    language_id = _language_id(language_id)
+    if language_id is None:
+        return JsonResponse({'success': False, 'error': 'Unsupported language.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    problem = await Problem.objects.filter(id=problem_id).afirst()
+    if problem is None:
+        return JsonResponse({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    # Runs on a sample input rank above experiments with custom input
+    is_sample_run = await TestCase.objects.filter(problem_id=problem_id, is_sample=True, input_data=custom_input).aexists()
+    await _release_request_thread()
+    result = await acall_judge0_api(code, language_id, stdin=custom_input,
+                                    priority='sample' if is_sample_run else 'custom',
+                                    user_key=user_id,
+                                    limits=execution_limits(problem, language_id))
+
+    if not result.get('success'):
+        return JsonResponse(result, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    data = result['data']
+    status_info = data.get('status', {})
+
+    return JsonResponse({
+        'success': True,
+        'output': data.get('stdout') or '',
+        'error': data.get('stderr') or data.get('compile_output') or '',
+        'status': status_info.get('description', 'Unknown'),
+        'execution_time': data.get('time', 0),
+        'memory': data.get('memory', 0),
+    })
+
+
+@_csrf_exempt
+async def submit_solution(request, problem_id):
+    """
+    API endpoint to submit a solution for final evaluation against all test cases.
+    This is used for the "Submit" button.
+
+    The submission is stored with status `In Queue` and judged in the background;
+    follow `submission_events` or poll `submission_status` for the verdict.
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    user_id, refused = await sync_to_async(_admit)(request, SubmitRateThrottle)
+    if refused is not None:
+        return refused
+
+    problem = await Problem.objects.filter(id=problem_id).only('id').afirst()
+    if problem is None:
+        return JsonResponse({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    data = _json_body(request)
+    if data is None:
+        return JsonResponse({'detail': 'JSON parse error.'}, status=status.HTTP_400_BAD_REQUEST)
+    code = data.get('code')
+    language_id = data.get('language_id')
+
+    if not all([code, language_id]):
+        return JsonResponse({'success': False, 'error': 'Code and language are required.'}, status=status.HTTP_400_BAD_REQUEST)
+    language_id = _language_id(language_id)
+    if language_id is None:
+        return JsonResponse({'success': False, 'error': 'Unsupported language.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if not await TestCase.objects.filter(problem=problem).aexists():
+        return JsonResponse({'success': False, 'error': 'No test cases found for this problem.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    submission = await Submission.objects.acreate(
+        user_id=user_id,
+        problem=problem,
+        code=code,
+        language_id=language_id,
+        status='In Queue',
+    )
+    await sync_to_async(enqueue_submission)(submission)
+
+    return JsonResponse({
+        'success': True,
+        'submission_id': submission.id,
+        'status': submission.status,
+        'status_url': reverse('quiz:submission_status', args=[submission.id]),
+        'events_url': reverse('quiz:submission_events', args=[submission.id]),
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+async def _wait_for_verdict(submission, timeout):
+    """
+    Wait up to `timeout` seconds for the submission's `done` progress event,
+    then reload its verdict. The database is only read again if no event
+    arrives for a heartbeat, in case the events have expired.
+    """
+    heartbeat = min(JUDGE_PROGRESS_HEARTBEAT, timeout)
+    events = get_progress_hub().subscribe(submission.id, heartbeat=heartbeat)
+
+    async def judged():
+        async for event in events:
+            if event is not None:
+                if event['type'] == 'done':
+                    return
+                continue
+            await submission.arefresh_from_db(fields=['status'])
+            if submission.is_finished:
+                return
+            await _release_request_thread()
+
+    try:
+        await asyncio.wait_for(judged(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        await events.aclose()
+    await submission.arefresh_from_db(fields=['status', 'score', 'error', 'test_results'])
+
+
+async def submission_status(request, submission_id):
+    """
+    API endpoint reporting the judging state of a submission.
+
+    Pass `?wait=<seconds>` to long-poll: the request is held until the verdict
+    is available or the wait (capped at JUDGE_STATUS_MAX_WAIT) runs out. Like
+    `submission_events`, the wait is for the progress hub's `done` event, so
+    a waiting request holds no thread.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    user, refused = await sync_to_async(_authenticate)(request)
+    if refused is not None:
+        return refused
+    submission = await Submission.objects.filter(id=submission_id).only(
+        'id', 'user_id', 'status', 'score', 'error', 'test_results',
+    ).afirst()
+    if submission is None:
+        return JsonResponse({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    if submission.user_id and submission.user_id != user.id and not user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Submission not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        wait = min(float(request.GET.get('wait', 0)), JUDGE_STATUS_MAX_WAIT)
+    except ValueError:
+        wait = 0
+    if not submission.is_finished and wait > 0:
+        await _release_request_thread()
+        await _wait_for_verdict(submission, wait)
+    return JsonResponse({'success': True, **submission_verdict(submission)})
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def submission_events(request, submission_id):
+    """
+    Server-Sent Events stream of a submission's judging: a `test` event with
+    the verdict, timings and running score of each test as it is judged,
+    then a `done` event carrying what the status endpoint reports.
+
+    This is a plain async view rather than a DRF one: served by the ASGI
+    application, a stream waiting for its next event holds no thread.
+    """
+    user_id, is_staff = await sync_to_async(lambda: (request.user.id, request.user.is_staff))()
+    submission = await Submission.objects.filter(id=submission_id).only(
+        'id', 'user_id', 'status', 'score', 'error', 'test_results',
+    ).afirst()
+    if submission is None or (submission.user_id and submission.user_id != user_id and not is_staff):
+        return JsonResponse({'success': False, 'error': 'Submission not found.'}, status=404)
+
+    async def stream():
+        if submission.is_finished:
+            yield _sse('done', submission_verdict(submission))
+            return
+        await _release_request_thread()
+        deadline = time.monotonic() + JUDGE_PROGRESS_STREAM_TIMEOUT
+        rechecked = False
+        events = get_progress_hub().subscribe(submission.id, heartbeat=JUDGE_PROGRESS_HEARTBEAT)
+        try:
+            async for event in events:
+                if event is not None:
+                    yield _sse(event['type'], event)
+                    if event['type'] == 'done':
+                        return
+                    continue
+                if not rechecked:
+                    # Events of a long-finished submission may have expired
+                    rechecked = True
+                    await submission.arefresh_from_db(fields=['status', 'score', 'error', 'test_results'])
+                    if submission.is_finished:
+                        yield _sse('done', submission_verdict(submission))
+                        return
+                    await _release_request_thread()
+                if time.monotonic() >= deadline:
+                    return  # The client falls back to the status endpoint
+                yield ': keep-alive\n\n'
+        finally:
+            await events.aclose()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Don't let a proxy hold events back
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def quiz_leaderboard(request, quiz_id):
+    """
+    API endpoint for the best users of a quiz (`?limit=`, default 10) and,
+    for a signed-in user, their own rank.
+    """
+    quiz = get_object_or_404(Quiz.objects.only('id'), id=quiz_id)
+    limit = min(_int_param(request, 'limit') or 10, LEADERBOARD_MAX_LIMIT)
+    leaderboard = get_leaderboard()
+    top = leaderboard.top(quiz.id, limit)
+    usernames = dict(User.objects.filter(id__in=[user_id for user_id, _, _ in top]).values_list('id', 'username'))
+
+    me = None
+    if request.user.is_authenticated:
+        standing = leaderboard.rank(quiz.id, request.user.id)
+        if standing is not None:
+            me = {'rank': standing[0], 'total_score': standing[1]}
     return Response({
         'success': True,
-        'status': final_status,
-        'score': score,
-        'passed_tests': passed_tests,
-        'total_tests': test_cases.count(),
-        'test_results': test_results,
+        'leaderboard': [
+            {'rank': position, 'username': usernames.get(user_id), 'total_score': total, 'reached_at': reached_at}
+            for position, (user_id, total, reached_at) in enumerate(top, start=1)
+        ],
+        'me': me,
     })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def judging_metrics(request):
+    """Staff-only snapshot of the judging scheduler: capacity use, queue depth and wait times per class."""
+    return Response({'success': True, 'scheduler': get_scheduler().metrics()})